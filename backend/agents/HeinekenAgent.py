@@ -1,3 +1,5 @@
+import hashlib
+
 from langchain.agents import create_agent
 
 class HeinekenAgent:
@@ -9,6 +11,9 @@ class HeinekenAgent:
             llm: The language model to use (e.g., OpenAI, Azure OpenAI)
             tools: A list of tools the agent can use (e.g., search, database query)
         """
+        self.name = name
+        # Identifies the prompt version, e.g. for memoized answers (see SubAgentRegistry.invoke)
+        self.prompt_hash = hashlib.sha256((system_prompt or "").encode("utf-8")).hexdigest()
         self.agent = create_agent(
             name=name,
             model=chat_model,
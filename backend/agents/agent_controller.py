@@ -1,100 +1,149 @@
 from models.user_session import UserSession
 from agents.HeinekenAgent import HeinekenAgent
 from agents.AgentsEnum import AgentsEnum
+from utils.cache_util import LRUCache
+from utils.agent_catalog import get_agent_system_prompt
 
 import os
+import asyncio
+import contextlib
+import hashlib
+import threading
+import time
 import dotenv
 dotenv.load_dotenv()
 
 from langchain.agents import create_agent
-from langchain.tools import tool
-from langchain_openai import AzureChatOpenAI
+from langchain_core.tools import StructuredTool
 from langchain_core.messages import HumanMessage, AIMessage
+from langgraph.config import get_config, get_stream_writer
 
-AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
-AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
-OPENAI_API_VERSION = os.getenv("OPENAI_API_VERSION", "2025-03-01-preview")
-AZURE_OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4.1")
-AZURE_OPENAI_MODEL_NAME = os.getenv("AZURE_OPENAI_MODEL_NAME", "gpt-4.1")
+from agents.model_factory import get_chat_model
+from utils.logging_setup import logger
 
-FreddyAI_Assistant = None
-BWCS_Agent = None
-Performance_Agent = None
-Reality_Agent = None
-Telescope_Agent = None
-Trends_Agent = None
-Taste_Landscape_Agent = None   
+# Compiled controller graphs keyed by the session agent set (see get_controller_cache_key)
+AGENT_CONTROLLER_CACHE_SIZE = int(os.getenv("AGENT_CONTROLLER_CACHE_SIZE", "64"))
+agent_controller_cache = LRUCache(maxsize=AGENT_CONTROLLER_CACHE_SIZE, name="agent_controller")
 
+# Sub-agent fan-out: how many sub-agents one turn may run at once and how long each may take
+SUBAGENT_MAX_CONCURRENCY = int(os.getenv("SUBAGENT_MAX_CONCURRENCY", "4"))
+SUBAGENT_TIMEOUT_SECONDS = float(os.getenv("SUBAGENT_TIMEOUT_SECONDS", "90"))
+# Longest sub-agent answer handed back to the orchestrator as tool output
+SUBAGENT_RESULT_MAX_CHARS = int(os.getenv("SUBAGENT_RESULT_MAX_CHARS", "8000"))
 
-def get_simple_agent():
-    chat_model = AzureChatOpenAI(
-        model=AZURE_OPENAI_MODEL_NAME,
-        azure_deployment=AZURE_OPENAI_DEPLOYMENT_NAME
-    )
-    
-    agent_controller = create_agent(
-        name=AgentsEnum.FREDDYAI_ASSISTANT.value,
-        model=chat_model, 
-        tools=[]
+# Memoized sub-agent answers keyed by (agent_code, prompt hash, query), shared by all controllers.
+# SUBAGENT_CACHE_TTLS overrides the default TTL per agent, e.g. "Trends_Agent=3600,Reality_Agent=0" (0 disables).
+SUBAGENT_CACHE_SIZE = int(os.getenv("SUBAGENT_CACHE_SIZE", "2048"))
+SUBAGENT_CACHE_TTL_SECONDS = float(os.getenv("SUBAGENT_CACHE_TTL_SECONDS", "900"))
+SUBAGENT_CACHE_TTLS = {
+    agent_code.strip(): float(ttl)
+    for agent_code, ttl in (
+        item.split("=", 1) for item in os.getenv("SUBAGENT_CACHE_TTLS", "").split(",") if "=" in item
     )
+}
+sub_agent_memo_cache = LRUCache(maxsize=SUBAGENT_CACHE_SIZE, name="sub_agent_memo")
+sub_agent_memo_stats = {}
+_memo_stats_lock = threading.Lock()
+
+# Tool descriptions exposed to the orchestrator for each sub-agent.
+# Agents missing here fall back to their Description column from the agents table.
+SUB_AGENT_DESCRIPTIONS = {
+    AgentsEnum.REALITY_AGENT.value: "Reality Agent is designed to provide insights and information about the real world.",
+    AgentsEnum.PERFORMANCE_AGENT.value: "Performance Agent is designed to provide insights and information about system performance.",
+    AgentsEnum.TELESCOPE_AGENT.value: "Telescope Agent is designed to provide insights and information about astronomical data.",
+    AgentsEnum.TRENDS_AGENT.value: "Trends Agent is designed to provide insights and information about market trends.",
+    AgentsEnum.TASTE_LANDSCAPE_AGENT.value: "Taste Landscape Agent is designed to provide insights and information about taste preferences and trends.",
+    AgentsEnum.BWCS_AGENT.value: "BWCS Agent is designed to provide insights and information about business workflows and collaboration systems.",
+}
+
+
+simple_agent = None
+
+def get_simple_agent():
+    global simple_agent
+    if simple_agent is None:
+        simple_agent = create_agent(
+            name=AgentsEnum.FREDDYAI_ASSISTANT.value,
+            model=get_chat_model(), 
+            tools=[]
+        )
         
-    return agent_controller
+    return simple_agent
   
+def get_controller_cache_key(user_session: UserSession):
+    """
+    Build the controller cache key from the sorted session agent codes and a hash of each system prompt.
+    Registering a new agent to the session or editing an agent prompt yields a new key,
+    so stale graphs are never reused and simply age out of the LRU cache.
+    """
+    key_parts = []
+    if user_session and user_session.session_agents:
+        for agent_info in user_session.session_agents:
+            agent_code = agent_info.get("agent_code")
+            system_prompt = get_agent_system_prompt(agent_code)
+            prompt_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+            key_parts.append((agent_code or "", prompt_hash))
+    return tuple(sorted(key_parts))
+
+def get_controller_cache_stats():
+    """Return hit/miss counters of the compiled controller cache"""
+    return agent_controller_cache.stats()
+
+def get_sub_agent_cache_ttl(agent_code: str) -> float:
+    return SUBAGENT_CACHE_TTLS.get(agent_code, SUBAGENT_CACHE_TTL_SECONDS)
+
+def record_sub_agent_memo(agent_code: str, hit: bool):
+    with _memo_stats_lock:
+        counters = sub_agent_memo_stats.setdefault(agent_code, {"hits": 0, "misses": 0})
+        counters["hits" if hit else "misses"] += 1
+
+def get_sub_agent_memo_stats():
+    """Return memo hit/miss counters per sub-agent, plus the shared memo cache counters"""
+    with _memo_stats_lock:
+        per_agent = {agent_code: dict(counters) for agent_code, counters in sub_agent_memo_stats.items()}
+    return {"agents": per_agent, "cache": sub_agent_memo_cache.stats()}
+
 def get_agent_controller(user_session: UserSession):
-    user_session = user_session
+    """
+    Return the compiled FreddyAI controller for the session agents, reusing a cached graph when possible.
+    A cached graph is shared by every session with the same key, so its tools must only reach
+    sub-agents through the controller's own SubAgentRegistry, never through module-level state.
+    """
+    cache_key = get_controller_cache_key(user_session)
+    agent_controller = agent_controller_cache.get(cache_key)
+    if agent_controller is not None:
+        return agent_controller
+    
+    agent_controller = build_agent_controller(user_session)
+    agent_controller_cache.set(cache_key, agent_controller)
+    return agent_controller
+
+def build_agent_controller(user_session: UserSession):
     agent_controller = None
     
-    chat_model = AzureChatOpenAI(
-        model=AZURE_OPENAI_MODEL_NAME,
-        azure_deployment=AZURE_OPENAI_DEPLOYMENT_NAME
-    )
+    chat_model = get_chat_model()
 
-    agent_tools = []
+    registry = SubAgentRegistry()
         
     if user_session and user_session.session_agents:
         for agent_info in user_session.session_agents:
-            agent_id = agent_info.get("agent_id")
             agent_code = agent_info.get("agent_code")
-            system_prompt = agent_info.get("agent_system_prompt", "")
+            system_prompt = get_agent_system_prompt(agent_code)
             
-            if agent_code == AgentsEnum.FREDDYAI_ASSISTANT.value:
+            if not agent_code or agent_code == AgentsEnum.FREDDYAI_ASSISTANT.value:
                 continue  # Skip FreddyAI Assistant for now
             
-            tools = []  # Replace with actual tools list
-            agent_instance = HeinekenAgent(agent_code, chat_model, tools, system_prompt)
+            description = SUB_AGENT_DESCRIPTIONS.get(agent_code) or agent_info.get("agent_description")
+            if not description:
+                logger.warning(f"No tool description for agent {agent_code}, skipping")
+                continue
             
-            if agent_code == AgentsEnum.BWCS_AGENT.value:
-                print("Initializing BWCS Agent")
-                global BWCS_Agent
-                BWCS_Agent = agent_instance
-                agent_tools.append(call_BWCS_Agent)
-            elif agent_code == AgentsEnum.PERFORMANCE_AGENT.value:
-                print("Initializing Performance Agent")
-                global Performance_Agent
-                Performance_Agent = agent_instance
-                agent_tools.append(call_Performance_Agent)
-            elif agent_code == AgentsEnum.REALITY_AGENT.value:
-                print("Initializing Reality Agent")
-                global Reality_Agent
-                Reality_Agent = agent_instance
-                agent_tools.append(call_Reality_Agent)
-            elif agent_code == AgentsEnum.TELESCOPE_AGENT.value:
-                print("Initializing Telescope Agent")
-                global Telescope_Agent
-                Telescope_Agent = agent_instance
-                agent_tools.append(call_Telescope_Agent)
-            elif agent_code == AgentsEnum.TRENDS_AGENT.value:
-                print("Initializing Trends Agent")
-                global Trends_Agent
-                Trends_Agent = agent_instance
-                agent_tools.append(call_Trends_Agent)
-            elif agent_code == AgentsEnum.TASTE_LANDSCAPE_AGENT.value:
-                print("Initializing Taste Landscape Agent")
-                global Taste_Landscape_Agent
-                Taste_Landscape_Agent = agent_instance
-                agent_tools.append(call_Taste_Landscape_Agent)
-
-    print("Creating FreddyAI Assistant with tools:", len(agent_tools))
+            logger.info(f"Initializing {agent_code}")
+            tools = []  # Replace with actual tools list
+            registry.register(agent_code, HeinekenAgent(agent_code, chat_model, tools, system_prompt), description)
+
+    agent_tools = registry.create_tools()
+    logger.info(f"Creating FreddyAI Assistant with {len(agent_tools)} tools")
     agent_controller = create_agent(
         name=AgentsEnum.FREDDYAI_ASSISTANT.value,
         model=chat_model, 
@@ -102,107 +151,140 @@ def get_agent_controller(user_session: UserSession):
     )
         
     return agent_controller
-  
-@tool(
-  AgentsEnum.REALITY_AGENT.value,
-  description="""
-    Use this tool to interact with Reality Agent.
-    Reality Agent is designed to provide insights and information about the real world.
-    Input should be a string query or command for Reality Agent.
-  """
-)
-def call_Reality_Agent(query: str):
-    from langchain_core.messages import HumanMessage
-    print("Calling Reality Agent with query:", query)
-    global Reality_Agent
-    result = Reality_Agent.get_agent().invoke({
-        "messages": [HumanMessage(content=query)]
-    })
-    return result
-
-@tool(
-  AgentsEnum.PERFORMANCE_AGENT.value,
-  description="""
-    Use this tool to interact with Performance Agent.
-    Performance Agent is designed to provide insights and information about system performance.
-    Input should be a string query or command for Performance Agent.
-  """
-)
-def call_Performance_Agent(query: str):
-    from langchain_core.messages import HumanMessage
-    print("Calling Performance Agent with query:", query)
-    global Performance_Agent
-    result = Performance_Agent.get_agent().invoke({
-        "messages": [HumanMessage(content=query)]
-    })
-    return result
-  
-@tool(
-  AgentsEnum.TELESCOPE_AGENT.value,
-  description="""
-    Use this tool to interact with Telescope Agent.
-    Telescope Agent is designed to provide insights and information about astronomical data.
-    Input should be a string query or command for Telescope Agent.
-  """
-)
-def call_Telescope_Agent(query: str):
-    from langchain_core.messages import HumanMessage
-    print("Calling Telescope Agent with query:", query)
-    global Telescope_Agent
-    result = Telescope_Agent.get_agent().invoke({
-        "messages": [HumanMessage(content=query)]
-    })
-    return result
-  
-  
-@tool(
-  AgentsEnum.TRENDS_AGENT.value,
-  description="""
-    Use this tool to interact with Trends Agent.
-    Trends Agent is designed to provide insights and information about market trends.
-    Input should be a string query or command for Trends Agent.
-  """
-)
-def call_Trends_Agent(query: str):
-    from langchain_core.messages import HumanMessage
-    print("Calling Trends Agent with query:", query)
-    global Trends_Agent
-    result = Trends_Agent.get_agent().invoke({
-        "messages": [HumanMessage(content=query)]
-    })
-    return result
-  
-@tool(
-  AgentsEnum.TASTE_LANDSCAPE_AGENT.value,
-  description="""
-    Use this tool to interact with Taste Landscape Agent.
-    Taste Landscape Agent is designed to provide insights and information about taste preferences and trends.
-    Input should be a string query or command for Taste Landscape Agent.
-  """
-)
-def call_Taste_Landscape_Agent(query: str):
-    from langchain_core.messages import HumanMessage
-    print("Calling Taste Landscape Agent with query:", query)
-    global Taste_Landscape_Agent
-    result = Taste_Landscape_Agent.get_agent().invoke({
-        "messages": [HumanMessage(content=query)]
-    })
-    return result
-  
-  
-@tool(
-  AgentsEnum.BWCS_AGENT.value,
-  description="""
-    Use this tool to interact with BWCS Agent.
-    BWCS Agent is designed to provide insights and information about business workflows and collaboration systems.
-    Input should be a string query or command for BWCS Agent.
+
+def create_turn_config():
+    """Per-turn run config carrying the semaphore that caps concurrent sub-agent calls"""
+    return {
+        "configurable": {
+            "subagent_semaphore": asyncio.Semaphore(SUBAGENT_MAX_CONCURRENCY)
+        }
+    }
+
+def get_token_usage(messages):
+    """Sum input/output tokens over the AI messages of an agent run"""
+    input_tokens = 0
+    output_tokens = 0
+    for message in messages:
+        usage = getattr(message, "usage_metadata", None) or {}
+        input_tokens += usage.get("input_tokens", 0)
+        output_tokens += usage.get("output_tokens", 0)
+    return input_tokens, output_tokens
+
+def build_sub_agent_result(agent_code: str, content: str, input_tokens: int, output_tokens: int, started: float, timed_out: bool = False, cached: bool = False):
+    """Compact payload describing one sub-agent call, read directly by the chat stream handler"""
+    return {
+        "agent_code": agent_code,
+        "content": content,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens,
+        "latency_ms": int((time.perf_counter() - started) * 1000),
+        "timed_out": timed_out,
+        "cached": cached
+    }
+
+def write_agent_result(sub_agent_result: dict):
+    """Push a sub-agent result to the custom stream; skipped when the tool runs outside a graph (e.g. called directly)"""
+    try:
+        writer = get_stream_writer()
+    except RuntimeError:
+        return
+    writer({"type": "agent_result", **sub_agent_result})
+
+def trim_sub_agent_text(content: str) -> str:
+    """Final sub-agent text as seen by the orchestrator, capped at SUBAGENT_RESULT_MAX_CHARS"""
+    if len(content) <= SUBAGENT_RESULT_MAX_CHARS:
+        return content
+    return content[:SUBAGENT_RESULT_MAX_CHARS] + "\n\n[truncated]"
+
+class SubAgentRegistry:
+    """
+    Sub-agents bound to one compiled controller, keyed by agent code.
+    Each controller owns its registry, so concurrent sessions with different
+    agent sets never see each other's sub-agents.
+    """
+    
+    def __init__(self):
+        self.agents = {}
+        self.descriptions = {}
+    
+    def register(self, agent_code: str, agent: HeinekenAgent, description: str):
+        self.agents[agent_code] = agent
+        self.descriptions[agent_code] = description
+    
+    def get(self, agent_code: str) -> HeinekenAgent:
+        return self.agents.get(agent_code)
+    
+    def create_tools(self):
+        """Generate one orchestrator tool per registered sub-agent"""
+        return [self.create_tool(agent_code) for agent_code in self.agents]
+    
+    def create_tool(self, agent_code: str):
+        agent_label = agent_code.replace("_", " ")
+        
+        async def call_agent(query: str):
+            logger.info(f"Calling {agent_label} with query: {query}")
+            return await self.invoke(agent_code, query)
+        
+        return StructuredTool.from_function(
+            coroutine=call_agent,
+            name=agent_code,
+            response_format="content_and_artifact",
+            description=f"""
+    Use this tool to interact with {agent_label}.
+    {self.descriptions[agent_code]}
+    Input should be a string query or command for {agent_label}.
   """
-)
-def call_BWCS_Agent(query: str):
-    from langchain_core.messages import HumanMessage
-    print("Calling BWCS Agent with query:", query)
-    global BWCS_Agent
-    result = BWCS_Agent.get_agent().invoke({
-        "messages": [HumanMessage(content=query)]
-    })
-    return result
+        )
+    
+    async def invoke(self, agent_code: str, query: str):
+        """
+        Invoke a sub-agent under the turn's concurrency cap and timeout.
+        Identical queries to the same agent and prompt version are answered from the memo cache
+        without an LLM call, until the agent's TTL (see get_sub_agent_cache_ttl) expires.
+        The answer is pushed to the custom stream as soon as it is ready, so the SSE client
+        does not wait for the other sub-agents the orchestrator consulted in the same step.
+        
+        Returns (text, result): the trimmed final answer the orchestrator sees as tool output,
+        and the structured result (see build_sub_agent_result) carried as the ToolMessage artifact.
+        """
+        try:
+            semaphore = get_config().get("configurable", {}).get("subagent_semaphore")
+        except RuntimeError:
+            semaphore = None
+
+        started = time.perf_counter()
+        agent = self.agents[agent_code]
+        memo_ttl = get_sub_agent_cache_ttl(agent_code)
+        memo_key = (agent_code, agent.prompt_hash, query.strip())
+        
+        if memo_ttl > 0:
+            content = sub_agent_memo_cache.get(memo_key)
+            record_sub_agent_memo(agent_code, content is not None)
+            if content is not None:
+                sub_agent_result = build_sub_agent_result(agent_code, content, 0, 0, started, cached=True)
+                write_agent_result(sub_agent_result)
+                return trim_sub_agent_text(content), sub_agent_result
+        
+        try:
+            async with semaphore or contextlib.nullcontext():
+                result = await asyncio.wait_for(
+                    agent.get_agent().ainvoke({
+                        "messages": [HumanMessage(content=query)]
+                    }),
+                    timeout=SUBAGENT_TIMEOUT_SECONDS
+                )
+        except asyncio.TimeoutError:
+            logger.warning(f"{agent_code} timed out after {SUBAGENT_TIMEOUT_SECONDS}s")
+            text = f"{agent_code} did not answer within {SUBAGENT_TIMEOUT_SECONDS:.0f} seconds."
+            sub_agent_result = build_sub_agent_result(agent_code, text, 0, 0, started, timed_out=True)
+            # Reported like any other result, so the client sees the timeout and the turn is not cached
+            write_agent_result(sub_agent_result)
+            return text, sub_agent_result
+
+        input_tokens, output_tokens = get_token_usage(result["messages"])
+        sub_agent_result = build_sub_agent_result(agent_code, result["messages"][-1].content, input_tokens, output_tokens, started)
+        if memo_ttl > 0:
+            sub_agent_memo_cache.set(memo_key, sub_agent_result["content"], ttl=memo_ttl)
+        
+        write_agent_result(sub_agent_result)
+        return trim_sub_agent_text(sub_agent_result["content"]), sub_agent_result
@@ -0,0 +1,77 @@
+import os
+import threading
+import dotenv
+dotenv.load_dotenv()
+
+import httpx
+from langchain_openai import AzureChatOpenAI
+
+AZURE_OPENAI_API_KEY = os.getenv("AZURE_OPENAI_API_KEY")
+AZURE_OPENAI_ENDPOINT = os.getenv("AZURE_OPENAI_ENDPOINT")
+OPENAI_API_VERSION = os.getenv("OPENAI_API_VERSION", "2025-03-01-preview")
+AZURE_OPENAI_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4.1")
+AZURE_OPENAI_MODEL_NAME = os.getenv("AZURE_OPENAI_MODEL_NAME", "gpt-4.1")
+
+# HTTP connection pool shared by every chat model of the same deployment
+AZURE_OPENAI_MAX_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_CONNECTIONS", "100"))
+AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS", "20"))
+AZURE_OPENAI_KEEPALIVE_EXPIRY = float(os.getenv("AZURE_OPENAI_KEEPALIVE_EXPIRY", "60"))
+AZURE_OPENAI_TIMEOUT = float(os.getenv("AZURE_OPENAI_TIMEOUT", "120"))
+
+_chat_models = {}
+_http_clients = []
+_lock = threading.Lock()
+
+
+def _get_http_limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=AZURE_OPENAI_MAX_CONNECTIONS,
+        max_keepalive_connections=AZURE_OPENAI_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=AZURE_OPENAI_KEEPALIVE_EXPIRY
+    )
+
+
+def get_chat_model(deployment_name: str = None, model_name: str = None) -> AzureChatOpenAI:
+    """
+    Return the process-wide AzureChatOpenAI client for a deployment/model.
+    Each deployment keeps one pooled sync and async HTTP client, so agents and
+    requests reuse open keep-alive connections instead of paying a new TLS handshake per turn.
+    """
+    deployment_name = deployment_name or AZURE_OPENAI_DEPLOYMENT_NAME
+    model_name = model_name or AZURE_OPENAI_MODEL_NAME
+    key = (deployment_name, model_name)
+
+    chat_model = _chat_models.get(key)
+    if chat_model is not None:
+        return chat_model
+
+    with _lock:
+        chat_model = _chat_models.get(key)
+        if chat_model is None:
+            http_client = httpx.Client(limits=_get_http_limits(), timeout=AZURE_OPENAI_TIMEOUT)
+            http_async_client = httpx.AsyncClient(limits=_get_http_limits(), timeout=AZURE_OPENAI_TIMEOUT)
+            _http_clients.extend([http_client, http_async_client])
+
+            chat_model = AzureChatOpenAI(
+                model=model_name,
+                azure_deployment=deployment_name,
+                http_client=http_client,
+                http_async_client=http_async_client
+            )
+            _chat_models[key] = chat_model
+
+    return chat_model
+
+
+async def close_chat_models():
+    """Close the pooled HTTP clients, used on application shutdown"""
+    with _lock:
+        clients = list(_http_clients)
+        _http_clients.clear()
+        _chat_models.clear()
+
+    for client in clients:
+        if isinstance(client, httpx.AsyncClient):
+            await client.aclose()
+        else:
+            client.close()
@@ -0,0 +1,118 @@
+"""
+Microbenchmark for thread message serialization.
+
+Builds a thread of N messages from cursor-like tuples and compares the previous
+path (one dict per row with isoformat() calls, encoded with stdlib json as FastAPI's
+JSONResponse does) with MessageRow + orjson (OrjsonResponse). Reports the encode time
+and the peak memory of building the rows and the response body.
+
+Usage:
+    python benchmarks/bench_thread_serialization.py --messages 10000 --repeat 5
+"""
+
+import argparse
+import datetime
+import json
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+import uuid
+
+import orjson
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.thread_models import MessageRow
+
+
+def make_rows(count: int, content_size: int):
+    """Tuples shaped like the rows of sp_GetThreadMessages"""
+    thread_id = str(uuid.uuid4()).upper()
+    started = datetime.datetime(2026, 1, 1, 9, 0, 0)
+    rows = []
+    for i in range(count):
+        created = started + datetime.timedelta(seconds=i * 7, microseconds=i * 13)
+        is_user = i % 2 == 0
+        rows.append((
+            i + 1, thread_id, None if is_user else 3, None if is_user else "FreddyAI_Assistant",
+            "User" if is_user else "FreddyAI_Assistant", ("x" * content_size) + str(i),
+            0 if is_user else 1200, 0 if is_user else 350, 0 if is_user else 1550,
+            i + 1, False, None, created, created
+        ))
+    return rows
+
+
+def dict_path(rows):
+    messages = []
+    for row in rows:
+        messages.append({
+            "message_id": row[0],
+            "thread_id": str(row[1]),
+            "agent_id": row[2],
+            "agent_name": row[3],
+            "role": row[4],
+            "content": row[5],
+            "input_tokens": row[6],
+            "output_tokens": row[7],
+            "total_tokens": row[8],
+            "message_order": row[9],
+            "is_edited": row[10],
+            "edited_date": row[11].isoformat() if row[11] else None,
+            "created_date": row[12].isoformat() if row[12] else None,
+            "modified_date": row[13].isoformat() if row[13] else None
+        })
+    # Same settings as starlette's JSONResponse.render
+    return json.dumps(
+        {"messages": messages, "total_messages": len(messages)},
+        ensure_ascii=False, allow_nan=False, indent=None, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def row_path(rows):
+    messages = [MessageRow.from_row(row) for row in rows]
+    # Same options as OrjsonResponse.render
+    return orjson.dumps(
+        {"messages": messages, "total_messages": len(messages)},
+        option=orjson.OPT_NON_STR_KEYS
+    )
+
+
+def measure(name: str, func, rows, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = func(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    func(rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(
+        f"{name:<22} median {statistics.median(timings):8.1f} ms   "
+        f"min {min(timings):8.1f} ms   peak memory {peak / 1024 / 1024:7.1f} MiB   body {len(body) / 1024:8.0f} KiB"
+    )
+    return body
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=10000)
+    parser.add_argument("--content-size", type=int, default=400, help="Characters per message")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.messages, args.content_size)
+    print(f"{args.messages} messages, {args.content_size} characters each, {args.repeat} runs")
+
+    dict_body = measure("dict + json", dict_path, rows, args.repeat)
+    row_body = measure("MessageRow + orjson", row_path, rows, args.repeat)
+
+    assert orjson.loads(dict_body) == orjson.loads(row_body), "Both paths must produce the same JSON"
+
+
+if __name__ == "__main__":
+    main()
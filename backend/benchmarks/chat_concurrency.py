@@ -0,0 +1,110 @@
+"""
+Concurrency benchmark for the streaming chat endpoint.
+
+Opens N concurrent POST /api/threads/message streams against a running backend
+(single uvicorn worker recommended) and reports time-to-first-byte and total
+duration per stream. When the turn pipeline never blocks the event loop, wall
+time stays close to the slowest single stream instead of growing with N.
+
+Usage:
+    python benchmarks/chat_concurrency.py --base-url http://127.0.0.1:8000 --concurrency 24
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str) -> str:
+    """Log in and return the access token (the auth cookie is Secure, so it is replayed manually over http)"""
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    response.raise_for_status()
+    return response.json()["access_token"]
+
+
+def percentile(values: list, fraction: float) -> float:
+    index = min(len(values) - 1, max(0, round(fraction * len(values)) - 1))
+    return values[index]
+
+
+async def run_chat_stream(client: httpx.AsyncClient, access_token: str, message: str) -> dict:
+    """Send one chat message on a fresh thread and consume the SSE stream until stream_end"""
+    auth_cookie = f"FreddyAI_Auth={access_token}"
+    create_response = await client.post(
+        "/api/threads/create",
+        json={"thread_title": "Benchmark"},
+        headers={"Cookie": auth_cookie}
+    )
+    create_response.raise_for_status()
+    thread_id = str(create_response.json()["thread_id"])
+
+    started = time.perf_counter()
+    first_byte = None
+    events = 0
+
+    async with client.stream(
+        "POST",
+        "/api/threads/message",
+        json={"message": message},
+        headers={"Cookie": f"{auth_cookie}; FreddyAI_CurrentThread={thread_id}"}
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data: "):
+                continue
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+            events += 1
+            if '"stream_end"' in line:
+                break
+
+    return {
+        "ttfb": first_byte if first_byte is not None else float("nan"),
+        "duration": time.perf_counter() - started,
+        "events": events
+    }
+
+
+async def main(args) -> None:
+    timeout = httpx.Timeout(args.timeout)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=timeout) as client:
+        access_token = await login(client, args.email, args.password)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(
+            *[run_chat_stream(client, access_token, args.message) for _ in range(args.concurrency)],
+            return_exceptions=True
+        )
+        wall_time = time.perf_counter() - started
+
+    succeeded = [result for result in results if isinstance(result, dict)]
+    failed = [result for result in results if not isinstance(result, dict)]
+
+    print(f"Concurrent streams: {args.concurrency} (succeeded: {len(succeeded)}, failed: {len(failed)})")
+    for error in failed[:5]:
+        print(f"  error: {error!r}")
+
+    if not succeeded:
+        return
+
+    ttfbs = sorted(result["ttfb"] for result in succeeded)
+    durations = sorted(result["duration"] for result in succeeded)
+    print(f"TTFB     p50={statistics.median(ttfbs):.2f}s  p95={percentile(ttfbs, 0.95):.2f}s  max={ttfbs[-1]:.2f}s")
+    print(f"Duration p50={statistics.median(durations):.2f}s  max={durations[-1]:.2f}s")
+    print(f"Wall time {wall_time:.2f}s, sum of stream durations {sum(durations):.2f}s")
+    # ~1.0 means streams were serialized, ~N means they fully overlapped
+    print(f"Effective parallelism: {sum(durations) / wall_time:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent streaming chat turns")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--email", default="user@heineken.com")
+    parser.add_argument("--password", default="password123")
+    parser.add_argument("--concurrency", type=int, default=24)
+    parser.add_argument("--message", default="What is performance of Heineken in Vietnam?")
+    parser.add_argument("--timeout", type=float, default=300)
+    asyncio.run(main(parser.parse_args()))
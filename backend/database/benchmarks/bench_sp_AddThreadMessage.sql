@@ -0,0 +1,64 @@
+-- Benchmark: sp_AddThreadMessage insert latency as a thread grows
+-- Inserts @TotalMessages messages into a scratch thread and prints the average latency of every
+-- block of @BlockSize inserts. With the NextMessageOrder / thread_agents counters the averages
+-- should stay flat up to 10k messages; the old MAX(MessageOrder) + COUNT(DISTINCT) version grew linearly.
+-- The scratch thread (and its messages, via ON DELETE CASCADE) is removed at the end.
+
+SET NOCOUNT ON;
+
+DECLARE @TotalMessages INT = 10000;
+DECLARE @BlockSize INT = 1000;
+DECLARE @UserEmail NVARCHAR(255) = N'benchmark@heineken.com';
+DECLARE @AgentCode NVARCHAR(50) = (SELECT TOP 1 [AgentCode] FROM [dbo].[agents] WHERE [Active] = 1 AND [AgentCode] IS NOT NULL ORDER BY [AgentID]);
+DECLARE @ThreadID UNIQUEIDENTIFIER = NEWID();
+DECLARE @Results TABLE ([BlockEnd] INT, [AvgMicroseconds] BIGINT);
+DECLARE @Saved TABLE ([MessageID] NUMERIC(38, 0));
+
+DECLARE @i INT = 1;
+DECLARE @BlockStart DATETIME2(7);
+
+INSERT INTO [dbo].[user_threads] ([ThreadID], [UserEmail], [ThreadTitle], [ThreadIcon])
+VALUES (@ThreadID, @UserEmail, N'Benchmark', N'⏱');
+
+SET @BlockStart = SYSDATETIME();
+
+WHILE @i <= @TotalMessages
+BEGIN
+    DELETE FROM @Saved;
+    
+    -- Alternate user and agent messages like a real conversation
+    IF @i % 2 = 1
+        INSERT INTO @Saved EXEC [dbo].[sp_AddThreadMessage] @ThreadID = @ThreadID, @AgentCode = NULL, @Content = N'benchmark question';
+    ELSE
+        INSERT INTO @Saved EXEC [dbo].[sp_AddThreadMessage] @ThreadID = @ThreadID, @AgentCode = @AgentCode, @Content = N'benchmark answer', @InputTokens = 10, @OutputTokens = 20;
+    
+    IF @i % @BlockSize = 0
+    BEGIN
+        INSERT INTO @Results ([BlockEnd], [AvgMicroseconds])
+        VALUES (@i, DATEDIFF_BIG(MICROSECOND, @BlockStart, SYSDATETIME()) / @BlockSize);
+        
+        SET @BlockStart = SYSDATETIME();
+    END
+    
+    SET @i = @i + 1;
+END
+
+SELECT [BlockEnd] AS MessagesInThread, [AvgMicroseconds] AS AvgInsertMicroseconds
+FROM @Results
+ORDER BY [BlockEnd];
+
+-- Counters must match the actual rows
+SELECT 
+    ut.[TotalMessages],
+    (SELECT COUNT(*) FROM [dbo].[thread_messages] WHERE [ThreadID] = @ThreadID) AS ActualMessages,
+    ut.[NextMessageOrder],
+    ut.[DistinctAgentCount]
+FROM [dbo].[user_threads] ut
+WHERE ut.[ThreadID] = @ThreadID;
+
+-- Clean up benchmark data
+DELETE FROM [dbo].[user_agent_usage_daily] WHERE [UserEmail] = @UserEmail;
+DELETE FROM [dbo].[user_agent_usage_monthly] WHERE [UserEmail] = @UserEmail;
+DELETE FROM [dbo].[user_threads] WHERE [ThreadID] = @ThreadID;
+
+PRINT 'sp_AddThreadMessage benchmark finished.';
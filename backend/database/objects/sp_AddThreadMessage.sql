@@ -9,13 +9,13 @@ CREATE OR ALTER PROCEDURE [dbo].[sp_AddThreadMessage]
     AS
     BEGIN
         SET NOCOUNT ON;
+        SET XACT_ABORT ON;
         
         DECLARE @AgentName NVARCHAR(100) = NULL;
-        DECLARE @MessageOrder INT, @AgentID INT, @ThreadCount INT;
+        DECLARE @MessageOrder INT, @AgentID INT;
+        DECLARE @MessageID INT;
         DECLARE @UserEmail NVARCHAR(255);
         DECLARE @CurrentDate DATETIME2 = GETDATE();
-        DECLARE @UsageMonth NVARCHAR(7) = FORMAT(@CurrentDate, 'yyyy-MM');
-        DECLARE @UsageDate DATE = CAST(@CurrentDate AS DATE);
         
         -- Get agent details by AgentCode if provided (takes priority over AgentID)
         IF @AgentCode IS NOT NULL
@@ -31,74 +31,54 @@ CREATE OR ALTER PROCEDURE [dbo].[sp_AddThreadMessage]
             END
         END
         
-        -- Get user email and next message order
-        SELECT @UserEmail = [UserEmail] FROM [dbo].[user_threads] WHERE [ThreadID] = @ThreadID;
-        SELECT @MessageOrder = ISNULL(MAX([MessageOrder]), 0) + 1 FROM [dbo].[thread_messages] WHERE [ThreadID] = @ThreadID;
+        BEGIN TRANSACTION;
+        
+        -- Take the next message order from the thread row; the update lock serializes writers per thread
+        -- so ordering and counters stay O(1) regardless of thread length
+        UPDATE [dbo].[user_threads] WITH (UPDLOCK, ROWLOCK)
+        SET @MessageOrder = [NextMessageOrder] = [NextMessageOrder] + 1,
+            @UserEmail = [UserEmail],
+            [TotalMessages] = [TotalMessages] + 1,
+            [TotalTokens] = [TotalTokens] + @InputTokens + @OutputTokens,
+            [LastActivityDate] = @CurrentDate,
+            [ModifiedDate] = @CurrentDate
+        WHERE [ThreadID] = @ThreadID;
         
         IF @UserEmail IS NULL
         BEGIN
-            RAISERROR('Thread not found', 16, 1);
-            RETURN;
+            -- XACT_ABORT rolls the transaction back, also when called through INSERT ... EXEC
+            THROW 50001, 'Thread not found', 1;
         END
         
+        SET @MessageOrder = @MessageOrder - 1;
+        
         -- Insert message
         INSERT INTO [dbo].[thread_messages] 
         ([ThreadID], [AgentID], [AgentName], [Role], [Content], [InputTokens], [OutputTokens], [MessageOrder])
         VALUES (@ThreadID, @AgentID, @AgentName, IIF(@AgentCode IS NOT NULL, @AgentCode, 'User'), @Content, @InputTokens, @OutputTokens, @MessageOrder);
         
-        --
-		SELECT @ThreadCount = COUNT(*) FROM (SELECT DISTINCT AgentID FROM [dbo].[thread_messages] WHERE [ThreadID] = @ThreadID) AS A;
-
-        -- Update thread statistics
-        UPDATE [dbo].[user_threads]
-        SET [TotalMessages] = [TotalMessages] + 1,
-            [TotalTokens] = [TotalTokens] + @InputTokens + @OutputTokens,
-            [LastActivityDate] = @CurrentDate
-        WHERE [ThreadID] = @ThreadID;
+        SET @MessageID = SCOPE_IDENTITY();
         
-        -- Update usage statistics only if AgentID is provided
-        IF @AgentID IS NOT NULL
+        -- Track distinct message authors incrementally (0 stands for user messages)
+        IF NOT EXISTS (SELECT 1 FROM [dbo].[thread_agents] WHERE [ThreadID] = @ThreadID AND [AgentKey] = ISNULL(@AgentID, 0))
         BEGIN
-            -- Update daily usage summary
-            IF EXISTS (SELECT 1 FROM [dbo].[user_agent_usage_daily] WHERE [UserEmail] = @UserEmail AND [AgentID] = @AgentID AND [UsageDate] = @UsageDate)
-            BEGIN
-
-                SELECT @ThreadCount = COUNT(*) FROM (SELECT DISTINCT AgentID FROM [dbo].[thread_messages] WHERE [ThreadID] = @ThreadID) AS A;
-                
-                UPDATE [dbo].[user_agent_usage_daily]
-                SET [TotalTokens] = [TotalTokens] + @InputTokens + @OutputTokens,
-                    [InputTokens] = [InputTokens] + @InputTokens,
-                    [OutputTokens] = [OutputTokens] + @OutputTokens,
-                    [MessageCount] = [MessageCount] + 1,
-                    [ModifiedDate] = @CurrentDate,
-                    [ThreadCount] = @ThreadCount
-                WHERE [UserEmail] = @UserEmail AND [AgentID] = @AgentID AND [UsageDate] = @UsageDate;
-            END
-            ELSE
-            BEGIN
-                INSERT INTO [dbo].[user_agent_usage_daily]
-                ([UserEmail], [AgentID], [AgentName], [UsageDate], [TotalTokens], [InputTokens], [OutputTokens], [MessageCount], [ThreadCount])
-                VALUES (@UserEmail, @AgentID, @AgentName, @UsageDate, @InputTokens + @OutputTokens, @InputTokens, @OutputTokens, 1, 1);
-            END
+            INSERT INTO [dbo].[thread_agents] ([ThreadID], [AgentKey]) VALUES (@ThreadID, ISNULL(@AgentID, 0));
             
-            -- Update monthly usage summary
-            IF EXISTS (SELECT 1 FROM [dbo].[user_agent_usage_monthly] WHERE [UserEmail] = @UserEmail AND [AgentID] = @AgentID AND [UsageMonth] = @UsageMonth)
-            BEGIN
-                UPDATE [dbo].[user_agent_usage_monthly]
-                SET [TotalTokens] = [TotalTokens] + @InputTokens + @OutputTokens,
-                    [InputTokens] = [InputTokens] + @InputTokens,
-                    [OutputTokens] = [OutputTokens] + @OutputTokens,
-                    [MessageCount] = [MessageCount] + 1,
-                    [ModifiedDate] = @CurrentDate
-                WHERE [UserEmail] = @UserEmail AND [AgentID] = @AgentID AND [UsageMonth] = @UsageMonth;
-            END
-            ELSE
-            BEGIN
-                INSERT INTO [dbo].[user_agent_usage_monthly]
-                ([UserEmail], [AgentID], [AgentName], [UsageMonth], [TotalTokens], [InputTokens], [OutputTokens], [MessageCount], [ThreadCount])
-                VALUES (@UserEmail, @AgentID, @AgentName, @UsageMonth, @InputTokens + @OutputTokens, @InputTokens, @OutputTokens, 1, 1);
-            END
+            UPDATE [dbo].[user_threads]
+            SET [DistinctAgentCount] = [DistinctAgentCount] + 1
+            WHERE [ThreadID] = @ThreadID;
         END
         
-        SELECT @@IDENTITY as MessageID;
+        -- Record usage only if AgentID is provided; daily/monthly summaries are
+        -- aggregated from usage_events by sp_RollupUsageEvents instead of upserted per message
+        IF @AgentID IS NOT NULL
+        BEGIN
+            INSERT INTO [dbo].[usage_events]
+            ([UserEmail], [AgentID], [AgentName], [ThreadID], [InputTokens], [OutputTokens], [EventDate])
+            VALUES (@UserEmail, @AgentID, @AgentName, @ThreadID, @InputTokens, @OutputTokens, @CurrentDate);
+        END
+        
+        COMMIT TRANSACTION;
+        
+        SELECT @MessageID as MessageID;
     END
\ No newline at end of file
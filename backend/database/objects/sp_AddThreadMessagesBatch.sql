@@ -0,0 +1,50 @@
+
+-- Create stored procedure to add several messages to a thread in one call
+-- Each row goes through sp_AddThreadMessage so ordering and usage statistics stay identical
+CREATE OR ALTER PROCEDURE [dbo].[sp_AddThreadMessagesBatch]
+        @ThreadID UNIQUEIDENTIFIER,
+        @Messages [dbo].[ThreadMessageList] READONLY
+    AS
+    BEGIN
+        SET NOCOUNT ON;
+        SET XACT_ABORT ON;
+        
+        DECLARE @Seq INT, @AgentCode NVARCHAR(50), @Content NVARCHAR(MAX), @InputTokens INT, @OutputTokens INT;
+        DECLARE @Saved TABLE ([MessageID] NUMERIC(38, 0));
+        DECLARE @SavedIDs TABLE ([Seq] INT, [MessageID] NUMERIC(38, 0));
+        
+        BEGIN TRANSACTION;
+        
+        DECLARE message_cursor CURSOR LOCAL FAST_FORWARD FOR
+            SELECT [Seq], [AgentCode], [Content], [InputTokens], [OutputTokens]
+            FROM @Messages
+            ORDER BY [Seq];
+        
+        OPEN message_cursor;
+        FETCH NEXT FROM message_cursor INTO @Seq, @AgentCode, @Content, @InputTokens, @OutputTokens;
+        
+        WHILE @@FETCH_STATUS = 0
+        BEGIN
+            DELETE FROM @Saved;
+            
+            INSERT INTO @Saved ([MessageID])
+            EXEC [dbo].[sp_AddThreadMessage] 
+                @ThreadID = @ThreadID, 
+                @AgentCode = @AgentCode, 
+                @Content = @Content, 
+                @InputTokens = @InputTokens,
+                @OutputTokens = @OutputTokens;
+            
+            INSERT INTO @SavedIDs ([Seq], [MessageID])
+            SELECT @Seq, [MessageID] FROM @Saved;
+            
+            FETCH NEXT FROM message_cursor INTO @Seq, @AgentCode, @Content, @InputTokens, @OutputTokens;
+        END
+        
+        CLOSE message_cursor;
+        DEALLOCATE message_cursor;
+        
+        COMMIT TRANSACTION;
+        
+        SELECT [Seq], [MessageID] FROM @SavedIDs ORDER BY [Seq];
+    END
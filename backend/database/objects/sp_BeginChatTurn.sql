@@ -0,0 +1,62 @@
+
+-- Create stored procedure to start a chat turn in one round trip:
+-- validate or create the thread, save the user message, then return the thread and the user session
+CREATE OR ALTER PROCEDURE [dbo].[sp_BeginChatTurn]
+        @UserEmail NVARCHAR(255),
+        @ThreadID UNIQUEIDENTIFIER = NULL,
+        @Content NVARCHAR(MAX)
+    AS
+    BEGIN
+        SET NOCOUNT ON;
+        SET XACT_ABORT ON;
+        
+        DECLARE @IsNewThread BIT = 0;
+        DECLARE @MessageID BIGINT;
+        DECLARE @SavedMessage TABLE ([MessageID] NUMERIC(38, 0));
+        
+        BEGIN TRANSACTION;
+        
+        -- Reuse the thread only if it belongs to the user, otherwise start a new one
+        IF @ThreadID IS NULL OR NOT EXISTS (SELECT 1 FROM [dbo].[user_threads] WHERE [ThreadID] = @ThreadID AND [UserEmail] = @UserEmail)
+        BEGIN
+            SET @ThreadID = NEWID();
+            SET @IsNewThread = 1;
+            
+            INSERT INTO [dbo].[user_threads] 
+            ([ThreadID], [UserEmail], [ThreadTitle], [ThreadIcon], [IsActive], [TotalMessages], [TotalTokens], 
+             [LastActivityDate], [CreatedDate], [ModifiedDate])
+            VALUES (@ThreadID, @UserEmail, 'New Chat', N'💬', 1, 0, 0, GETDATE(), GETDATE(), GETDATE());
+        END
+        
+        -- Save the user message (sp_AddThreadMessage returns the new MessageID as a result set)
+        INSERT INTO @SavedMessage ([MessageID])
+        EXEC [dbo].[sp_AddThreadMessage] 
+            @ThreadID = @ThreadID, 
+            @AgentCode = NULL, 
+            @Content = @Content, 
+            @InputTokens = 0,
+            @OutputTokens = 0;
+        
+        SELECT @MessageID = [MessageID] FROM @SavedMessage;
+        
+        COMMIT TRANSACTION;
+        
+        -- Thread metadata
+        SELECT 
+            [ThreadID], 
+            [ThreadTitle], 
+            [ThreadIcon], 
+            [IsActive], 
+            [TotalMessages], 
+            [TotalTokens], 
+            [LastActivityDate], 
+            [CreatedDate], 
+            [ModifiedDate],
+            @IsNewThread as IsNewThread,
+            @MessageID as MessageID
+        FROM [dbo].[user_threads]
+        WHERE [ThreadID] = @ThreadID;
+        
+        -- Session, session agents and current month usage (same result sets as sp_CreateOrGetUserSession)
+        EXEC [dbo].[sp_CreateOrGetUserSession] @UserEmail = @UserEmail;
+    END
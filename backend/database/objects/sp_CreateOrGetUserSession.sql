@@ -56,7 +56,7 @@ CREATE OR ALTER PROCEDURE [dbo].[sp_CreateOrGetUserSession]
             usa.[CreatedDate],
             usa.[ModifiedDate],
             a.[Description] as AgentDescription,
-            a.[SystemPrompt] as AgentSystemPrompt,
+            -- System prompts come from the shared agent catalog (utils/agent_catalog.py)
             a.[AgentCode] as AgentCode
         FROM [dbo].[user_session_agents] usa
         INNER JOIN [dbo].[agents] a ON usa.[AgentID] = a.[AgentID]
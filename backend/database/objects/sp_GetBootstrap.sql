@@ -0,0 +1,55 @@
+
+-- Create stored procedure returning everything the FreddyGPT page needs on load in one round trip
+-- Result sets:
+--   1    user
+--   2-4  session, session agents, current month usage (sp_CreateOrGetUserSession)
+--   5-6  first page of threads, sync token (sp_GetUserThreads)
+--   7    current thread: @CurrentThreadID when it belongs to the user, otherwise the latest thread
+--   8    latest messages of the current thread (sp_GetThreadMessages), only when there is one
+CREATE OR ALTER PROCEDURE [dbo].[sp_GetBootstrap]
+        @UserEmail NVARCHAR(255),
+        @CurrentThreadID UNIQUEIDENTIFIER = NULL,
+        @ThreadLimit INT = 50,
+        @MessageLimit INT = NULL
+    AS
+    BEGIN
+        SET NOCOUNT ON;
+        
+        DECLARE @ThreadID UNIQUEIDENTIFIER = NULL;
+        
+        SELECT 
+            [email],
+            [created_date],
+            [last_login_date]
+        FROM [dbo].[users]
+        WHERE [email] = @UserEmail;
+        
+        EXEC [dbo].[sp_CreateOrGetUserSession] @UserEmail = @UserEmail;
+        
+        EXEC [dbo].[sp_GetUserThreads] @UserEmail = @UserEmail, @Limit = @ThreadLimit;
+        
+        IF @CurrentThreadID IS NOT NULL
+        BEGIN
+            SELECT @ThreadID = [ThreadID] FROM [dbo].[user_threads] 
+            WHERE [ThreadID] = @CurrentThreadID AND [UserEmail] = @UserEmail AND [IsActive] = 1;
+        END
+        
+        IF @ThreadID IS NULL
+        BEGIN
+            SELECT TOP 1 @ThreadID = [ThreadID] FROM [dbo].[user_threads] 
+            WHERE [UserEmail] = @UserEmail AND [IsActive] = 1
+            ORDER BY [LastActivityDate] DESC, [ThreadID] DESC;
+        END
+        
+        SELECT 
+            [ThreadID],
+            [ThreadTitle],
+            [ThreadIcon]
+        FROM [dbo].[user_threads]
+        WHERE [ThreadID] = @ThreadID;
+        
+        IF @ThreadID IS NOT NULL
+        BEGIN
+            EXEC [dbo].[sp_GetThreadMessages] @ThreadID = @ThreadID, @UserEmail = @UserEmail, @Limit = @MessageLimit;
+        END
+    END
@@ -1,12 +1,22 @@
 
 -- Create stored procedure to get thread messages
+-- Keyset pagination on (ThreadID, MessageOrder):
+--   @After  - only messages after this MessageOrder, oldest first (newer messages)
+--   @Before - only messages before this MessageOrder (older messages, e.g. on scroll up)
+--   @Limit  - at most this many messages; without @After the newest ones are returned
+-- All parameters NULL returns the whole thread
 CREATE OR ALTER PROCEDURE [dbo].[sp_GetThreadMessages]
         @ThreadID UNIQUEIDENTIFIER,
-        @UserEmail NVARCHAR(255)
+        @UserEmail NVARCHAR(255),
+        @Before INT = NULL,
+        @After INT = NULL,
+        @Limit INT = NULL
     AS
     BEGIN
         SET NOCOUNT ON;
         
+        DECLARE @Take INT = ISNULL(@Limit, 2147483647);
+        
         -- Verify user owns the thread
         IF NOT EXISTS (SELECT 1 FROM [dbo].[user_threads] WHERE [ThreadID] = @ThreadID AND [UserEmail] = @UserEmail)
         BEGIN
@@ -14,22 +24,56 @@ CREATE OR ALTER PROCEDURE [dbo].[sp_GetThreadMessages]
             RETURN;
         END
         
-        SELECT 
-            [MessageID],
-            [ThreadID],
-            [AgentID],
-            [AgentName],
-            [Role],
-            [Content],
-            [InputTokens],
-            [OutputTokens],
-            [TotalTokens],
-            [MessageOrder],
-            [IsEdited],
-            [EditedDate],
-            [CreatedDate],
-            [ModifiedDate]
-        FROM [dbo].[thread_messages]
-        WHERE [ThreadID] = @ThreadID
-        ORDER BY [MessageOrder] ASC, CreatedDate ASC;
-    END
\ No newline at end of file
+        IF @After IS NOT NULL
+        BEGIN
+            SELECT TOP (@Take)
+                [MessageID],
+                [ThreadID],
+                [AgentID],
+                [AgentName],
+                [Role],
+                [Content],
+                [InputTokens],
+                [OutputTokens],
+                [TotalTokens],
+                [MessageOrder],
+                [IsEdited],
+                [EditedDate],
+                [CreatedDate],
+                [ModifiedDate]
+            FROM [dbo].[thread_messages]
+            WHERE [ThreadID] = @ThreadID 
+              AND [MessageOrder] > @After
+              AND (@Before IS NULL OR [MessageOrder] < @Before)
+            ORDER BY [MessageOrder] ASC, CreatedDate ASC
+            OPTION (RECOMPILE);
+        END
+        ELSE
+        BEGIN
+            -- Newest @Take messages (before the cursor), returned oldest first
+            SELECT 
+                [MessageID],
+                [ThreadID],
+                [AgentID],
+                [AgentName],
+                [Role],
+                [Content],
+                [InputTokens],
+                [OutputTokens],
+                [TotalTokens],
+                [MessageOrder],
+                [IsEdited],
+                [EditedDate],
+                [CreatedDate],
+                [ModifiedDate]
+            FROM (
+                SELECT TOP (@Take) *
+                FROM [dbo].[thread_messages]
+                WHERE [ThreadID] = @ThreadID 
+                  AND (@Before IS NULL OR [MessageOrder] < @Before)
+                ORDER BY [MessageOrder] DESC, CreatedDate DESC
+            ) AS page
+            ORDER BY [MessageOrder] ASC, CreatedDate ASC
+            OPTION (RECOMPILE);
+        END
+    END
@@ -0,0 +1,16 @@
+-- Create stored procedure to get the rolling summary of a thread
+CREATE OR ALTER PROCEDURE [dbo].[sp_GetThreadSummary]
+        @ThreadID UNIQUEIDENTIFIER
+    AS
+    BEGIN
+        SET NOCOUNT ON;
+        
+        SELECT 
+            [ThreadID],
+            [Summary],
+            [SummarizedThroughOrder],
+            [SummaryTokens],
+            [ModifiedDate]
+        FROM [dbo].[thread_summaries]
+        WHERE [ThreadID] = @ThreadID;
+    END
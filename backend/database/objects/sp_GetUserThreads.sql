@@ -1,27 +1,86 @@
 
 -- Create stored procedure to get user threads
+-- Keyset pagination by last activity: pass the LastActivityDate and ThreadID of the last thread
+-- of the previous page as @CursorDate/@CursorThreadID.
+-- CursorDate is LastActivityDate as text with all 7 fractional digits: drivers return DATETIME2 with
+-- microseconds only, which would never equal the stored value in the tie-break on ThreadID.
+-- Delta sync: pass the SyncToken of a previous call as @Since to get only the threads changed since
+-- (including deactivated ones, so the client can drop them).
+-- The second result set is the SyncToken to use for the next delta sync.
 CREATE OR ALTER PROCEDURE [dbo].[sp_GetUserThreads]
         @UserEmail NVARCHAR(255),
         @Limit INT = 50,
-        @Offset INT = 0
+        @Offset INT = 0,
+        @CursorDate DATETIME2 = NULL,
+        @CursorThreadID UNIQUEIDENTIFIER = NULL,
+        @Since BINARY(8) = NULL
     AS
     BEGIN
         SET NOCOUNT ON;
         
-        SELECT 
-            ThreadID,
-            UserEmail,
-            ThreadTitle,
-            ThreadIcon,
-            IsActive,
-            TotalMessages,
-            TotalTokens,
-            LastActivityDate,
-            CreatedDate,
-            ModifiedDate
-        FROM [dbo].[user_threads]
-        WHERE [UserEmail] = @UserEmail AND [IsActive] = 1
-        ORDER BY [LastActivityDate] DESC, CreatedDate DESC
-        OFFSET @Offset ROWS
-        FETCH NEXT @Limit ROWS ONLY;
-    END
\ No newline at end of file
+        -- Rows at or above this version may still be uncommitted; they are picked up by the next sync
+        DECLARE @SyncToken BINARY(8) = CAST(MIN_ACTIVE_ROWVERSION() AS BINARY(8));
+        
+        IF @Since IS NOT NULL
+        BEGIN
+            SELECT 
+                ThreadID,
+                UserEmail,
+                ThreadTitle,
+                ThreadIcon,
+                IsActive,
+                TotalMessages,
+                TotalTokens,
+                LastActivityDate,
+                CreatedDate,
+                ModifiedDate,
+                CONVERT(VARCHAR(27), LastActivityDate, 121) AS CursorDate
+            FROM [dbo].[user_threads]
+            WHERE [UserEmail] = @UserEmail 
+              AND [RowVer] >= @Since 
+              AND [RowVer] < @SyncToken
+            ORDER BY [LastActivityDate] DESC, [ThreadID] DESC;
+        END
+        ELSE IF @CursorDate IS NOT NULL
+        BEGIN
+            SELECT TOP (@Limit)
+                ThreadID,
+                UserEmail,
+                ThreadTitle,
+                ThreadIcon,
+                IsActive,
+                TotalMessages,
+                TotalTokens,
+                LastActivityDate,
+                CreatedDate,
+                ModifiedDate,
+                CONVERT(VARCHAR(27), LastActivityDate, 121) AS CursorDate
+            FROM [dbo].[user_threads]
+            WHERE [UserEmail] = @UserEmail AND [IsActive] = 1
+              AND ([LastActivityDate] < @CursorDate 
+                   OR ([LastActivityDate] = @CursorDate AND [ThreadID] < @CursorThreadID))
+            ORDER BY [LastActivityDate] DESC, [ThreadID] DESC;
+        END
+        ELSE
+        BEGIN
+            SELECT 
+                ThreadID,
+                UserEmail,
+                ThreadTitle,
+                ThreadIcon,
+                IsActive,
+                TotalMessages,
+                TotalTokens,
+                LastActivityDate,
+                CreatedDate,
+                ModifiedDate,
+                CONVERT(VARCHAR(27), LastActivityDate, 121) AS CursorDate
+            FROM [dbo].[user_threads]
+            WHERE [UserEmail] = @UserEmail AND [IsActive] = 1
+            ORDER BY [LastActivityDate] DESC, [ThreadID] DESC
+            OFFSET @Offset ROWS
+            FETCH NEXT @Limit ROWS ONLY;
+        END
+        
+        SELECT @SyncToken as SyncToken;
+    END
@@ -0,0 +1,143 @@
+
+-- Create stored procedure to aggregate new usage_events into the daily and monthly usage summaries
+-- Idempotent: events up to the watermark in usage_rollup_state are applied exactly once, and the
+-- summaries and the watermark are updated in the same transaction.
+-- New events are read WITH (READCOMMITTEDLOCK): under READ_COMMITTED_SNAPSHOT an uncommitted insert with a
+-- lower EventID would be invisible while higher committed IDs are read, and the watermark would skip it for good.
+-- The locking read waits for such inserts to commit (or roll back) instead.
+CREATE OR ALTER PROCEDURE [dbo].[sp_RollupUsageEvents]
+        @BatchSize INT = 50000,
+        @RetentionDays INT = 90
+    AS
+    BEGIN
+        SET NOCOUNT ON;
+        SET XACT_ABORT ON;
+        
+        DECLARE @FromEventID BIGINT, @ToEventID BIGINT, @LockResult INT;
+        DECLARE @CurrentDate DATETIME2 = GETDATE();
+        
+        BEGIN TRANSACTION;
+        
+        -- Only one rollup at a time; concurrent callers simply skip
+        EXEC @LockResult = sp_getapplock @Resource = 'usage_rollup', @LockMode = 'Exclusive', @LockOwner = 'Transaction', @LockTimeout = 0;
+        IF @LockResult < 0
+        BEGIN
+            COMMIT TRANSACTION;
+            SELECT 0 as ProcessedEvents;
+            RETURN;
+        END
+        
+        SELECT @FromEventID = [LastEventID] FROM [dbo].[usage_rollup_state] WITH (UPDLOCK) WHERE [RollupName] = 'usage';
+        SET @FromEventID = ISNULL(@FromEventID, 0);
+        
+        SELECT @ToEventID = MAX([EventID])
+        FROM (
+            SELECT TOP (@BatchSize) [EventID] FROM [dbo].[usage_events] WITH (READCOMMITTEDLOCK)
+            WHERE [EventID] > @FromEventID 
+            ORDER BY [EventID]
+        ) AS next_batch;
+        
+        IF @ToEventID IS NULL
+        BEGIN
+            COMMIT TRANSACTION;
+            SELECT 0 as ProcessedEvents;
+            RETURN;
+        END
+        
+        SELECT 
+            [UserEmail],
+            [AgentID],
+            [AgentName],
+            [ThreadID],
+            [InputTokens],
+            [OutputTokens],
+            CAST([EventDate] AS DATE) AS UsageDate,
+            DATEFROMPARTS(YEAR([EventDate]), MONTH([EventDate]), 1) AS MonthStart
+        INTO #batch
+        FROM [dbo].[usage_events] WITH (READCOMMITTEDLOCK)
+        WHERE [EventID] > @FromEventID AND [EventID] <= @ToEventID;
+        
+        -- Daily summaries; ThreadCount only grows for threads without earlier events that day
+        MERGE [dbo].[user_agent_usage_daily] AS target
+        USING (
+            SELECT 
+                b.[UserEmail], b.[AgentID], MAX(b.[AgentName]) AS AgentName, b.[UsageDate],
+                SUM(b.[InputTokens]) AS InputTokens, SUM(b.[OutputTokens]) AS OutputTokens, COUNT(*) AS MessageCount,
+                (
+                    SELECT COUNT(DISTINCT n.[ThreadID]) FROM #batch n
+                    WHERE n.[UserEmail] = b.[UserEmail] AND n.[AgentID] = b.[AgentID] AND n.[UsageDate] = b.[UsageDate]
+                      AND NOT EXISTS (
+                          SELECT 1 FROM [dbo].[usage_events] p
+                          WHERE p.[EventID] <= @FromEventID AND p.[UserEmail] = n.[UserEmail] AND p.[AgentID] = n.[AgentID]
+                            AND p.[ThreadID] = n.[ThreadID]
+                            AND p.[EventDate] >= CAST(n.[UsageDate] AS DATETIME2) AND p.[EventDate] < DATEADD(DAY, 1, CAST(n.[UsageDate] AS DATETIME2))
+                      )
+                ) AS NewThreads
+            FROM #batch b
+            GROUP BY b.[UserEmail], b.[AgentID], b.[UsageDate]
+        ) AS source
+        ON target.[UserEmail] = source.[UserEmail] AND target.[AgentID] = source.[AgentID] AND target.[UsageDate] = source.[UsageDate]
+        WHEN MATCHED THEN
+            UPDATE SET 
+                [TotalTokens] = target.[TotalTokens] + source.[InputTokens] + source.[OutputTokens],
+                [InputTokens] = target.[InputTokens] + source.[InputTokens],
+                [OutputTokens] = target.[OutputTokens] + source.[OutputTokens],
+                [MessageCount] = target.[MessageCount] + source.[MessageCount],
+                [ThreadCount] = target.[ThreadCount] + source.[NewThreads],
+                [ModifiedDate] = @CurrentDate
+        WHEN NOT MATCHED THEN
+            INSERT ([UserEmail], [AgentID], [AgentName], [UsageDate], [TotalTokens], [InputTokens], [OutputTokens], [MessageCount], [ThreadCount])
+            VALUES (source.[UserEmail], source.[AgentID], source.[AgentName], source.[UsageDate], 
+                    source.[InputTokens] + source.[OutputTokens], source.[InputTokens], source.[OutputTokens], source.[MessageCount], source.[NewThreads]);
+        
+        -- Monthly summaries
+        MERGE [dbo].[user_agent_usage_monthly] AS target
+        USING (
+            SELECT 
+                b.[UserEmail], b.[AgentID], MAX(b.[AgentName]) AS AgentName, FORMAT(b.[MonthStart], 'yyyy-MM') AS UsageMonth,
+                SUM(b.[InputTokens]) AS InputTokens, SUM(b.[OutputTokens]) AS OutputTokens, COUNT(*) AS MessageCount,
+                (
+                    SELECT COUNT(DISTINCT n.[ThreadID]) FROM #batch n
+                    WHERE n.[UserEmail] = b.[UserEmail] AND n.[AgentID] = b.[AgentID] AND n.[MonthStart] = b.[MonthStart]
+                      AND NOT EXISTS (
+                          SELECT 1 FROM [dbo].[usage_events] p
+                          WHERE p.[EventID] <= @FromEventID AND p.[UserEmail] = n.[UserEmail] AND p.[AgentID] = n.[AgentID]
+                            AND p.[ThreadID] = n.[ThreadID]
+                            AND p.[EventDate] >= CAST(n.[MonthStart] AS DATETIME2) AND p.[EventDate] < DATEADD(MONTH, 1, CAST(n.[MonthStart] AS DATETIME2))
+                      )
+                ) AS NewThreads
+            FROM #batch b
+            GROUP BY b.[UserEmail], b.[AgentID], b.[MonthStart]
+        ) AS source
+        ON target.[UserEmail] = source.[UserEmail] AND target.[AgentID] = source.[AgentID] AND target.[UsageMonth] = source.[UsageMonth]
+        WHEN MATCHED THEN
+            UPDATE SET 
+                [TotalTokens] = target.[TotalTokens] + source.[InputTokens] + source.[OutputTokens],
+                [InputTokens] = target.[InputTokens] + source.[InputTokens],
+                [OutputTokens] = target.[OutputTokens] + source.[OutputTokens],
+                [MessageCount] = target.[MessageCount] + source.[MessageCount],
+                [ThreadCount] = target.[ThreadCount] + source.[NewThreads],
+                [ModifiedDate] = @CurrentDate
+        WHEN NOT MATCHED THEN
+            INSERT ([UserEmail], [AgentID], [AgentName], [UsageMonth], [TotalTokens], [InputTokens], [OutputTokens], [MessageCount], [ThreadCount])
+            VALUES (source.[UserEmail], source.[AgentID], source.[AgentName], source.[UsageMonth], 
+                    source.[InputTokens] + source.[OutputTokens], source.[InputTokens], source.[OutputTokens], source.[MessageCount], source.[NewThreads]);
+        
+        UPDATE [dbo].[usage_rollup_state]
+        SET [LastEventID] = @ToEventID,
+            [ModifiedDate] = @CurrentDate
+        WHERE [RollupName] = 'usage';
+        
+        -- Events older than the retention window are no longer needed once rolled up
+        DELETE FROM [dbo].[usage_events]
+        WHERE [EventID] <= @ToEventID AND [EventDate] < DATEADD(DAY, -@RetentionDays, @CurrentDate);
+        
+        COMMIT TRANSACTION;
+        
+        SELECT COUNT(*) as ProcessedEvents FROM #batch;
+        
+        -- Users whose usage changed, so cached sessions can be invalidated
+        SELECT DISTINCT [UserEmail] FROM #batch;
+        
+        DROP TABLE #batch;
+    END
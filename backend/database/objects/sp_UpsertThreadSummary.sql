@@ -0,0 +1,25 @@
+-- Create stored procedure to insert or update the rolling summary of a thread
+CREATE OR ALTER PROCEDURE [dbo].[sp_UpsertThreadSummary]
+        @ThreadID UNIQUEIDENTIFIER,
+        @Summary NVARCHAR(MAX),
+        @SummarizedThroughOrder INT,
+        @SummaryTokens INT = 0
+    AS
+    BEGIN
+        SET NOCOUNT ON;
+        
+        UPDATE [dbo].[thread_summaries]
+        SET [Summary] = @Summary,
+            [SummarizedThroughOrder] = @SummarizedThroughOrder,
+            [SummaryTokens] = @SummaryTokens,
+            [ModifiedDate] = GETDATE()
+        WHERE [ThreadID] = @ThreadID
+          -- Never move the summary backwards if two updates race
+          AND [SummarizedThroughOrder] < @SummarizedThroughOrder;
+        
+        IF @@ROWCOUNT = 0 AND NOT EXISTS (SELECT 1 FROM [dbo].[thread_summaries] WHERE [ThreadID] = @ThreadID)
+        BEGIN
+            INSERT INTO [dbo].[thread_summaries] ([ThreadID], [Summary], [SummarizedThroughOrder], [SummaryTokens])
+            VALUES (@ThreadID, @Summary, @SummarizedThroughOrder, @SummaryTokens);
+        END
+    END
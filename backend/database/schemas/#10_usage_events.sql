@@ -0,0 +1,57 @@
+-- Migration: Append-only usage event log
+-- sp_AddThreadMessage appends one row per agent message; sp_RollupUsageEvents aggregates
+-- the events into user_agent_usage_daily / user_agent_usage_monthly in the background
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[usage_events]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[usage_events] (
+        [EventID] BIGINT IDENTITY(1,1) NOT NULL PRIMARY KEY,
+        [UserEmail] NVARCHAR(255) NOT NULL,
+        [AgentID] INT NOT NULL,
+        [AgentName] NVARCHAR(100) NOT NULL,
+        [ThreadID] UNIQUEIDENTIFIER NOT NULL,
+        [InputTokens] INT NOT NULL DEFAULT 0,
+        [OutputTokens] INT NOT NULL DEFAULT 0,
+        [EventDate] DATETIME2 NOT NULL DEFAULT GETDATE()
+    );
+    
+    PRINT 'Usage Events table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'Usage Events table already exists.';
+END
+
+
+-- Used by the rollup to find whether a thread was already counted for a day/month
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE object_id = OBJECT_ID(N'[dbo].[usage_events]') AND name = N'IX_usage_events_User_Agent_Thread')
+BEGIN
+    CREATE NONCLUSTERED INDEX [IX_usage_events_User_Agent_Thread] ON [dbo].[usage_events] ([UserEmail], [AgentID], [ThreadID], [EventDate]);
+    PRINT 'Index on UserEmail, AgentID, ThreadID and EventDate for usage_events created successfully.';
+END
+
+
+-- Watermark of the last event folded into the summaries
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[usage_rollup_state]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[usage_rollup_state] (
+        [RollupName] NVARCHAR(50) NOT NULL PRIMARY KEY,
+        [LastEventID] BIGINT NOT NULL DEFAULT 0,
+        [ModifiedDate] DATETIME2 NOT NULL DEFAULT GETDATE()
+    );
+    
+    PRINT 'Usage Rollup State table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'Usage Rollup State table already exists.';
+END
+
+
+IF NOT EXISTS (SELECT 1 FROM [dbo].[usage_rollup_state] WHERE [RollupName] = 'usage')
+BEGIN
+    INSERT INTO [dbo].[usage_rollup_state] ([RollupName], [LastEventID]) VALUES ('usage', 0);
+END
+
+
+PRINT 'Usage event log initialized successfully!';
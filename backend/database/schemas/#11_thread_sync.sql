@@ -0,0 +1,35 @@
+-- Migration: Keyset pagination and delta sync for the thread list
+-- RowVer changes on every update of a thread (new message, rename, deactivate), so clients can
+-- ask for the threads changed since their last sync instead of reloading the whole list
+
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+               WHERE TABLE_NAME = 'user_threads' 
+               AND COLUMN_NAME = 'RowVer' 
+               AND TABLE_SCHEMA = 'dbo')
+BEGIN
+    ALTER TABLE [dbo].[user_threads]
+    ADD [RowVer] ROWVERSION NOT NULL;
+    
+    PRINT 'RowVer column added to user_threads table.';
+END
+
+
+-- Serves the thread list page by page, newest activity first
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE object_id = OBJECT_ID(N'[dbo].[user_threads]') AND name = N'IX_user_threads_UserEmail_LastActivity')
+BEGIN
+    CREATE NONCLUSTERED INDEX [IX_user_threads_UserEmail_LastActivity] 
+    ON [dbo].[user_threads] ([UserEmail], [IsActive], [LastActivityDate] DESC, [ThreadID] DESC)
+    INCLUDE ([ThreadTitle], [ThreadIcon], [TotalMessages], [TotalTokens], [CreatedDate], [ModifiedDate], [RowVer]);
+    PRINT 'Index on UserEmail, IsActive, LastActivityDate and ThreadID for user_threads created successfully.';
+END
+
+
+-- Serves delta syncs (threads changed since a sync token)
+IF NOT EXISTS (SELECT * FROM sys.indexes WHERE object_id = OBJECT_ID(N'[dbo].[user_threads]') AND name = N'IX_user_threads_UserEmail_RowVer')
+BEGIN
+    CREATE NONCLUSTERED INDEX [IX_user_threads_UserEmail_RowVer] ON [dbo].[user_threads] ([UserEmail], [RowVer]);
+    PRINT 'Index on UserEmail and RowVer for user_threads created successfully.';
+END
+
+
+PRINT 'Thread list sync initialized successfully!';
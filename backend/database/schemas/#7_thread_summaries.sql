@@ -0,0 +1,33 @@
+-- Migration: Rolling conversation summaries per thread
+-- Older turns that no longer fit the history token budget are folded into this summary
+
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[thread_summaries]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[thread_summaries] (
+        [ThreadID] UNIQUEIDENTIFIER NOT NULL PRIMARY KEY,
+        [Summary] NVARCHAR(MAX) NOT NULL,
+        [SummarizedThroughOrder] INT NOT NULL DEFAULT 0, -- Last MessageOrder folded into the summary
+        [SummaryTokens] INT NOT NULL DEFAULT 0,
+        [CreatedDate] DATETIME2 NOT NULL DEFAULT GETDATE(),
+        [ModifiedDate] DATETIME2 NOT NULL DEFAULT GETDATE()
+    );
+    
+    PRINT 'Thread Summaries table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'Thread Summaries table already exists.';
+END
+
+
+IF NOT EXISTS (SELECT * FROM sys.foreign_keys WHERE object_id = OBJECT_ID(N'[dbo].[FK_thread_summaries_ThreadID]'))
+BEGIN
+    ALTER TABLE [dbo].[thread_summaries]
+    ADD CONSTRAINT [FK_thread_summaries_ThreadID] FOREIGN KEY ([ThreadID])
+    REFERENCES [dbo].[user_threads] ([ThreadID]) ON DELETE CASCADE;
+    
+    PRINT 'Foreign key constraint FK_thread_summaries_ThreadID created successfully.';
+END
+
+
+PRINT 'Thread summaries initialized successfully!';
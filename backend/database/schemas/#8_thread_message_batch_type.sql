@@ -0,0 +1,19 @@
+-- Migration: Table type used to save all agent messages of a chat turn in one call
+-- See sp_AddThreadMessagesBatch
+
+IF NOT EXISTS (SELECT * FROM sys.types WHERE name = 'ThreadMessageList' AND is_table_type = 1 AND schema_id = SCHEMA_ID('dbo'))
+BEGIN
+    CREATE TYPE [dbo].[ThreadMessageList] AS TABLE (
+        [Seq] INT NOT NULL PRIMARY KEY, -- Order in which the messages were produced
+        [AgentCode] NVARCHAR(50) NULL,
+        [Content] NVARCHAR(MAX) NOT NULL,
+        [InputTokens] INT NOT NULL DEFAULT 0,
+        [OutputTokens] INT NOT NULL DEFAULT 0
+    );
+    
+    PRINT 'ThreadMessageList table type created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'ThreadMessageList table type already exists.';
+END
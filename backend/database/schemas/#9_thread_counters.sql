@@ -0,0 +1,76 @@
+-- Migration: Per-thread counters so sp_AddThreadMessage no longer scans thread_messages
+-- NextMessageOrder replaces MAX(MessageOrder) + 1, thread_agents/DistinctAgentCount replace COUNT(DISTINCT AgentID)
+
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+               WHERE TABLE_NAME = 'user_threads' 
+               AND COLUMN_NAME = 'NextMessageOrder' 
+               AND TABLE_SCHEMA = 'dbo')
+BEGIN
+    ALTER TABLE [dbo].[user_threads]
+    ADD [NextMessageOrder] INT NOT NULL CONSTRAINT [DF_user_threads_NextMessageOrder] DEFAULT 1;
+    
+    PRINT 'NextMessageOrder column added to user_threads table.';
+END
+
+
+IF NOT EXISTS (SELECT * FROM INFORMATION_SCHEMA.COLUMNS 
+               WHERE TABLE_NAME = 'user_threads' 
+               AND COLUMN_NAME = 'DistinctAgentCount' 
+               AND TABLE_SCHEMA = 'dbo')
+BEGIN
+    ALTER TABLE [dbo].[user_threads]
+    ADD [DistinctAgentCount] INT NOT NULL CONSTRAINT [DF_user_threads_DistinctAgentCount] DEFAULT 0;
+    
+    PRINT 'DistinctAgentCount column added to user_threads table.';
+END
+
+
+-- Distinct message authors per thread (AgentKey = AgentID, 0 for user messages)
+IF NOT EXISTS (SELECT * FROM sys.objects WHERE object_id = OBJECT_ID(N'[dbo].[thread_agents]') AND type in (N'U'))
+BEGIN
+    CREATE TABLE [dbo].[thread_agents] (
+        [ThreadID] UNIQUEIDENTIFIER NOT NULL,
+        [AgentKey] INT NOT NULL,
+        [CreatedDate] DATETIME2 NOT NULL DEFAULT GETDATE(),
+        
+        CONSTRAINT [PK_thread_agents] PRIMARY KEY ([ThreadID], [AgentKey]),
+        CONSTRAINT [FK_thread_agents_ThreadID] FOREIGN KEY ([ThreadID])
+            REFERENCES [dbo].[user_threads] ([ThreadID]) ON DELETE CASCADE
+    );
+    
+    PRINT 'Thread Agents table created successfully.';
+END
+ELSE
+BEGIN
+    PRINT 'Thread Agents table already exists.';
+END
+GO
+
+
+-- Backfill counters from existing messages (idempotent)
+INSERT INTO [dbo].[thread_agents] ([ThreadID], [AgentKey])
+SELECT DISTINCT tm.[ThreadID], ISNULL(tm.[AgentID], 0)
+FROM [dbo].[thread_messages] tm
+WHERE NOT EXISTS (
+    SELECT 1 FROM [dbo].[thread_agents] ta 
+    WHERE ta.[ThreadID] = tm.[ThreadID] AND ta.[AgentKey] = ISNULL(tm.[AgentID], 0)
+);
+
+-- TotalMessages was incremented by both sp_AddThreadMessage and tr_user_thread_totalmessages, recount it
+UPDATE ut
+SET [NextMessageOrder] = ISNULL(m.[MaxMessageOrder], 0) + 1,
+    [TotalMessages] = ISNULL(m.[MessageCount], 0),
+    [DistinctAgentCount] = ISNULL(a.[AgentCount], 0)
+FROM [dbo].[user_threads] ut
+LEFT JOIN (
+    SELECT [ThreadID], MAX([MessageOrder]) AS MaxMessageOrder, COUNT(*) AS MessageCount
+    FROM [dbo].[thread_messages]
+    GROUP BY [ThreadID]
+) m ON m.[ThreadID] = ut.[ThreadID]
+LEFT JOIN (
+    SELECT [ThreadID], COUNT(*) AS AgentCount
+    FROM [dbo].[thread_agents]
+    GROUP BY [ThreadID]
+) a ON a.[ThreadID] = ut.[ThreadID];
+
+PRINT 'Thread counters backfilled successfully.';
@@ -1,4 +1,5 @@
 import os
+import asyncio
 import contextlib
 import fastapi
 from fastapi.staticfiles import StaticFiles
@@ -12,14 +13,44 @@ from routes.routes_authentication import router as routes_authentication
 from routes.routes_agents import router as routes_agents
 from routes.routes_user import router as routes_user
 from routes.routes_threads import router as routes_threads
+from routes.routes_bootstrap import router as routes_bootstrap
 from middleware.auth_middleware import AuthCookieMiddleware
+from agents.model_factory import close_chat_models
+from utils.database import warm_up_pools, close_pools, read_db_pool, run_db, run_db_once, run_replica_lag_monitor, shutdown_db_executor
+from utils.message_buffer import wait_for_pending_flushes
+from utils.usage_util import run_usage_rollup_worker, rollup_all_usage_events
+from utils.agent_catalog import load_agent_catalog, run_agent_catalog_refresher
+from utils.title_worker import run_title_worker
+from utils.write_behind import run_write_behind_flusher, flush_write_behind
 
 @contextlib.asynccontextmanager
 async def lifespan(app: fastapi.FastAPI):
     db = None
+    usage_rollup_task = None
+    agent_catalog_task = None
+    title_task = None
+    write_behind_task = None
+    replica_lag_task = None
     
     try:
+        try:
+            await run_db(warm_up_pools)
+        except Exception as e:
+            # The pool opens connections on demand, so a cold start is not fatal
+            logger.error(f"Error warming up database pool: {e}")
         
+        try:
+            await run_db(load_agent_catalog)
+        except Exception as e:
+            # Loaded again on first use (see ensure_agent_catalog_loaded)
+            logger.error(f"Error loading agent catalog: {e}")
+        
+        usage_rollup_task = asyncio.create_task(run_usage_rollup_worker())
+        agent_catalog_task = asyncio.create_task(run_agent_catalog_refresher())
+        title_task = asyncio.create_task(run_title_worker())
+        write_behind_task = asyncio.create_task(run_write_behind_flusher())
+        if read_db_pool is not None:
+            replica_lag_task = asyncio.create_task(run_replica_lag_monitor())
         
         yield
         
@@ -28,6 +59,27 @@ async def lifespan(app: fastapi.FastAPI):
         raise RuntimeError("Failed to start application") from e
       
     finally:
+        # Stop the background workers first, then drain pending writes while the pools and model clients are still open
+        for task in (agent_catalog_task, title_task, replica_lag_task, write_behind_task, usage_rollup_task):
+            if task is not None:
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        await wait_for_pending_flushes()
+        try:
+            await run_db_once(flush_write_behind)
+        except Exception as e:
+            logger.error(f"Error flushing write-behind queues on shutdown: {e}")
+        if usage_rollup_task is not None:
+            try:
+                # Fold in the events of the last interval so the usage tables are current after shutdown
+                await run_db_once(rollup_all_usage_events)
+            except Exception as e:
+                logger.error(f"Error rolling up usage events on shutdown: {e}")
+        await close_chat_models()
+        # Called directly rather than through run_db, so an open circuit breaker cannot skip it
+        close_pools()
+        shutdown_db_executor()
         db = None
         
 def create_app():
@@ -43,6 +95,7 @@ def create_app():
     app.include_router(routes_agents)
     app.include_router(routes_user)
     app.include_router(routes_threads)
+    app.include_router(routes_bootstrap)
     
     # Include view routes last (includes catch-all route)
     app.include_router(routes_views)
@@ -54,6 +107,7 @@ def create_app():
             "/api/auth/login",
             "/api/auth/logout", 
             "/api/auth/status",
+            "/api/bootstrap",
             "/docs",
             "/redoc",
             "/openapi.json",
@@ -75,6 +129,9 @@ def create_app():
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # Thread list pagination / delta sync (see routes_threads.get_user_threads),
+        # and the backoff sent with 503s while the database is unavailable (see utils.db_resilience)
+        expose_headers=["X-Next-Cursor", "X-Sync-Token", "Retry-After"],
     )
     
     # Global exception handler for any unhandled exceptions
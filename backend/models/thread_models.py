@@ -0,0 +1,51 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+
+@dataclass(slots=True)
+class ThreadRow:
+    """
+    One row of sp_GetUserThreads.
+    Dates stay datetime objects; OrjsonResponse (utils.json_response) writes them as ISO 8601 strings.
+    """
+    thread_id: str
+    user_email: str
+    thread_title: str
+    thread_icon: Optional[str]
+    is_active: bool
+    total_messages: int
+    total_tokens: int
+    last_activity_date: Optional[datetime]
+    created_date: Optional[datetime]
+    modified_date: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row) -> "ThreadRow":
+        return cls(str(row[0]), *row[1:10])
+
+
+@dataclass(slots=True)
+class MessageRow:
+    """
+    One row of sp_GetThreadMessages.
+    Dates stay datetime objects; OrjsonResponse (utils.json_response) writes them as ISO 8601 strings.
+    """
+    message_id: int
+    thread_id: str
+    agent_id: Optional[int]
+    agent_name: Optional[str]
+    role: str
+    content: str
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    message_order: int
+    is_edited: bool
+    edited_date: Optional[datetime]
+    created_date: Optional[datetime]
+    modified_date: Optional[datetime]
+
+    @classmethod
+    def from_row(cls, row) -> "MessageRow":
+        return cls(row[0], str(row[1]), *row[2:14])
@@ -1,5 +1,6 @@
-from fastapi import APIRouter, HTTPException, Depends
-from utils.database import get_db_connection
+from fastapi import APIRouter, HTTPException, Request, Response
+from utils.database import run_db
+from utils.agent_catalog import get_agent_library, is_agent_catalog_loaded, load_agent_catalog
 from dotenv import load_dotenv
 from typing import List, Dict, Any
 
@@ -10,83 +11,35 @@ from utils.logging_setup import logger
 
 router = APIRouter(prefix="/api/agents", tags=["agents"])
 
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against the current ETag, as required for GET"""
+    if not if_none_match or not etag:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return "*" in candidates or etag in [candidate.removeprefix("W/") for candidate in candidates]
+
 @router.get("/list", response_model=List[Dict[str, Any]])
-async def get_all_agents():
-    """Get all agents with their icons and tags"""
+async def get_all_agents(request: Request):
+    """
+    Get all agents with their icons and tags.
+    Served from the in-memory agent catalog (utils/agent_catalog.py), without system prompts;
+    clients revalidate with If-None-Match and get 304 while the catalog is unchanged.
+    """
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Use stored procedure if available, otherwise direct query with tags
-        try:
-            logger.info("Attempting to execute sp_GetAgentsForUI stored procedure")
-            cursor.execute("EXEC sp_GetAgentsForUI")
-            columns = [column[0] for column in cursor.description]
-            logger.info(f"Stored procedure returned columns: {columns}")
-        except Exception as sp_error:
-            logger.warning(f"Stored procedure failed: {sp_error}. Trying fallback query...")
-            
-            # Fallback to direct query with tags if stored procedure doesn't exist
-            cursor.execute("""
-                SELECT 
-                    a.AgentID as AgentId,
-                    a.AgentCode,
-                    a.AgentName,
-                    a.Description,
-                    a.Instruments,
-                    a.SystemPrompt,
-                    a.Icon,
-                    a.Active as IsActive,
-                    a.CreatedDate,
-                    a.CreatedBy,
-                    a.ModifiedDate,
-                    a.ModifiedBy,
-                    a.NumberOfUses,
-                    STRING_AGG(ISNULL(at.TagName, ''), ',') as Tags
-                FROM agents a
-                LEFT JOIN agent_tags at ON a.AgentID = at.AgentID
-                WHERE a.Active = 1
-                GROUP BY a.AgentID, a.AgentCode, a.AgentName, a.Description, a.Instruments, a.SystemPrompt, 
-                         a.Icon, a.Active, a.CreatedDate, a.CreatedBy, a.ModifiedDate, a.ModifiedBy, a.NumberOfUses
-                ORDER BY a.AgentName
-            """)
-            columns = [column[0] for column in cursor.description]
-            logger.info(f"Fallback query returned columns: {columns}")
-        agents = []
+        if not is_agent_catalog_loaded():
+            # Startup load failed; the catalog refresher keeps it current once loaded
+            await run_db(load_agent_catalog)
         
-        for row in cursor.fetchall():
-            agent = dict(zip(columns, row))
-            # Convert datetime objects to strings for JSON serialization
-            for key, value in agent.items():
-                if hasattr(value, 'isoformat'):
-                    agent[key] = value.isoformat()
-            
-            # Convert comma-separated tags to array and limit to 3 tags
-            if agent.get('Tags'):
-                # Remove empty strings and strip whitespace
-                all_tags = [tag.strip() for tag in agent['Tags'].split(',') if tag.strip()]
-                
-                # Limit to first 3 tags and add "+n" if there are more
-                if len(all_tags) <= 3:
-                    agent['Tags'] = all_tags
-                else:
-                    displayed_tags = all_tags[:3]
-                    remaining_count = len(all_tags) - 3
-                    displayed_tags.append(f"+{remaining_count}")
-                    agent['Tags'] = displayed_tags
-                
-                logger.debug(f"Agent {agent.get('AgentName')} tags: {agent['Tags']} (total: {len(all_tags)})")
-            else:
-                agent['Tags'] = []
-            
-            agents.append(agent)
+        payload, etag = get_agent_library()
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
         
-        logger.info(f"Successfully fetched {len(agents)} agents")
-        conn.close()
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
         
-        return agents
+        return Response(content=payload, media_type="application/json", headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching agents: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch agents: {str(e)}")
-
@@ -13,8 +13,9 @@ import hashlib
 import jwt
 import os
 from dotenv import load_dotenv
-from utils.database import get_db_connection
+from utils.database import db_connection, run_db
 from utils.logging_setup import logger
+from utils.write_behind import record_last_login
 load_dotenv()
 
 router = APIRouter(prefix="/api/auth", tags=["authentication"])
@@ -174,17 +175,16 @@ def refresh_auth_cookie(response: Response, email: str):
 def get_user_from_db(email: str):
     """Get user from database"""
     try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            SELECT email, password_hash, created_date, modified_date, last_login_date
-            FROM users 
-            WHERE email = ?
-        """, (email,))
-        
-        user = cursor.fetchone()
-        conn.close()
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT email, password_hash, created_date, modified_date, last_login_date
+                FROM users 
+                WHERE email = ?
+            """, (email,))
+            
+            user = cursor.fetchone()
         
         if user:
             return {
@@ -202,25 +202,6 @@ def get_user_from_db(email: str):
             detail=f"Database error: {str(e)}"
         )
 
-def update_last_login(email: str):
-    """Update user's last login timestamp"""
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        cursor.execute("""
-            UPDATE users 
-            SET last_login_date = GETDATE()
-            WHERE email = ?
-        """, (email,))
-        
-        conn.commit()
-        conn.close()
-        
-    except Exception as e:
-        # Log error but don't fail login for this
-        print(f"Error updating last login: {str(e)}")
-
 # Pydantic models
 class LoginRequest(BaseModel):
     email: EmailStr
@@ -248,7 +229,7 @@ async def login(login_data: LoginRequest, response: Response):
     """
     try:
         # Get user from database
-        user = get_user_from_db(login_data.email)
+        user = await run_db(get_user_from_db, login_data.email)
         
         if not user:
             raise HTTPException(
@@ -264,8 +245,8 @@ async def login(login_data: LoginRequest, response: Response):
                 detail="Invalid email or password"
             )
         
-        # Update last login timestamp
-        update_last_login(login_data.email)
+        # Update last login timestamp in the background (write-behind)
+        record_last_login(login_data.email)
         
         # Create access token
         access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
@@ -0,0 +1,148 @@
+from fastapi import APIRouter, HTTPException, Request, Query
+from utils.json_response import OrjsonResponse
+from dotenv import load_dotenv
+import os
+
+from utils.database import run_db
+from utils.db_resilience import DB_DEGRADED_MODE, DatabaseUnavailable
+from utils.logging_setup import logger
+from utils.bootstrap_util import load_bootstrap
+from utils.user_util import get_last_known_session
+from utils.agent_catalog import get_agent_library_agents, is_agent_catalog_loaded, load_agent_catalog
+from routes.routes_authentication import get_current_user, refresh_auth_cookie
+
+# Load environment variables
+load_dotenv()
+
+# Latest messages of the current thread sent on page load; older ones are paged in from /api/threads
+BOOTSTRAP_MESSAGE_LIMIT = int(os.getenv("BOOTSTRAP_MESSAGE_LIMIT", "50"))
+
+router = APIRouter(prefix="/api", tags=["bootstrap"])
+
+def session_data(user_session):
+    return {
+        "session_id": user_session.session_id,
+        "is_active": user_session.is_active,
+        "created_date": user_session.created_date,
+        "modified_date": user_session.modified_date,
+        "session_agents": user_session.session_agents,
+        "usage_statistics": user_session.usage_statistics
+    }
+
+def degraded_bootstrap(user_email: str):
+    """
+    Page data served while the database is unavailable (DB_DEGRADED_MODE): the in-memory agent catalog
+    and the last session read for the user, without threads. Returns None when neither is cached.
+    """
+    user_session = get_last_known_session(user_email)
+    if user_session is None or not is_agent_catalog_loaded():
+        return None
+    agents, agents_etag = get_agent_library_agents()
+    return OrjsonResponse({
+        "authenticated": True,
+        "degraded": True,
+        "user": {"email": user_email, "created_date": None, "last_login_date": None},
+        "session": session_data(user_session),
+        "agents": agents,
+        "agents_etag": agents_etag,
+        "threads": [],
+        "threads_next_cursor": None,
+        "threads_sync_token": None,
+        "current_thread": {
+            "has_current_thread": False,
+            "thread_id": None,
+            "messages": [],
+            "total_messages": 0,
+            "has_more": False,
+            "next_cursor": None,
+            "message": "Chat history is temporarily unavailable."
+        }
+    })
+
+@router.get("/bootstrap", response_class=OrjsonResponse)
+async def get_bootstrap(
+    request: Request,
+    thread_limit: int = Query(50, ge=1, le=200),
+    message_limit: int = Query(BOOTSTRAP_MESSAGE_LIMIT, ge=1, le=500)
+):
+    """
+    Everything the FreddyGPT page needs on load in one request and one database round trip:
+    auth status, user, session (agents and usage), agent library, first page of threads and the
+    latest messages of the current thread.
+    Like /api/auth/status, an unauthenticated call returns authenticated false instead of 401.
+    """
+    try:
+        user_email = get_current_user(request)
+    except HTTPException:
+        return OrjsonResponse({"authenticated": False, "user": None})
+    
+    try:
+        if not is_agent_catalog_loaded():
+            await run_db(load_agent_catalog)
+        
+        user, user_session, threads_page, current_thread = await run_db(
+            load_bootstrap,
+            user_email,
+            request.cookies.get("FreddyAI_CurrentThread"),
+            thread_limit,
+            message_limit
+        )
+        agents, agents_etag = get_agent_library_agents()
+        
+        if current_thread:
+            messages = current_thread["messages"]
+            current_thread_data = {
+                "has_current_thread": True,
+                "thread_id": current_thread["thread_id"],
+                "thread_title": current_thread["thread_title"],
+                "thread_icon": current_thread["thread_icon"],
+                "messages": messages,
+                "total_messages": len(messages),
+                "has_more": current_thread["has_more"],
+                "next_cursor": current_thread["next_cursor"]
+            }
+        else:
+            current_thread_data = {
+                "has_current_thread": False,
+                "thread_id": None,
+                "messages": [],
+                "total_messages": 0,
+                "has_more": False,
+                "next_cursor": None,
+                "message": "No threads found. Welcome to FreddyGPT!"
+            }
+        
+        response = OrjsonResponse({
+            "authenticated": True,
+            "user": user,
+            "session": session_data(user_session),
+            "agents": agents,
+            "agents_etag": agents_etag,
+            "threads": threads_page["threads"],
+            "threads_next_cursor": threads_page["next_cursor"],
+            "threads_sync_token": threads_page["sync_token"],
+            "current_thread": current_thread_data
+        })
+        
+        refresh_auth_cookie(response, user_email)
+        if current_thread:
+            # Same cookie as /api/threads/current/messages (expires in 30 days)
+            response.set_cookie(
+                key="FreddyAI_CurrentThread",
+                value=current_thread["thread_id"],
+                max_age=30 * 24 * 60 * 60,  # 30 days
+                httponly=True,
+                secure=True,
+                samesite="none"
+            )
+        return response
+        
+    except DatabaseUnavailable:
+        response = degraded_bootstrap(user_email) if DB_DEGRADED_MODE else None
+        if response is None:
+            raise
+        refresh_auth_cookie(response, user_email)
+        return response
+    except Exception as e:
+        logger.error(f"Error loading bootstrap data for {user_email}: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to load page data: {str(e)}")
@@ -1,64 +1,87 @@
-from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from fastapi import APIRouter, HTTPException, Depends, Request, Response, Query
 from fastapi.responses import HTMLResponse, JSONResponse, StreamingResponse
-from utils.database import get_db_connection
+from utils.json_response import OrjsonResponse
+from utils.database import db_connection, read_db_connection, mark_recent_write, run_db, run_db_once
+from utils.db_resilience import DatabaseUnavailable
 from utils.logging_setup import logger
-from utils.user_util import load_session
+from utils.history_util import build_history, schedule_summary_refresh
+from utils.message_buffer import TurnMessageBuffer, wait_for_thread_flush
+from utils.agent_catalog import ensure_agent_catalog_loaded
+from utils.title_worker import schedule_thread_title
+from utils.write_behind import record_session_activity
+from utils.answer_cache_util import (
+    get_cached_answer,
+    set_cached_answer,
+    record_answer_cache_bypass,
+    record_tokens_saved
+)
 from dotenv import load_dotenv
 from typing import List, Dict, Any, Optional, AsyncGenerator
 import datetime
 import json
 from utils.common_funtions import is_valid_uuid
 from utils.threads_util import (
-    save_agent_thread_message, 
-    save_user_thread_message, 
     create_thread, 
     get_thread_by_id,
-    get_threads_by_user,
-    get_thread_messages_by_thread_id,
+    get_threads_page,
+    get_thread_messages_page,
     get_latest_thread,
-    update_thread
+    begin_chat_turn
 )
-from langchain_core.messages import HumanMessage, AIMessage
 
 from routes.routes_authentication import get_current_user_email
 import agents.agent_controller
 from agents.AgentsEnum import AgentsEnum
+from langchain_core.messages import AIMessageChunk
+import os
 # Load environment variables
 load_dotenv()
 
+# Forward model output token by token as SSE "delta" events (can be overridden per request with "stream_tokens")
+CHAT_TOKEN_STREAMING = os.getenv("CHAT_TOKEN_STREAMING", "true").lower() == "true"
+
+# Largest page of messages a client may request with limit
+MESSAGE_PAGE_MAX_LIMIT = int(os.getenv("MESSAGE_PAGE_MAX_LIMIT", "500"))
+# Largest page of threads a client may request from /list
+THREAD_PAGE_MAX_LIMIT = int(os.getenv("THREAD_PAGE_MAX_LIMIT", "200"))
+
 router = APIRouter(prefix="/api/threads", tags=["threads"])
 
-@router.get("/list", response_model=List[Dict[str, Any]])
-async def get_user_threads(user_email: str = Depends(get_current_user_email)):
+@router.get("/list", response_class=OrjsonResponse)
+async def get_user_threads(
+    limit: int = Query(50, ge=1, le=THREAD_PAGE_MAX_LIMIT),
+    cursor: Optional[str] = None,
+    since: Optional[str] = None,
+    user_email: str = Depends(get_current_user_email)
+):
     """
-    Get all chat threads for the current user, ordered by most recent activity
+    Get chat threads for the current user, ordered by most recent activity.
+    Pages: pass the X-Next-Cursor header of the previous response as cursor.
+    Delta sync: pass the X-Sync-Token header of a previous response as since to get only the threads
+    changed since then (deactivated threads included, with is_active false).
     """
     try:
                 
         logger.info(f"Getting threads for user: {user_email}")
         
-        # Get all threads for the user, ordered by last activity date
-        
-        user_session = load_session(user_email)
-        simple_agent = agents.agent_controller.get_simple_agent()
-        
-        threads = get_threads_by_user(user_email)
-        for thread in threads:
-            if thread["thread_title"] == "New Chat":
-                messages = get_thread_messages_by_thread_id(thread["thread_id"], user_email)
-                user_messages = [msg for msg in messages if msg["role"] == "User"]
-                if user_messages and len(user_messages) > 1:
-                    prompt = f"Generate a concise title for the following chat messages:\n\n{"\n".join([msg['content'] for msg in user_messages])}\n\n"
-                    res = simple_agent.invoke(
-                        {"messages": [{"role": "user", "content": prompt}]}
-                    )
-                    messages = res['messages'][-1]
-                    thread["thread_title"] = messages.content.strip()
-                    update_thread(thread["thread_id"], thread_title=thread["thread_title"])
+        try:
+            page = await run_db(get_threads_page, user_email, limit, cursor, since)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        
+        threads = page["threads"]
+        headers = {}
+        if page["next_cursor"]:
+            headers["X-Next-Cursor"] = page["next_cursor"]
+        if page["sync_token"]:
+            headers["X-Sync-Token"] = page["sync_token"]
         
         logger.info(f"Found {len(threads)} threads for user: {user_email}")
-        return threads
+        # ThreadRows go straight to orjson, without response_model validation
+        return OrjsonResponse(threads, headers=headers)
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting user threads: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get threads: {str(e)}")
@@ -77,7 +100,7 @@ async def create_new_thread(
         
         logger.info(f"Creating new thread for user: {user_email}")
         
-        thread_data = create_thread(user_email, thread_title, thread_icon)
+        thread_data = await run_db_once(create_thread, user_email, thread_title, thread_icon)
               
         return {
             "success": True,
@@ -87,30 +110,40 @@ async def create_new_thread(
             "message": "Thread created successfully"
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error creating thread: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to create thread: {str(e)}")
 
-@router.get("/byid/{thread_id}/messages")
+@router.get("/byid/{thread_id}/messages", response_class=OrjsonResponse)
 async def get_thread_messages(
     thread_id: str, 
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MESSAGE_PAGE_MAX_LIMIT),
     user_email: str = Depends(get_current_user_email)
 ):
     """
-    Get all messages for a specific thread
+    Get messages for a specific thread.
+    Without parameters all messages are returned. With limit, the newest messages (before the
+    before cursor, or after the after cursor) are returned; pass next_cursor back to get the next page.
     """
     try:
         # Validate UUID format
         if not is_valid_uuid(thread_id):
             raise HTTPException(status_code=400, detail="Invalid thread ID format")
             
-        messages = get_thread_messages_by_thread_id(thread_id, user_email)
+        page = await run_db(get_thread_messages_page, thread_id, user_email, before, after, limit)
+        messages = page["messages"]
         
-        return {
+        return OrjsonResponse({
             "thread_id": thread_id,
             "messages": messages,
-            "total_messages": len(messages)
-        }
+            "total_messages": len(messages),
+            "has_more": page["has_more"],
+            "next_cursor": page["next_cursor"]
+        })
         
     except HTTPException:
         raise
@@ -118,15 +151,19 @@ async def get_thread_messages(
         logger.error(f"Error getting thread messages: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get messages: {str(e)}")
 
-@router.get("/current/messages")
+@router.get("/current/messages", response_class=OrjsonResponse)
 async def get_current_thread_messages(
     request: Request,
+    before: Optional[int] = None,
+    after: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MESSAGE_PAGE_MAX_LIMIT),
     user_email: str = Depends(get_current_user_email)
 ) -> JSONResponse:
     """
     Get messages for the current thread. 
     Checks FreddyAI_CurrentThread cookie, if not found gets the most recent thread.
     Sets the current thread cookie for future requests.
+    Supports the same before/after/limit pagination as /byid/{thread_id}/messages.
     """
     try:
 
@@ -138,11 +175,13 @@ async def get_current_thread_messages(
         # If no cookie or thread doesn't exist/belong to user, get the most recent thread
         if current_thread_id and is_valid_uuid(current_thread_id):
             try:
-                current_thread = get_thread_by_id(user_email, current_thread_id)
+                current_thread = await run_db(get_thread_by_id, user_email, current_thread_id)
                 logger.info(f"Current thread from cookie get_thread_by_id: {current_thread}")
                 if current_thread:
                     current_thread_id = current_thread["thread_id"]  # Thread doesn't exist or doesn't belong to user
                 
+            except DatabaseUnavailable:
+                raise
             except Exception as e:
                 logger.error(f"Error getting current thread from cookie: {str(e)}")
                 current_thread_id = None
@@ -154,11 +193,13 @@ async def get_current_thread_messages(
         if not current_thread_id:
             try:
                 # Get the most recent thread for the user
-                current_thread = get_latest_thread(user_email)
+                current_thread = await run_db(get_latest_thread, user_email)
                 logger.info(f"Latest thread for user get_latest_thread: {user_email} is {current_thread}")
                 if current_thread:
                     current_thread_id = current_thread["thread_id"]
                     
+            except DatabaseUnavailable:
+                raise
             except Exception as e:
                 logger.error(f"Error getting latest thread: {str(e)}")
                 current_thread_id = None
@@ -170,6 +211,8 @@ async def get_current_thread_messages(
                 "thread_id": None,
                 "messages": [],
                 "total_messages": 0,
+                "has_more": False,
+                "next_cursor": None,
                 "message": "No threads found. Welcome to FreddyGPT!"
             })
 
@@ -185,17 +228,20 @@ async def get_current_thread_messages(
 
             return response
         
-        messages = get_thread_messages_by_thread_id(current_thread_id, user_email)
+        page = await run_db(get_thread_messages_page, current_thread_id, user_email, before, after, limit)
+        messages = page["messages"]
         
         logger.info(f"Found current thread {current_thread_id} with {len(messages)} messages for user: {user_email}")
         
-        response = JSONResponse(content={
+        response = OrjsonResponse(content={
             "has_current_thread": True,
             "thread_id": current_thread_id,
             "thread_title": current_thread["thread_title"],
             "thread_icon": current_thread["thread_icon"],
             "messages": messages,
-            "total_messages": len(messages)
+            "total_messages": len(messages),
+            "has_more": page["has_more"],
+            "next_cursor": page["next_cursor"]
         })
         
         # Set the current thread cookie (expires in 30 days)
@@ -209,6 +255,8 @@ async def get_current_thread_messages(
         )
         return response
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error getting current thread messages: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to get current thread messages: {str(e)}")
@@ -227,21 +275,21 @@ async def set_current_thread(
         if not is_valid_uuid(thread_id):
             raise HTTPException(status_code=400, detail="Invalid thread ID format")
             
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verify the thread belongs to the user
-        cursor.execute("""
-            SELECT ThreadID FROM [dbo].[user_threads]
-            WHERE ThreadID = ? AND UserEmail = ? AND IsActive = 1
-        """, thread_id, user_email)
+        def is_user_thread():
+            with read_db_connection(user_email, thread_id) as conn:
+                cursor = conn.cursor()
+                
+                # Verify the thread belongs to the user
+                cursor.execute("""
+                    SELECT ThreadID FROM [dbo].[user_threads]
+                    WHERE ThreadID = ? AND UserEmail = ? AND IsActive = 1
+                """, thread_id, user_email)
+                
+                return cursor.fetchone() is not None
         
-        if not cursor.fetchone():
-            conn.close()
+        if not await run_db(is_user_thread):
             raise HTTPException(status_code=404, detail="Thread not found")
         
-        conn.close()
-        
         # Set the current thread cookie (expires in 30 days)
         response.set_cookie(
             key="FreddyAI_CurrentThread",
@@ -281,29 +329,33 @@ async def deactivate_thread(
         if not is_valid_uuid(thread_id):
             raise HTTPException(status_code=400, detail="Invalid thread ID format")
             
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
-        # Verify the thread belongs to the user
-        cursor.execute("""
-            SELECT ThreadID FROM [dbo].[user_threads]
-            WHERE ThreadID = ? AND UserEmail = ? AND IsActive = 1
-        """, thread_id, user_email)
+        def deactivate_user_thread():
+            with db_connection() as conn:
+                cursor = conn.cursor()
+                
+                # Verify the thread belongs to the user
+                cursor.execute("""
+                    SELECT ThreadID FROM [dbo].[user_threads]
+                    WHERE ThreadID = ? AND UserEmail = ? AND IsActive = 1
+                """, thread_id, user_email)
+                
+                if not cursor.fetchone():
+                    return False
+                
+                # Deactivate the thread (soft delete)
+                cursor.execute("""
+                    UPDATE [dbo].[user_threads]
+                    SET IsActive = 0, ModifiedDate = GETUTCDATE()
+                    WHERE ThreadID = ? AND UserEmail = ?
+                """, thread_id, user_email)
+                
+                conn.commit()
+            mark_recent_write(user_email, thread_id)
+            return True
         
-        if not cursor.fetchone():
-            conn.close()
+        if not await run_db_once(deactivate_user_thread):
             raise HTTPException(status_code=404, detail="Thread not found")
         
-        # Deactivate the thread (soft delete)
-        cursor.execute("""
-            UPDATE [dbo].[user_threads]
-            SET IsActive = 0, ModifiedDate = GETUTCDATE()
-            WHERE ThreadID = ? AND UserEmail = ?
-        """, thread_id, user_email)
-        
-        conn.commit()
-        conn.close()
-        
         # Clear the current thread cookie if this was the current thread
         current_thread_cookie = request.cookies.get("FreddyAI_CurrentThread")
         if current_thread_cookie == thread_id:
@@ -345,53 +397,138 @@ async def send_chat_message(
         message_content = data.get("message", "").strip()
         if not message_content:
             raise HTTPException(status_code=400, detail="Message content is required")
+        stream_tokens = bool(data.get("stream_tokens", CHAT_TOKEN_STREAMING))
+        bypass_cache = bool(data.get("bypass_cache", False))
 
         # Check for current thread cookie
         current_thread_id = request.cookies.get("FreddyAI_CurrentThread")
+        if current_thread_id:
+            await wait_for_thread_flush(current_thread_id)
         
-        current_thread = get_thread_by_id(user_email, current_thread_id)
-        if not current_thread:
-            current_thread = create_thread(user_email)
-            
-        if not current_thread:
-            raise HTTPException(status_code=500, detail="Failed to create or retrieve thread")
-
-        current_thread_id = current_thread["thread_id"]
-        
-        # Save user message to thread_messages table
-        user_message_id = save_user_thread_message(
+        # Validate or create the thread, save the user message and load the session in one round trip
+        current_thread, user_message_id, user_session = await run_db_once(
+            begin_chat_turn,
+            user_email=user_email,
             thread_id=current_thread_id,
             message_content=message_content,
         )
-
+        is_new_thread = current_thread["is_new_thread"]
+        current_thread_id = current_thread["thread_id"]
+        
         if not user_message_id:
             raise HTTPException(status_code=500, detail="Failed to save user message")
         
-        # load user session
-        user_session = load_session(user_email)
-        agent_controller = agents.agent_controller.get_agent_controller(user_session)
+        # Session activity is low priority, written in the background (write-behind)
+        record_session_activity(user_email)
+        
+        # Title the thread in the background once it has a second user message
+        if not is_new_thread and current_thread["thread_title"] == "New Chat":
+            schedule_thread_title(current_thread_id, user_email)
+        
+        # Prior conversation within the token budget (older turns come in as a rolling summary)
+        history_messages, pending_history = [], []
+        if not is_new_thread:
+            history_messages, pending_history = await run_db(
+                build_history, current_thread_id, user_email, user_message_id
+            )
+        
+        # Answers only depend on the agent set and the question when there is no prior conversation
+        await ensure_agent_catalog_loaded()
+        controller_key = agents.agent_controller.get_controller_cache_key(user_session)
+        use_answer_cache = not history_messages
+        cached_answer = None
+        if use_answer_cache and bypass_cache:
+            record_answer_cache_bypass()
+        elif use_answer_cache:
+            cached_answer = get_cached_answer(controller_key, message_content)
+        
+        agent_controller = None if cached_answer else agents.agent_controller.get_agent_controller(user_session)
 
         def serialize_sse_event(data: Dict) -> str:
             return f"data: {json.dumps(data)}\n\n"
       
+        async def cached_response_stream() -> AsyncGenerator[str, None]:
+            # Replay a cached answer with the same events as a live turn
+            message_buffer = TurnMessageBuffer(current_thread_id)
+            try:
+                for cached_message in cached_answer["messages"]:
+                    yield serialize_sse_event({'type': "message", **cached_message, 'created_date': datetime_now})
+                    
+                    # buffer message for the database, no tokens were spent on it
+                    message_buffer.add(cached_message["agent_code"], cached_message["content"], 0, 0)
+                
+                record_tokens_saved(cached_answer["input_tokens"], cached_answer["output_tokens"])
+                logger.info(f"Answered from cache, saved {cached_answer['input_tokens'] + cached_answer['output_tokens']} tokens")
+                
+                # Save the turn before the client can start the next one
+                await message_buffer.save()
+                
+                # Signal end of stream
+                yield serialize_sse_event({'type': "stream_end"})
+            finally:
+                # Still save what was produced when the turn ended early (client gone or agent error)
+                message_buffer.schedule_flush()
+      
         async def response_stream() -> AsyncGenerator[str, None]:
             # Send message to agent controller and get response
             nonlocal current_thread_id
-            for chunk in agent_controller.stream(
-                {"messages": [{"role": "user", "content": message_content}]},
-                stream_mode="updates"
-            ):
-                for step, data in chunk.items():
-                    message = data['messages'][-1]
+            message_buffer = TurnMessageBuffer(current_thread_id)
+            answer_messages = []
+            answer_input_tokens = 0
+            answer_output_tokens = 0
+            answer_cacheable = use_answer_cache
+            stream_modes = ["messages", "updates", "custom"] if stream_tokens else ["updates", "custom"]
+            try:
+                async for namespace, stream_mode, chunk in agent_controller.astream(
+                    {"messages": [*history_messages, {"role": "user", "content": message_content}]},
+                    config=agents.agent_controller.create_turn_config(),
+                    stream_mode=stream_modes,
+                    subgraphs=True
+                ):
+                    if stream_mode == "messages":
+                        # Token deltas from the orchestrator and from sub-agents (which run as subgraphs
+                        # inside the tools step); the full message is still persisted once per step below
+                        message_chunk, metadata = chunk
+                        if isinstance(message_chunk, AIMessageChunk) and isinstance(message_chunk.content, str) and message_chunk.content:
+                            agent_code = metadata.get("lc_agent_name") or AgentsEnum.FREDDYAI_ASSISTANT.value
+                            yield serialize_sse_event({'type': "delta", 'agent_code': agent_code, 'content': message_chunk.content})
+                        continue
+                    
+                    if namespace:
+                        # Updates emitted inside sub-agent graphs are reported through the custom events
+                        continue
                     
-                    if step == "model":
+                    if stream_mode == "custom":
+                        # Structured sub-agent results (see SubAgentRegistry.invoke) arrive here as soon as
+                        # each one finishes, independently of the other sub-agents running in the same step
+                        if chunk.get("type") != "agent_result":
+                            continue
+                        
+                        agent_code = chunk["agent_code"]
+                        total_tokens = chunk["input_tokens"] + chunk["output_tokens"]
+                        
+                        logger.info(f"{agent_code}: tokens: {total_tokens}, latency: {chunk['latency_ms']}ms, cached: {chunk['cached']}")
+                        
+                        answer_messages.append({'agent_code': agent_code, 'content': chunk["content"], 'tokens': total_tokens})
+                        answer_input_tokens += chunk["input_tokens"]
+                        answer_output_tokens += chunk["output_tokens"]
+                        if chunk["timed_out"]:
+                            answer_cacheable = False
+                        
+                        yield serialize_sse_event({'type': "message", 'agent_code': agent_code, 'content': chunk["content"], 'tokens': total_tokens, 'timed_out': chunk["timed_out"], 'created_date': datetime_now})
+                        
+                        # buffer message and tokens for the database
+                        message_buffer.add(agent_code, chunk["content"], chunk["input_tokens"], chunk["output_tokens"])
+                        continue
+                    
+                    for step, data in chunk.items():
+                        # Tool steps are already streamed through the custom events above
+                        if step != "model":
+                            continue
+                        
+                        message = data['messages'][-1]
                         agent_code = AgentsEnum.FREDDYAI_ASSISTANT.value
                         if message.content:
-                            # print(f"{agent_code}:")
-                            # print(f"{message.content}")
-                            # print(f"tokens: {message.usage_metadata['total_tokens']}")
-                            
-                            # save message and tokens to database
                             total_tokens = message.usage_metadata['total_tokens'] if 'total_tokens' in message.usage_metadata else 0
                             completion_tokens = message.usage_metadata['output_tokens'] if 'output_tokens' in message.usage_metadata else 0
                             prompt_tokens = total_tokens - completion_tokens
@@ -400,58 +537,29 @@ async def send_chat_message(
                             logger.info(f"{message}")
                             logger.info(f"tokens: {total_tokens}")
                             
-                            # save message and tokens to database
-                            agent_message_id = save_agent_thread_message(
-                                thread_id=current_thread_id,
-                                message_content=message.content,
-                                agent_code=agent_code,
-                                input_tokens=prompt_tokens,
-                                output_tokens=completion_tokens,
-                            )
+                            # buffer message and tokens for the database
+                            message_buffer.add(agent_code, message.content, prompt_tokens, completion_tokens)
                             
-                            yield serialize_sse_event({'type': "message", 'agent_code': agent_code, 'content': message.content, 'tokens': message.usage_metadata['total_tokens'], 'created_date': datetime_now})
-                    else:
-                        agent_code = message.name
-                        # Parse the string content to extract AIMessage content
-                        try:
-                            # Use eval() to parse the string containing Python objects
-                            # Note: This is safe here since we control the content source
-                          
-                            content_dict = eval(message.content, {"__builtins__": {}, "HumanMessage": HumanMessage, "AIMessage": AIMessage})
+                            yield serialize_sse_event({'type': "message", 'agent_code': agent_code, 'content': message.content, 'tokens': total_tokens, 'created_date': datetime_now})
                             
-                            # Extract AIMessage content from the parsed dictionary
-                            if 'messages' in content_dict:
-                                # Get the last message which should be the AIMessage
-                                aiMessage = content_dict['messages'][-1]
-                                msg = aiMessage.content
-                                total_tokens = aiMessage.response_metadata['token_usage']['total_tokens'] if 'response_metadata' in dir(aiMessage) and 'token_usage' in aiMessage.response_metadata else 0
-                                completion_tokens = aiMessage.response_metadata['token_usage']['completion_tokens'] if 'response_metadata' in dir(aiMessage) and 'token_usage' in aiMessage.response_metadata else 0
-                                prompt_tokens = total_tokens - completion_tokens
-                                
-                                logger.info(f"{agent_code}:")
-                                logger.info(f"{aiMessage}")
-                                logger.info(f"tokens: {total_tokens}")
-                                
-                                # save message and tokens to database
-                                save_agent_thread_message(
-                                    thread_id=current_thread_id,
-                                    message_content=msg,
-                                    agent_code=agent_code,
-                                    input_tokens=prompt_tokens,
-                                    output_tokens=completion_tokens,
-                                )
-                                
-                                yield serialize_sse_event({'type': "message", 'agent_code': agent_code, 'content': msg, 'tokens': total_tokens, 'created_date': datetime_now})
-                        except Exception as e:
-                            # If parsing fails, just print the raw content
-                            logger.error(f"Error: {e}")
-                    
-            # Indicate completed message
-            # completed_message = {'type': "completed_message"}
-            # yield serialize_sse_event(completed_message)
+                            answer_messages.append({'agent_code': agent_code, 'content': message.content, 'tokens': total_tokens})
+                            answer_input_tokens += prompt_tokens
+                            answer_output_tokens += completion_tokens
+                
+                if answer_cacheable:
+                    set_cached_answer(controller_key, message_content, answer_messages, answer_input_tokens, answer_output_tokens)
+                
+                # Save the turn before the client can start the next one
+                await message_buffer.save()
+                
+                # Signal end of stream
+                yield serialize_sse_event({'type': "stream_end"})
+            finally:
+                # Still save what was produced when the turn ended early (client gone or agent error)
+                message_buffer.schedule_flush()
             
-            # Signal end of stream
-            yield serialize_sse_event({'type': "stream_end"})
+            # Fold turns that fell out of the history window into the thread summary
+            schedule_summary_refresh(current_thread_id, pending_history)
         
         # Set the Server-Sent Events (SSE) response headers.
         headers = {
@@ -460,7 +568,8 @@ async def send_chat_message(
             "Content-Type": "text/event-stream"
         }
 
-        response = StreamingResponse(response_stream(), media_type="text/event-stream", headers=headers) 
+        stream = cached_response_stream() if cached_answer else response_stream()
+        response = StreamingResponse(stream, media_type="text/event-stream", headers=headers) 
         
         # Set/update the current thread cookie
         response.set_cookie(
@@ -46,10 +46,15 @@ from agents.AgentsEnum import AgentsEnum
 from langchain_core.messages import HumanMessage, AIMessage
 agent_controller = agents.agent_controller.get_agent_controller(user_session)
 token_count = 0
-for chunk in agent_controller.stream(
-    {"messages": [{"role": "user", "content": "What is performance of Heineken in Vietnam?"}]},
-    stream_mode="updates"
-):
+
+async def collect_chunks():
+    return [chunk async for chunk in agent_controller.astream(
+        {"messages": [{"role": "user", "content": "What is performance of Heineken in Vietnam?"}]},
+        stream_mode="updates"
+    )]
+
+import asyncio
+for chunk in asyncio.run(collect_chunks()):
     for step, data in chunk.items():
         # print(f"step: {step}")
         # print(f"content: {data['messages'][-1].content_blocks}")
@@ -63,30 +68,11 @@ for chunk in agent_controller.stream(
                 print(f"tokens: {message.usage_metadata['total_tokens']}")
         else:
             agent_name = message.name
-            # Parse the string content to extract AIMessage content
-            try:
-                # Use eval() to parse the string containing Python objects
-                # Note: This is safe here since we control the content source
-                
-                content_dict = eval(message.content)
-                
-                # Extract AIMessage content from the parsed dictionary
-                if 'messages' in content_dict:
-                    # Get the last message which should be the AIMessage
-                    # for msg in content_dict['messages']:
-                    #     if isinstance(msg, AIMessage):
-                    #         print(f"AI Response: {msg.content}")
-                        # elif isinstance(msg, HumanMessage):
-                        #     print(f"Human Message: {msg.content}")
-                    aiMessage = content_dict['messages'][-1]
-                    msg = aiMessage.content
-                    print(f"{agent_name}:")
-                    print(f"{msg}")
-                    print(f"tokens: {aiMessage.response_metadata['token_usage']['total_tokens']}")
-            except Exception as e:
-                # If parsing fails, just print the raw content
-                print(f"Error: {e}")
-                print(f"{message.content}")
+            # Sub-agent tools return a structured result as the ToolMessage artifact
+            result = message.artifact or {}
+            print(f"{agent_name}:")
+            print(f"{result.get('content', message.content)}")
+            print(f"tokens: {result.get('input_tokens', 0) + result.get('output_tokens', 0)}, latency: {result.get('latency_ms')}ms")
 
         # Check if message.content is a string (which it should be for AIMessage)
         # if isinstance(message.content, str):
@@ -0,0 +1,65 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from agents import agent_controller
+from agents.AgentsEnum import AgentsEnum
+from agents.agent_controller import SubAgentRegistry, get_agent_controller
+
+TRENDS = AgentsEnum.TRENDS_AGENT.value
+BWCS = AgentsEnum.BWCS_AGENT.value
+
+
+class FakeSubAgent:
+    def __init__(self, name, chat_model, tools, system_prompt):
+        self.name = name
+        self.system_prompt = system_prompt
+
+
+@pytest.fixture(autouse=True)
+def offline_controller(monkeypatch):
+    """Build controllers without a model: the orchestrator is a namespace holding its tools"""
+    prompts = {TRENDS: "trends prompt", BWCS: "bwcs prompt"}
+    monkeypatch.setattr(agent_controller, "get_chat_model", lambda: None)
+    monkeypatch.setattr(agent_controller, "HeinekenAgent", FakeSubAgent)
+    monkeypatch.setattr(agent_controller, "create_agent", lambda name, model, tools: SimpleNamespace(tools=tools))
+    monkeypatch.setattr(agent_controller, "get_agent_system_prompt", lambda agent_code: prompts.get(agent_code, ""))
+    monkeypatch.setattr(agent_controller, "agent_controller_cache", agent_controller.LRUCache(maxsize=8))
+
+    async def reached(registry, agent_code, query):
+        return registry.get(agent_code)
+
+    monkeypatch.setattr(SubAgentRegistry, "invoke", reached)
+    return prompts
+
+
+def session(*agent_codes):
+    return SimpleNamespace(session_agents=[{"agent_code": agent_code} for agent_code in agent_codes])
+
+
+def call_tool(controller, agent_code):
+    tool = next(tool for tool in controller.tools if tool.name == agent_code)
+    return asyncio.run(tool.coroutine("query"))
+
+
+def test_cached_controllers_keep_their_own_sub_agents():
+    trends_controller = get_agent_controller(session(TRENDS))
+    bwcs_controller = get_agent_controller(session(BWCS))
+
+    # Building the second controller must not rebind the tools of the cached first one
+    assert [tool.name for tool in trends_controller.tools] == [TRENDS]
+    assert call_tool(trends_controller, TRENDS).name == TRENDS
+    assert [tool.name for tool in bwcs_controller.tools] == [BWCS]
+    assert call_tool(bwcs_controller, BWCS).name == BWCS
+
+
+def test_same_agent_set_reuses_controller_and_prompt_edit_rebuilds_it(offline_controller):
+    controller = get_agent_controller(session(TRENDS, BWCS))
+    assert get_agent_controller(session(BWCS, TRENDS)) is controller
+
+    offline_controller[TRENDS] = "edited trends prompt"
+    rebuilt = get_agent_controller(session(TRENDS, BWCS))
+    assert rebuilt is not controller
+    assert call_tool(rebuilt, TRENDS).system_prompt == "edited trends prompt"
+    assert call_tool(controller, TRENDS).system_prompt == "trends prompt"
@@ -0,0 +1,14 @@
+from utils.answer_cache_util import estimate_similarity, get_minhash_signature, normalize_query
+
+
+def test_normalize_query_ignores_case_punctuation_and_spacing():
+    assert normalize_query("  What's the  Heineken volume?? ") == "what s the heineken volume"
+    assert normalize_query("Heineken volume") == normalize_query("heineken, VOLUME!")
+
+
+def test_rewordings_with_filler_words_are_similar():
+    signature = get_minhash_signature(normalize_query("What is the performance of Heineken in Spain?"))
+    reworded = get_minhash_signature(normalize_query("performance of heineken in spain"))
+    other = get_minhash_signature(normalize_query("Amstel distribution in Brazil"))
+    assert estimate_similarity(signature, reworded) == 1.0
+    assert estimate_similarity(signature, other) < 0.5
@@ -0,0 +1,26 @@
+from utils import cache_util
+from utils.cache_util import LRUCache
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_entries_expire_after_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache_util.time, "monotonic", lambda: now[0])
+    cache = LRUCache(ttl=10)
+    cache.set("default", 1)
+    cache.set("longer", 2, ttl=60)
+
+    now[0] += 11
+    assert cache.get("default") is None
+    assert cache.get("longer") == 2
+    assert cache.stats()["misses"] == 1
@@ -0,0 +1,95 @@
+import gc
+
+import pytest
+
+from utils.database import ConnectionPool, DatabasePoolTimeout
+
+
+class FakeConnection:
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+        self.health_checks = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, *params):
+        if self.broken:
+            raise Exception("[08S01] connection is broken")
+        self.health_checks += 1
+
+    def fetchone(self):
+        return (1,)
+
+    def rollback(self):
+        if self.broken:
+            raise Exception("[08S01] connection is broken")
+
+    def close(self):
+        self.closed = True
+
+
+def make_pool(**options):
+    opened = []
+
+    def connect():
+        opened.append(FakeConnection())
+        return opened[-1]
+
+    options.setdefault("health_check_idle", 60)
+    return ConnectionPool(connect, min_size=0, max_size=2, acquire_timeout=0.05, name="test", **options), opened
+
+
+def test_connections_are_reused_and_bounded():
+    pool, opened = make_pool()
+    first = pool.acquire()
+    first.close()
+    first.close()  # closing twice must not release the slot twice
+    second = pool.acquire()
+    third = pool.acquire()
+    assert len(opened) == 2
+    with pytest.raises(DatabasePoolTimeout):
+        pool.acquire()
+    second.close()
+    third.close()
+    assert pool.stats()["idle"] == 2
+
+
+def test_leaked_connection_is_reclaimed():
+    pool, _ = make_pool()
+    for _ in range(5):
+        pool.acquire()  # never closed
+        gc.collect()
+    assert pool.stats()["reclaimed"] == 5
+    assert pool.stats()["in_use"] == 0
+
+
+def test_close_all_closes_checked_out_connections_on_return():
+    pool, opened = make_pool()
+    in_use = pool.acquire()
+    idle = pool.acquire()
+    idle.close()
+
+    pool.close_all()
+    assert opened[1].closed and not opened[0].closed
+
+    in_use.close()
+    assert opened[0].closed
+    assert pool.stats()["size"] == 0
+
+
+def test_broken_connection_makes_idle_ones_validated():
+    pool, opened = make_pool()
+    first = pool.acquire()
+    second = pool.acquire()
+    second.close()
+
+    opened[0].broken = True
+    opened[1].broken = True
+    first.close()
+
+    # The idle connection is checked before reuse, discarded, and replaced by a new one
+    replacement = pool.acquire()
+    assert replacement._connection is opened[2]
+    assert pool.stats()["discarded"] == 2
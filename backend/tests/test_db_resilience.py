@@ -0,0 +1,141 @@
+import asyncio
+
+import pytest
+
+from utils import db_resilience
+from utils.db_fault_injection import fatal_error, transient_error
+from utils.db_resilience import CircuitBreaker, DatabaseUnavailable, call_with_retry, is_database_error, is_transient_error
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(db_resilience, "backoff_delay", lambda attempt: 0)
+
+
+def scripted(*outcomes):
+    """attempt() for call_with_retry that raises or returns the next outcome, counting the calls"""
+    outcomes = list(outcomes)
+    calls = []
+
+    async def attempt():
+        calls.append(1)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return outcome
+
+    return attempt, calls
+
+
+@pytest.mark.parametrize("code", [40613, 40501, 10054, 1205])
+def test_transient_errors_are_retryable(code):
+    assert is_transient_error(transient_error(code))
+
+
+def test_fatal_and_wrapped_errors():
+    assert not is_transient_error(fatal_error())
+    assert is_database_error(fatal_error())
+    assert not is_database_error(ValueError("bug"))
+
+    try:
+        try:
+            raise transient_error(40613)
+        except Exception as e:
+            raise Exception(f"Failed to fetch thread: {e}")
+    except Exception as wrapped:
+        assert is_transient_error(wrapped)
+
+
+def test_database_unavailable_is_not_retried():
+    assert not is_transient_error(DatabaseUnavailable())
+
+
+def test_breaker_opens_after_threshold_and_probes_once():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0, name="test")
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    assert breaker.check() is True  # reset_timeout elapsed, this call is the probe
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    with pytest.raises(DatabaseUnavailable):
+        breaker.check()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.check() is False
+
+
+def test_open_breaker_rejects_with_retry_after():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=30, name="test")
+    breaker.record_failure()
+    with pytest.raises(DatabaseUnavailable) as rejected:
+        breaker.check()
+    assert rejected.value.status_code == 503
+    assert 1 <= int(rejected.value.headers["Retry-After"]) <= 30
+
+
+def test_failed_probe_reopens():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, name="test")
+    breaker.record_failure()
+    assert breaker.check() is True
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_retries_transient_errors_until_success():
+    breaker = CircuitBreaker(name="test")
+    attempt, calls = scripted(transient_error(40613), transient_error(10054), "ok")
+    assert asyncio.run(call_with_retry(attempt, retry=True, breaker=breaker)) == "ok"
+    assert len(calls) == 3
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_persistent_transient_errors_raise_database_unavailable():
+    breaker = CircuitBreaker(failure_threshold=1, name="test")
+    attempt, calls = scripted(*[transient_error(40501)] * 2)
+    with pytest.raises(DatabaseUnavailable):
+        asyncio.run(call_with_retry(attempt, retry=True, breaker=breaker, max_attempts=2))
+    assert len(calls) == 2
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_fatal_errors_are_not_retried():
+    breaker = CircuitBreaker(name="test")
+    attempt, calls = scripted(fatal_error())
+    with pytest.raises(Exception):
+        asyncio.run(call_with_retry(attempt, retry=True, breaker=breaker))
+    assert len(calls) == 1
+
+
+def test_calls_are_not_retried_by_default():
+    attempt, calls = scripted(transient_error(40613))
+    with pytest.raises(DatabaseUnavailable):
+        asyncio.run(call_with_retry(attempt, breaker=CircuitBreaker(name="test")))
+    assert len(calls) == 1
+
+
+def test_non_database_error_during_probe_releases_it():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, name="test")
+    breaker.record_failure()
+    attempt, _ = scripted(TimeoutError("pool exhausted"))
+    with pytest.raises(TimeoutError):
+        asyncio.run(call_with_retry(attempt, retry=True, breaker=breaker))
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.check() is True
+
+
+def test_cancelled_probe_releases_it():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0, name="test")
+    breaker.record_failure()
+
+    async def cancel_probe():
+        task = asyncio.ensure_future(call_with_retry(lambda: asyncio.sleep(10), breaker=breaker))
+        await asyncio.sleep(0)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_probe())
+    assert breaker.check() is True
@@ -0,0 +1,65 @@
+import pytest
+
+from agents.AgentsEnum import AgentsEnum
+from models.thread_models import MessageRow
+from utils import history_util
+from utils.history_util import split_history
+
+ASSISTANT = AgentsEnum.FREDDYAI_ASSISTANT.value
+
+
+def message(order: int, role: str = "User", words: int = 10) -> MessageRow:
+    return MessageRow(order, "thread", None, None, role, " ".join(["word"] * words), 0, 0, 0, order, False, None, None, None)
+
+
+def summary(through_order: int = 0, tokens: int = 0):
+    return {"summary": "earlier" if through_order else "", "summarized_through_order": through_order, "summary_tokens": tokens}
+
+
+@pytest.fixture(autouse=True)
+def word_tokens(monkeypatch):
+    monkeypatch.setattr(history_util, "count_tokens", lambda text: len(text.split()))
+    monkeypatch.setattr(history_util, "HISTORY_TOKEN_BUDGET", 25)
+
+
+def orders(rows):
+    return [row.message_order for row in rows]
+
+
+def test_everything_fits_in_the_window():
+    window, pending = split_history([message(1), message(2, ASSISTANT)], summary())
+    assert orders(window) == [1, 2]
+    assert pending == []
+
+
+def test_newest_messages_fill_the_budget_and_older_ones_are_pending():
+    rows = [message(1), message(2, ASSISTANT), message(3), message(4, ASSISTANT)]
+    window, pending = split_history(rows, summary())
+    assert orders(window) == [3, 4]
+    assert orders(pending) == [1, 2]
+
+
+def test_summary_tokens_come_out_of_the_budget():
+    rows = [message(3), message(4, ASSISTANT)]
+    window, pending = split_history(rows, summary(through_order=2, tokens=10))
+    assert orders(window) == [4]
+    assert orders(pending) == [3]
+
+
+def test_summarized_sub_agent_empty_and_current_messages_are_skipped():
+    rows = [
+        message(1),
+        message(2, ASSISTANT),
+        message(3, "Trends_Agent"),
+        message(4, words=0),
+        message(5)
+    ]
+    window, pending = split_history(rows, summary(through_order=1, tokens=0), current_message_id=5)
+    assert orders(window) == [2]
+    assert pending == []
+
+
+def test_oversized_newest_message_leaves_everything_pending():
+    window, pending = split_history([message(1), message(2, words=30)], summary())
+    assert window == []
+    assert orders(pending) == [1, 2]
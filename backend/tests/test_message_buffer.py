@@ -0,0 +1,115 @@
+import asyncio
+import time
+
+import pytest
+
+from utils import message_buffer
+from utils.db_resilience import CircuitBreaker, db_breaker
+from utils.message_buffer import TurnMessageBuffer, wait_for_pending_flushes
+
+
+@pytest.fixture
+def saved(monkeypatch):
+    """Rows saved one by one by the fallback"""
+    rows = []
+    monkeypatch.setattr(message_buffer, "save_agent_thread_message", lambda **message: rows.append(message))
+    return rows
+
+
+def failing(*args):
+    raise Exception("connection dropped")
+
+
+def buffer_with_turn():
+    buffer = TurnMessageBuffer("thread")
+    buffer.add("Trends_Agent", "trend answer", 10, 20)
+    buffer.add("FreddyAI_Assistant", "final answer", 30, 40)
+    return buffer
+
+
+def test_batch_success_skips_fallback(monkeypatch, saved):
+    batches = []
+    monkeypatch.setattr(message_buffer, "save_agent_thread_messages", lambda thread_id, messages: batches.append(messages))
+    buffer = buffer_with_turn()
+    buffer.flush()
+    buffer.flush()
+    assert len(batches) == 1
+    assert saved == []
+
+
+def test_committed_batch_is_not_saved_again(monkeypatch, saved):
+    monkeypatch.setattr(message_buffer, "save_agent_thread_messages", failing)
+    monkeypatch.setattr(message_buffer, "thread_messages_saved", lambda thread_id, messages: True)
+    buffer_with_turn().flush()
+    assert saved == []
+
+
+def test_rolled_back_batch_falls_back_to_single_rows(monkeypatch, saved):
+    monkeypatch.setattr(message_buffer, "save_agent_thread_messages", failing)
+    monkeypatch.setattr(message_buffer, "thread_messages_saved", lambda thread_id, messages: False)
+    buffer_with_turn().flush()
+    assert [row["message_content"] for row in saved] == ["trend answer", "final answer"]
+    assert all(row["thread_id"] == "thread" for row in saved)
+
+
+def test_unknown_batch_outcome_is_not_retried(monkeypatch, saved, caplog):
+    monkeypatch.setattr(message_buffer, "save_agent_thread_messages", failing)
+    monkeypatch.setattr(message_buffer, "thread_messages_saved", failing)
+    with pytest.raises(Exception, match="connection dropped"):
+        buffer_with_turn().flush()
+    assert saved == []
+    assert "Lost Trends_Agent message" in caplog.text
+
+
+def test_failed_single_row_is_raised_after_the_rest_is_saved(monkeypatch, saved, caplog):
+    def save_one(**message):
+        if message["agent_code"] == "Trends_Agent":
+            raise Exception("bad row")
+        saved.append(message)
+
+    monkeypatch.setattr(message_buffer, "save_agent_thread_messages", failing)
+    monkeypatch.setattr(message_buffer, "thread_messages_saved", lambda thread_id, messages: False)
+    monkeypatch.setattr(message_buffer, "save_agent_thread_message", save_one)
+    with pytest.raises(Exception, match="bad row"):
+        buffer_with_turn().flush()
+    assert [row["message_content"] for row in saved] == ["final answer"]
+    assert "Lost Trends_Agent message" in caplog.text
+
+
+def test_save_logs_instead_of_raising(monkeypatch, saved, caplog):
+    monkeypatch.setattr(message_buffer, "save_agent_thread_messages", failing)
+    monkeypatch.setattr(message_buffer, "thread_messages_saved", failing)
+    asyncio.run(buffer_with_turn().save())
+    assert "Could not save every message of the turn in thread thread" in caplog.text
+
+
+def test_next_turn_waits_for_the_previous_flush(monkeypatch):
+    batches = []
+
+    def slow_save(thread_id, messages):
+        time.sleep(0.05)
+        batches.append(messages)
+
+    monkeypatch.setattr(message_buffer, "save_agent_thread_messages", slow_save)
+
+    async def disconnect_then_send():
+        buffer_with_turn().schedule_flush()
+        await message_buffer.wait_for_thread_flush("thread")
+        return list(batches)
+
+    assert len(asyncio.run(disconnect_then_send())) == 1
+    assert message_buffer._thread_flushes == {}
+
+
+def test_scheduled_flush_logs_turn_lost_while_circuit_is_open(monkeypatch, saved, caplog):
+    monkeypatch.setattr(message_buffer, "save_agent_thread_messages", failing)
+    monkeypatch.setattr(db_breaker, "state", CircuitBreaker.OPEN)
+    monkeypatch.setattr(db_breaker, "_opened_at", time.monotonic())
+
+    async def flush_turn():
+        buffer_with_turn().schedule_flush()
+        await wait_for_pending_flushes()
+
+    asyncio.run(flush_turn())
+    assert "Lost Trends_Agent message" in caplog.text
+    assert "Lost FreddyAI_Assistant message" in caplog.text
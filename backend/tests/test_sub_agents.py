@@ -0,0 +1,42 @@
+import asyncio
+from types import SimpleNamespace
+
+from langchain_core.messages import AIMessage
+
+from agents import agent_controller
+from agents.agent_controller import SubAgentRegistry
+
+
+class FakeSubAgent:
+    prompt_hash = "prompt"
+
+    def __init__(self, answer=None, delay=0.0):
+        self.answer = answer
+        self.delay = delay
+
+    def get_agent(self):
+        async def ainvoke(state):
+            await asyncio.sleep(self.delay)
+            return {"messages": [AIMessage(content=self.answer, usage_metadata={"input_tokens": 3, "output_tokens": 5, "total_tokens": 8})]}
+        return SimpleNamespace(ainvoke=ainvoke)
+
+
+def registry_with(agent):
+    registry = SubAgentRegistry()
+    registry.register("Trends_Agent", agent, "Trends")
+    return registry
+
+
+def test_invoke_outside_a_graph_returns_the_answer(monkeypatch):
+    monkeypatch.setattr(agent_controller, "get_sub_agent_cache_ttl", lambda agent_code: 0)
+    text, result = asyncio.run(registry_with(FakeSubAgent("trend answer")).invoke("Trends_Agent", "query"))
+    assert text == "trend answer"
+    assert (result["input_tokens"], result["output_tokens"], result["timed_out"]) == (3, 5, False)
+
+
+def test_timeout_outside_a_graph_is_reported(monkeypatch):
+    monkeypatch.setattr(agent_controller, "get_sub_agent_cache_ttl", lambda agent_code: 0)
+    monkeypatch.setattr(agent_controller, "SUBAGENT_TIMEOUT_SECONDS", 0.01)
+    text, result = asyncio.run(registry_with(FakeSubAgent("late", delay=1)).invoke("Trends_Agent", "query"))
+    assert result["timed_out"] is True
+    assert "did not answer" in text
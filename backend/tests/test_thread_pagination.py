@@ -0,0 +1,92 @@
+import datetime
+import uuid
+
+import pytest
+
+from models.thread_models import MessageRow, ThreadRow
+from utils.threads_util import decode_thread_cursor, encode_thread_cursor, paginate_messages, read_threads_page
+
+THREAD_ID = str(uuid.uuid4())
+
+
+def message(order: int) -> MessageRow:
+    return MessageRow(order, THREAD_ID, None, None, "User", f"message {order}", 0, 0, 0, order, False, None, None, None)
+
+
+def thread_row(thread_id: str, cursor_date: str):
+    """Row of sp_GetUserThreads: the ThreadRow columns followed by CursorDate"""
+    activity = datetime.datetime(2026, 10, 18, 5, 22, 50, 123333)
+    return (thread_id, "user@example.com", "Title", None, True, 2, 10, activity, activity, activity, cursor_date)
+
+
+class FakeCursor:
+    def __init__(self, *result_sets):
+        self._result_sets = list(result_sets)
+
+    def fetchall(self):
+        return self._result_sets[0]
+
+    def nextset(self):
+        self._result_sets.pop(0)
+        return bool(self._result_sets)
+
+    def fetchone(self):
+        return self._result_sets[0][0] if self._result_sets[0] else None
+
+
+def test_thread_cursor_keeps_full_datetime2_precision():
+    token = encode_thread_cursor("2026-10-18 05:22:50.1233333", THREAD_ID)
+    assert decode_thread_cursor(token) == ("2026-10-18 05:22:50.1233333", THREAD_ID)
+
+
+def test_thread_cursor_accepts_iso_cursors_issued_before():
+    token = encode_thread_cursor("2026-10-18T05:22:50.123333", THREAD_ID)
+    assert decode_thread_cursor(token)[0] == "2026-10-18T05:22:50.123333"
+
+
+@pytest.mark.parametrize("token", [
+    "not base64!",
+    encode_thread_cursor("2026-10-18 05:22:50", "not-a-uuid"),
+    encode_thread_cursor("yesterday", THREAD_ID),
+    encode_thread_cursor("2026-10-18 05:22:50'; DROP TABLE x --", THREAD_ID)
+])
+def test_invalid_thread_cursor(token):
+    with pytest.raises(ValueError):
+        decode_thread_cursor(token)
+
+
+def test_full_threads_page_points_after_last_thread():
+    last_id = str(uuid.uuid4())
+    rows = [thread_row(str(uuid.uuid4()), "2026-10-18 05:22:51.0000000"), thread_row(last_id, "2026-10-18 05:22:50.1233333")]
+    page = read_threads_page(FakeCursor(rows, [(b"\x00" * 7 + b"\x01",)]), limit=2)
+
+    assert [thread.thread_id for thread in page["threads"]] == [rows[0][0], last_id]
+    assert all(isinstance(thread, ThreadRow) for thread in page["threads"])
+    assert decode_thread_cursor(page["next_cursor"]) == ("2026-10-18 05:22:50.1233333", last_id)
+    assert page["sync_token"] == "0000000000000001"
+
+
+def test_short_or_delta_threads_page_has_no_cursor():
+    rows = [thread_row(THREAD_ID, "2026-10-18 05:22:50.1233333")]
+    assert read_threads_page(FakeCursor(rows, []), limit=2)["next_cursor"] is None
+    assert read_threads_page(FakeCursor(rows, []), limit=1, is_delta=True)["next_cursor"] is None
+
+
+def test_paginate_backwards_drops_oldest_extra_message():
+    page = paginate_messages([message(order) for order in range(5, 9)], limit=3)
+    assert [row.message_order for row in page["messages"]] == [6, 7, 8]
+    assert page["has_more"] is True
+    assert page["next_cursor"] == 6
+
+
+def test_paginate_forwards_drops_newest_extra_message():
+    page = paginate_messages([message(order) for order in range(5, 9)], limit=3, after=4)
+    assert [row.message_order for row in page["messages"]] == [5, 6, 7]
+    assert page["has_more"] is True
+    assert page["next_cursor"] == 7
+
+
+def test_paginate_last_page():
+    page = paginate_messages([message(1), message(2)], limit=3)
+    assert page == {"messages": [message(1), message(2)], "has_more": False, "next_cursor": None}
+    assert paginate_messages([message(1)])["has_more"] is False
@@ -0,0 +1,37 @@
+from utils.write_behind import WriteBehindQueue
+
+
+def test_coalesces_per_key_and_counts_drops():
+    written = []
+    queue = WriteBehindQueue("test", written.extend, max_pending=2)
+    queue.add("a", 1)
+    queue.add("a", 2)
+    queue.add("b", 1)
+    queue.add("c", 1)
+
+    assert queue.flush() == 2
+    assert written == [("a", 2), ("b", 1)]
+    stats = queue.stats()
+    assert (stats["coalesced"], stats["dropped"], stats["flushed"], stats["pending"]) == (1, 1, 2, 0)
+
+
+def test_failed_flush_keeps_newer_updates():
+    def fail(rows):
+        raise Exception("database down")
+
+    queue = WriteBehindQueue("test", fail)
+    queue.add("a", 1)
+    assert queue.flush() == 0
+    queue.add("a", 2)
+
+    written = []
+    queue._flush_func = written.extend
+    queue.flush()
+    assert written == [("a", 2)]
+    assert queue.stats()["flush_failures"] == 1
+
+
+def test_saved_dates_are_ages_on_the_database_clock(monkeypatch):
+    import utils.user_util as user_util
+    monkeypatch.setattr(user_util.time, "time", lambda: 100.0)
+    assert user_util._ages_ms([("a", 98.5), ("b", 101.0)]) == [("a", 1500), ("b", 0)]
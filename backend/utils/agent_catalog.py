@@ -0,0 +1,186 @@
+import os
+import json
+import asyncio
+import hashlib
+import threading
+import dotenv
+dotenv.load_dotenv()
+
+from utils.database import get_read_db_connection, run_db
+from utils.logging_setup import logger
+
+# How often the catalog checks the agents tables for changes
+AGENT_CATALOG_REFRESH_SECONDS = float(os.getenv("AGENT_CATALOG_REFRESH_SECONDS", "60"))
+
+# Cheap fingerprint of the agents and their tags; the catalog reloads only when it changes.
+# The text columns are hashed since ModifiedDate is not maintained when e.g. only SystemPrompt is edited
+CATALOG_VERSION_QUERY = """
+    SELECT
+        (SELECT COUNT(*) FROM [dbo].[agents]) as AgentCount,
+        (SELECT CHECKSUM_AGG(CHECKSUM(
+            [AgentID], [Active], [ModifiedDate], [NumberOfUses],
+            HASHBYTES('SHA2_256', CONCAT([AgentCode], N'|', [AgentName], N'|', [Description], N'|', [Icon], N'|', [SystemPrompt]))
+        )) FROM [dbo].[agents]) as AgentsChecksum,
+        (SELECT COUNT(*) FROM [dbo].[agent_tags]) as TagCount,
+        (SELECT CHECKSUM_AGG(CHECKSUM([AgentID], [TagName])) FROM [dbo].[agent_tags]) as TagsChecksum
+"""
+
+# Tags shown per agent card; the rest are summarized as "+n"
+UI_MAX_TAGS = 3
+# Columns the agent library never needs
+UI_EXCLUDED_COLUMNS = ("SystemPrompt",)
+
+_lock = threading.Lock()
+_catalog = {
+    "version": None,
+    "agents": [],
+    "agents_by_code": {},
+    "prompts_by_code": {},
+    "ui_agents": [],
+    "ui_payload": b"[]",
+    "ui_etag": None
+}
+
+
+def _fetch_version(cursor):
+    cursor.execute(CATALOG_VERSION_QUERY)
+    row = cursor.fetchone()
+    return tuple(row) if row else None
+
+
+def _fetch_agents(cursor):
+    cursor.execute("EXEC sp_GetAgentsForUI")
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def _fetch_system_prompts(cursor):
+    """System prompts of every agent, including inactive ones that may still be attached to sessions"""
+    cursor.execute("SELECT [AgentCode], [SystemPrompt] FROM [dbo].[agents] WHERE [AgentCode] IS NOT NULL")
+    return {row[0]: row[1] or "" for row in cursor.fetchall()}
+
+
+def _split_tags(tags):
+    """Split the comma-separated tags of sp_GetAgentsForUI, keeping UI_MAX_TAGS and a "+n" for the rest"""
+    all_tags = [tag.strip() for tag in (tags or "").split(",") if tag.strip()]
+    if len(all_tags) <= UI_MAX_TAGS:
+        return all_tags
+    return all_tags[:UI_MAX_TAGS] + [f"+{len(all_tags) - UI_MAX_TAGS}"]
+
+
+def _build_ui_agent(agent: dict):
+    ui_agent = {}
+    for key, value in agent.items():
+        if key in UI_EXCLUDED_COLUMNS:
+            continue
+        # Convert datetime objects to strings for JSON serialization
+        ui_agent[key] = value.isoformat() if hasattr(value, "isoformat") else value
+    ui_agent["Tags"] = _split_tags(agent.get("Tags"))
+    return ui_agent
+
+
+def build_ui_payload(ui_agents):
+    """Serialize the agent library once per catalog load; returns (body, strong ETag)"""
+    payload = json.dumps(ui_agents, ensure_ascii=False).encode("utf-8")
+    return payload, f'"{hashlib.sha256(payload).hexdigest()[:32]}"'
+
+
+def load_agent_catalog():
+    """Load every active agent (including system prompts and tags) into memory"""
+    conn = get_read_db_connection()
+    try:
+        cursor = conn.cursor()
+        version = _fetch_version(cursor)
+        agents = _fetch_agents(cursor)
+        system_prompts = _fetch_system_prompts(cursor)
+    finally:
+        conn.close()
+
+    ui_agents = [_build_ui_agent(agent) for agent in agents]
+    ui_payload, ui_etag = build_ui_payload(ui_agents)
+    with _lock:
+        _catalog["version"] = version
+        _catalog["agents"] = agents
+        _catalog["agents_by_code"] = {agent["AgentCode"]: agent for agent in agents if agent.get("AgentCode")}
+        _catalog["prompts_by_code"] = system_prompts
+        _catalog["ui_agents"] = ui_agents
+        _catalog["ui_payload"] = ui_payload
+        _catalog["ui_etag"] = ui_etag
+
+    logger.info(f"Agent catalog loaded with {len(agents)} agents")
+
+
+def refresh_agent_catalog() -> bool:
+    """Reload the catalog when the agents or their tags changed; returns True if it was reloaded"""
+    conn = get_read_db_connection()
+    try:
+        version = _fetch_version(conn.cursor())
+    finally:
+        conn.close()
+
+    with _lock:
+        if version == _catalog["version"]:
+            return False
+
+    load_agent_catalog()
+    return True
+
+
+def is_agent_catalog_loaded() -> bool:
+    with _lock:
+        return _catalog["version"] is not None
+
+
+def get_catalog_agents():
+    """Return the active agents as loaded from sp_GetAgentsForUI"""
+    with _lock:
+        return _catalog["agents"]
+
+
+def get_agent_library():
+    """Return (JSON body, ETag) of the agent library as served by /api/agents/list"""
+    with _lock:
+        return _catalog["ui_payload"], _catalog["ui_etag"]
+
+
+def get_agent_library_agents():
+    """Return the agent library entries (as in /api/agents/list) and their ETag"""
+    with _lock:
+        return _catalog["ui_agents"], _catalog["ui_etag"]
+
+
+def get_catalog_agent(agent_code: str):
+    """Return the catalog entry of an agent by code, or None"""
+    with _lock:
+        return _catalog["agents_by_code"].get(agent_code)
+
+
+def get_agent_system_prompt(agent_code: str) -> str:
+    """
+    System prompt of an agent, shared by every session instead of being joined per session.
+    Never touches the database: callers on the event loop load the catalog first with
+    run_db(load_agent_catalog) (see ensure_agent_catalog_loaded); until then the prompt is empty.
+    """
+    with _lock:
+        loaded = _catalog["version"] is not None
+        system_prompt = _catalog["prompts_by_code"].get(agent_code)
+    if not loaded:
+        logger.warning(f"Agent catalog not loaded, no system prompt for {agent_code}")
+    return system_prompt or ""
+
+
+async def ensure_agent_catalog_loaded():
+    """Load the catalog off the event loop when the startup load failed (e.g. database unavailable)"""
+    if not is_agent_catalog_loaded():
+        await run_db(load_agent_catalog)
+
+
+async def run_agent_catalog_refresher():
+    """Background task started by the app lifespan; checks the catalog version every AGENT_CATALOG_REFRESH_SECONDS"""
+    while True:
+        await asyncio.sleep(AGENT_CATALOG_REFRESH_SECONDS)
+        try:
+            if await run_db(refresh_agent_catalog):
+                logger.info("Agent catalog refreshed")
+        except Exception as e:
+            logger.error(f"Error refreshing agent catalog: {e}")
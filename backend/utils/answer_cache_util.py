@@ -0,0 +1,147 @@
+import os
+import re
+import threading
+import zlib
+import dotenv
+dotenv.load_dotenv()
+
+from utils.cache_util import LRUCache
+
+# Whole-answer cache in front of the agent controller
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_SIZE = int(os.getenv("ANSWER_CACHE_SIZE", "1024"))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "21600"))
+# Estimated Jaccard similarity above which a differently worded query reuses a cached answer (0 disables)
+ANSWER_CACHE_SIMILARITY = float(os.getenv("ANSWER_CACHE_SIMILARITY", "0.9"))
+
+MINHASH_PERMUTATIONS = 64
+SHINGLE_SIZE = 4
+# Filler words ignored by the similarity check ("what is the performance of X" ~ "performance of X")
+STOPWORDS = frozenset({
+    "a", "an", "the", "of", "in", "on", "for", "to", "and", "or", "is", "are", "was", "were",
+    "what", "whats", "how", "can", "could", "you", "me", "please", "tell", "show", "give", "about"
+})
+
+_answer_cache = LRUCache(maxsize=ANSWER_CACHE_SIZE, ttl=ANSWER_CACHE_TTL_SECONDS, name="answer")
+# Normalized queries cached per controller key, scanned for near-duplicates on an exact miss
+_similarity_index = {}
+_lock = threading.Lock()
+_stats = {
+    "exact_hits": 0,
+    "similar_hits": 0,
+    "misses": 0,
+    "bypassed": 0,
+    "input_tokens_saved": 0,
+    "output_tokens_saved": 0
+}
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace so trivial rewordings share a key"""
+    query = re.sub(r"[^\w\s]", " ", query.lower())
+    return " ".join(query.split())
+
+
+def get_minhash_signature(normalized_query: str):
+    """MinHash signature over character shingles of the content words of a normalized query"""
+    text = " ".join(word for word in normalized_query.split() if word not in STOPWORDS) or normalized_query
+    text = text if len(text) >= SHINGLE_SIZE else text.ljust(SHINGLE_SIZE)
+    shingles = {text[i:i + SHINGLE_SIZE].encode("utf-8") for i in range(len(text) - SHINGLE_SIZE + 1)}
+    return tuple(
+        min(zlib.crc32(shingle, seed) for shingle in shingles)
+        for seed in range(MINHASH_PERMUTATIONS)
+    )
+
+
+def estimate_similarity(signature_a, signature_b) -> float:
+    matches = sum(1 for a, b in zip(signature_a, signature_b) if a == b)
+    return matches / MINHASH_PERMUTATIONS
+
+
+def _record(name: str, value: int = 1):
+    with _lock:
+        _stats[name] += value
+
+
+def get_cached_answer(controller_key, query: str):
+    """
+    Return the cached answer for a query asked to the same controller (agent set + prompt versions),
+    or None. Exact normalized matches are tried first, then near-duplicates by MinHash similarity.
+    """
+    if not ANSWER_CACHE_ENABLED:
+        return None
+
+    normalized_query = normalize_query(query)
+    entry = _answer_cache.get((controller_key, normalized_query))
+    if entry is not None:
+        _record("exact_hits")
+        return entry
+
+    if ANSWER_CACHE_SIMILARITY > 0:
+        signature = get_minhash_signature(normalized_query)
+        with _lock:
+            candidates = list(_similarity_index.get(controller_key, {}).items())
+
+        best_query, best_similarity = None, 0.0
+        for cached_query, cached_signature in candidates:
+            similarity = estimate_similarity(signature, cached_signature)
+            if similarity > best_similarity:
+                best_query, best_similarity = cached_query, similarity
+
+        if best_query is not None and best_similarity >= ANSWER_CACHE_SIMILARITY:
+            entry = _answer_cache.get((controller_key, best_query))
+            if entry is not None:
+                _record("similar_hits")
+                return entry
+            _forget(controller_key, best_query)
+
+    _record("misses")
+    return None
+
+
+def set_cached_answer(controller_key, query: str, messages, input_tokens: int, output_tokens: int):
+    """
+    Cache the answer of one turn.
+    messages are the SSE "message" events of the turn (agent_code, content, tokens) in the order they were sent.
+    """
+    if not ANSWER_CACHE_ENABLED or not messages:
+        return
+
+    normalized_query = normalize_query(query)
+    _answer_cache.set((controller_key, normalized_query), {
+        "messages": messages,
+        "input_tokens": input_tokens,
+        "output_tokens": output_tokens
+    })
+
+    if ANSWER_CACHE_SIMILARITY > 0:
+        signature = get_minhash_signature(normalized_query)
+        with _lock:
+            bucket = _similarity_index.setdefault(controller_key, {})
+            bucket[normalized_query] = signature
+            # Drop index entries whose answers were evicted or expired
+            if len(bucket) > ANSWER_CACHE_SIZE:
+                for cached_query in [q for q in bucket if (controller_key, q) not in _answer_cache]:
+                    del bucket[cached_query]
+
+
+def record_answer_cache_bypass():
+    _record("bypassed")
+
+
+def record_tokens_saved(input_tokens: int, output_tokens: int):
+    _record("input_tokens_saved", input_tokens)
+    _record("output_tokens_saved", output_tokens)
+
+
+def _forget(controller_key, normalized_query: str):
+    with _lock:
+        _similarity_index.get(controller_key, {}).pop(normalized_query, None)
+
+
+def get_answer_cache_stats():
+    """Return hit/miss counters and tokens saved by the answer cache"""
+    with _lock:
+        stats = dict(_stats)
+    stats["cache"] = _answer_cache.stats()
+    return stats
@@ -0,0 +1,73 @@
+from utils.database import get_db_connection
+from models.user_session import UserSession
+from utils.logging_setup import logger
+from utils.user_util import read_user_session, cache_session
+from utils.threads_util import read_threads_page, read_message_row, paginate_messages
+from utils.common_funtions import is_valid_uuid
+
+
+def load_bootstrap(user_email: str, current_thread_id: str = None, thread_limit: int = 50, message_limit: int = None):
+    """
+    Load the user, session, first page of threads and the current thread's latest messages
+    in one round trip using stored procedure sp_GetBootstrap.
+    Returns (user, user_session, threads_page, current_thread); current_thread is None when the
+    user has no threads, otherwise a dict with thread_id, thread_title, thread_icon and the messages page.
+    """
+    conn = None
+    cursor = None
+    
+    try:
+        if current_thread_id and not is_valid_uuid(current_thread_id):
+            current_thread_id = None
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            EXEC [dbo].[sp_GetBootstrap] 
+                @UserEmail = ?, 
+                @CurrentThreadID = ?, 
+                @ThreadLimit = ?,
+                @MessageLimit = ?;
+        """, user_email, current_thread_id, thread_limit, message_limit + 1 if message_limit else None)
+        
+        user_row = cursor.fetchone()
+        user = {
+            "email": user_row[0],
+            "created_date": user_row[1],
+            "last_login_date": user_row[2]
+        } if user_row else None
+        
+        cursor.nextset()
+        user_session = read_user_session(cursor, UserSession(user_email))
+        
+        cursor.nextset()
+        threads_page = read_threads_page(cursor, thread_limit)
+        
+        cursor.nextset()
+        thread_row = cursor.fetchone()
+        current_thread = None
+        if thread_row:
+            cursor.nextset()
+            # Fetched with message_limit + 1 to know whether older messages exist
+            messages = [read_message_row(row) for row in cursor.fetchall()]
+            current_thread = {
+                "thread_id": str(thread_row[0]),
+                "thread_title": thread_row[1],
+                "thread_icon": thread_row[2],
+                **paginate_messages(messages, message_limit)
+            }
+        
+        conn.commit()
+        cache_session(user_session)
+        
+        return user, user_session, threads_page, current_thread
+      
+    except Exception as e:
+        logger.error(f"Error loading bootstrap data: {str(e)}")
+        raise Exception(f"Failed to load bootstrap data: {str(e)}")
+      
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
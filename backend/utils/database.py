@@ -1,23 +1,493 @@
 import pyodbc
 import os
+import asyncio
+import contextlib
+import functools
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from utils.cache_util import LRUCache
+from utils.db_resilience import call_with_retry
 from utils.logging_setup import logger
 
 # Load environment variables
 load_dotenv()
 
-def get_db_connection():
-    """Get database connection"""
+# Connection pool settings
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "2"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+DB_POOL_ACQUIRE_TIMEOUT = float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10"))
+DB_POOL_MAX_LIFETIME = float(os.getenv("DB_POOL_MAX_LIFETIME", "1800"))
+# Connections idle for longer than this are validated with SELECT 1 before being handed out.
+# A connection dropped within the window (e.g. by a failover) fails on first use with a transient error;
+# once such a broken connection is returned, every idle connection is validated before its next checkout.
+DB_POOL_HEALTH_CHECK_IDLE = float(os.getenv("DB_POOL_HEALTH_CHECK_IDLE", "10"))
+# Threads running blocking database helpers for async routes (see run_db); defaults to the pool size
+# so a worker never waits on the pool while holding a thread
+DB_EXECUTOR_WORKERS = int(os.getenv("DB_EXECUTOR_WORKERS", str(DB_POOL_MAX_SIZE)))
+
+# Optional read replica (connected with ApplicationIntent=ReadOnly); reads use the primary when unset
+READ_SERVER = os.getenv("READ_SERVER")
+READ_DATABASE = os.getenv("READ_DATABASE")
+DB_READ_POOL_MAX_SIZE = int(os.getenv("DB_READ_POOL_MAX_SIZE", str(DB_POOL_MAX_SIZE)))
+# Reads about a user or thread written to within this window go to the primary (read-your-writes)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "30"))
+# Reads fall back to the primary while the replica lags more than this
+READ_REPLICA_MAX_LAG_SECONDS = float(os.getenv("READ_REPLICA_MAX_LAG_SECONDS", "10"))
+READ_REPLICA_LAG_CHECK_SECONDS = float(os.getenv("READ_REPLICA_LAG_CHECK_SECONDS", "15"))
+# After a failed replica checkout, reads use the primary for this long before trying the replica again
+READ_REPLICA_RETRY_SECONDS = float(os.getenv("READ_REPLICA_RETRY_SECONDS", "30"))
+
+
+class DatabasePoolTimeout(Exception):
+    """Raised when no pooled connection becomes available within the acquire timeout"""
+
+
+def get_connection_string(read_only: bool = False):
+    server = os.getenv('SERVER')
+    database = os.getenv('DATABASE')
+    application_intent = ""
+    if read_only:
+        server = READ_SERVER or server
+        database = READ_DATABASE or database
+        application_intent = "ApplicationIntent=ReadOnly;"
+    return (
+        f"DRIVER={{ODBC Driver 17 for SQL Server}};"
+        f"SERVER={server};"
+        f"DATABASE={database};"
+        f"UID={os.getenv('USERID')};"
+        f"PWD={os.getenv('PASSWORD')};"
+        f"TrustServerCertificate=yes;"
+        f"{application_intent}"
+    )
+
+
+class PooledConnection:
+    """
+    pyodbc connection checked out of a ConnectionPool.
+    Behaves like the raw connection; close() hands it back to the pool instead of logging out.
+    A checked-out wrapper that is garbage collected without close() returns its slot through a finalizer.
+    """
+
+    def __init__(self, pool, connection, created_at: float, generation: int = 0):
+        self._pool = pool
+        self._connection = connection
+        self._finalizer = None
+        self.created_at = created_at
+        # Pool generation the connection was opened in; connections of an older one are closed on return
+        self.generation = generation
+        self.last_used = time.monotonic()
+        self.closed = False
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._finalizer is not None:
+            self._finalizer.detach()
+        self._pool.release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-safe pool of pyodbc connections.
+    Connections are validated on checkout when they sat idle, recycled after max_lifetime,
+    and rolled back on return so no transaction leaks into the next borrower.
+    """
+
+    def __init__(self, connect, min_size: int = DB_POOL_MIN_SIZE, max_size: int = DB_POOL_MAX_SIZE,
+                 acquire_timeout: float = DB_POOL_ACQUIRE_TIMEOUT, max_lifetime: float = DB_POOL_MAX_LIFETIME,
+                 health_check_idle: float = DB_POOL_HEALTH_CHECK_IDLE, name: str = "primary"):
+        self.name = name
+        self._connect = connect
+        self.min_size = max(0, min_size)
+        self.max_size = max(1, max_size)
+        self.acquire_timeout = acquire_timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+        self._idle = deque()
+        self._size = 0
+        self._generation = 0
+        self._condition = threading.Condition()
+        self._metrics = {
+            "checkouts": 0,
+            "waits": 0,
+            "wait_time_ms": 0.0,
+            "timeouts": 0,
+            "created": 0,
+            "discarded": 0,
+            "reclaimed": 0
+        }
+
+    def _open(self):
+        connection = self._connect()
+        self._metrics["created"] += 1
+        return PooledConnection(self, connection, time.monotonic(), self._generation)
+
+    def _discard(self, pooled: PooledConnection):
+        self._metrics["discarded"] += 1
+        try:
+            pooled._connection.close()
+        except Exception:
+            pass
+
+    def _is_usable(self, pooled: PooledConnection) -> bool:
+        now = time.monotonic()
+        if self.max_lifetime and now - pooled.created_at > self.max_lifetime:
+            return False
+        if now - pooled.last_used > self.health_check_idle:
+            try:
+                cursor = pooled._connection.cursor()
+                cursor.execute("SELECT 1")
+                cursor.fetchone()
+                cursor.close()
+            except Exception as e:
+                logger.warning(f"Discarding broken pooled connection: {e}")
+                return False
+        return True
+
+    def acquire(self, timeout: float = None) -> PooledConnection:
+        """Check out a connection, waiting up to timeout seconds when the pool is exhausted"""
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        waited = False
+        started = time.monotonic()
+
+        while True:
+            with self._condition:
+                while not self._idle and self._size >= self.max_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._metrics["timeouts"] += 1
+                        raise DatabasePoolTimeout(
+                            f"No database connection available within {timeout}s (pool size {self.max_size})"
+                        )
+                    waited = True
+                    self._condition.wait(remaining)
+
+                pooled = self._idle.pop() if self._idle else None
+                if pooled is None:
+                    # Reserve the slot before connecting outside the lock
+                    self._size += 1
+
+            if pooled is None:
+                try:
+                    pooled = self._open()
+                except Exception:
+                    with self._condition:
+                        self._size -= 1
+                        self._condition.notify()
+                    raise
+            elif not self._is_usable(pooled):
+                self._discard(pooled)
+                with self._condition:
+                    self._size -= 1
+                    self._condition.notify()
+                continue
+
+            with self._condition:
+                self._metrics["checkouts"] += 1
+                if waited:
+                    self._metrics["waits"] += 1
+                    self._metrics["wait_time_ms"] += (time.monotonic() - started) * 1000
+            # Hand out a fresh wrapper so a stale reference closed twice can never release it again
+            checked_out = PooledConnection(self, pooled._connection, pooled.created_at, pooled.generation)
+            checked_out._finalizer = weakref.finalize(
+                checked_out, self._reclaim, pooled._connection, pooled.created_at, pooled.generation
+            )
+            return checked_out
+
+    def _reclaim(self, connection, created_at: float, generation: int):
+        """Return the connection of a wrapper that was garbage collected without close()"""
+        with self._condition:
+            self._metrics["reclaimed"] += 1
+        logger.warning(f"Pooled {self.name} connection was not closed, returning it to the pool")
+        self.release(PooledConnection(self, connection, created_at, generation))
+
+    def release(self, pooled: PooledConnection):
+        """
+        Return a connection to the pool, discarding it if it cannot be reset, outlived max_lifetime
+        or was checked out before close_all.
+        """
+        reusable = True
+        broken = False
+        try:
+            pooled._connection.rollback()
+        except Exception:
+            reusable = False
+            broken = True
+
+        if reusable and self.max_lifetime and time.monotonic() - pooled.created_at > self.max_lifetime:
+            reusable = False
+
+        with self._condition:
+            if pooled.generation != self._generation:
+                reusable = False
+            if broken:
+                # The server likely dropped its peers too (failover): validate them before reuse
+                for idle in self._idle:
+                    idle.last_used = float("-inf")
+            if reusable:
+                pooled.last_used = time.monotonic()
+                self._idle.append(pooled)
+            else:
+                self._size -= 1
+            self._condition.notify()
+
+        if not reusable:
+            self._discard(pooled)
+
+    def warm_up(self):
+        """Open connections until min_size are idle, used at application startup"""
+        while True:
+            with self._condition:
+                if self._size >= self.min_size:
+                    return
+                self._size += 1
+            try:
+                pooled = self._open()
+            except Exception:
+                with self._condition:
+                    self._size -= 1
+                raise
+            with self._condition:
+                self._idle.append(pooled)
+                self._condition.notify()
+
+    def close_all(self):
+        """
+        Close every idle connection, used on application shutdown.
+        Connections checked out at that moment are closed when they are returned.
+        """
+        with self._condition:
+            self._generation += 1
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+        for pooled in idle:
+            self._discard(pooled)
+
+    def stats(self):
+        """Return pool size, connections in use and wait counters"""
+        with self._condition:
+            return {
+                "name": self.name,
+                "size": self._size,
+                "in_use": self._size - len(self._idle),
+                "idle": len(self._idle),
+                "max_size": self.max_size,
+                **self._metrics,
+                "wait_time_ms": round(self._metrics["wait_time_ms"], 1)
+            }
+
+
+class ReadRouter:
+    """
+    Routes read-only helpers to the replica pool and everything else to the primary.
+    Reads go to the primary instead when no replica is configured, when the replica lags more than
+    max_lag seconds or recently failed to connect, or when one of the read's keys (user email,
+    thread id) was written to within read_your_writes seconds (see mark_recent_write).
+    """
+
+    def __init__(self, primary: ConnectionPool, replica: ConnectionPool = None,
+                 read_your_writes: float = READ_YOUR_WRITES_SECONDS, max_lag: float = READ_REPLICA_MAX_LAG_SECONDS,
+                 retry_after: float = READ_REPLICA_RETRY_SECONDS):
+        self.primary = primary
+        self.replica = replica
+        self.max_lag = max_lag
+        self.retry_after = retry_after
+        self.replica_lag = None
+        self._replica_down_until = 0.0
+        self._recent_writes = LRUCache(maxsize=10000, ttl=read_your_writes, name="recent_writes")
+        self._lock = threading.Lock()
+        self._metrics = {
+            "replica_reads": 0,
+            "primary_reads": 0,
+            "read_your_writes": 0,
+            "fallbacks": 0
+        }
+
+    def _count(self, name: str):
+        with self._lock:
+            self._metrics[name] += 1
+
+    def mark_write(self, *keys):
+        for key in keys:
+            if key:
+                self._recent_writes.set(str(key).lower(), True)
+
+    def replica_available(self) -> bool:
+        if self.replica is None or time.monotonic() < self._replica_down_until:
+            return False
+        return self.replica_lag is None or self.replica_lag <= self.max_lag
+
+    def acquire_read(self, *keys) -> PooledConnection:
+        if not self.replica_available():
+            self._count("primary_reads")
+            return self.primary.acquire()
+
+        if any(key and str(key).lower() in self._recent_writes for key in keys):
+            self._count("read_your_writes")
+            return self.primary.acquire()
+
+        try:
+            connection = self.replica.acquire()
+            self._count("replica_reads")
+            return connection
+        except Exception as e:
+            logger.warning(f"Read replica unavailable, reading from primary for {self.retry_after}s: {e}")
+            self._replica_down_until = time.monotonic() + self.retry_after
+            self._count("fallbacks")
+            return self.primary.acquire()
+
+    def check_replica_lag(self):
+        """Read the replica lag reported by the primary; unknown lag (no permission, no replicas) keeps the replica in use"""
+        if self.replica is None:
+            return None
+        conn = self.primary.acquire()
+        try:
+            cursor = conn.cursor()
+            cursor.execute("SELECT MAX([secondary_lag_seconds]) FROM sys.dm_database_replica_states WHERE [is_local] = 0")
+            row = cursor.fetchone()
+            self.replica_lag = row[0] if row else None
+        except Exception as e:
+            logger.warning(f"Could not read replica lag: {e}")
+            self.replica_lag = None
+        finally:
+            conn.close()
+        if self.replica_lag is not None and self.replica_lag > self.max_lag:
+            logger.warning(f"Read replica lags {self.replica_lag}s, reading from primary")
+        return self.replica_lag
+
+    def stats(self):
+        with self._lock:
+            return {"replica_lag": self.replica_lag, "replica_available": self.replica_available(), **self._metrics}
+
+
+def _connect():
     try:
-        connection_string = (
-            f"DRIVER={{ODBC Driver 17 for SQL Server}};"
-            f"SERVER={os.getenv('SERVER')};"
-            f"DATABASE={os.getenv('DATABASE')};"
-            f"UID={os.getenv('USERID')};"
-            f"PWD={os.getenv('PASSWORD')};"
-            f"TrustServerCertificate=yes;"
-        )
-        return pyodbc.connect(connection_string)
+        return pyodbc.connect(get_connection_string())
     except Exception as e:
         logger.error(f"Database connection error: {e}")
-        raise
\ No newline at end of file
+        raise
+
+
+def _connect_read():
+    try:
+        return pyodbc.connect(get_connection_string(read_only=True))
+    except Exception as e:
+        logger.error(f"Read replica connection error: {e}")
+        raise
+
+
+db_pool = ConnectionPool(_connect)
+read_db_pool = ConnectionPool(_connect_read, max_size=DB_READ_POOL_MAX_SIZE, name="replica") if READ_SERVER else None
+read_router = ReadRouter(db_pool, read_db_pool)
+
+
+def get_db_connection():
+    """Get a pooled database connection; close() returns it to the pool"""
+    return db_pool.acquire()
+
+
+def get_read_db_connection(*keys):
+    """
+    Get a pooled connection for a read-only query, from the read replica when possible.
+    keys (user email, thread id) identify what is read, so data written moments ago is read from the primary.
+    """
+    return read_router.acquire_read(*keys)
+
+
+def mark_recent_write(*keys):
+    """Record a write to a user or thread so that following reads of it use the primary"""
+    read_router.mark_write(*keys)
+
+
+@contextlib.contextmanager
+def db_connection():
+    """Context manager around get_db_connection that always returns the connection to the pool"""
+    conn = get_db_connection()
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+@contextlib.contextmanager
+def read_db_connection(*keys):
+    """Context manager around get_read_db_connection that always returns the connection to the pool"""
+    conn = get_read_db_connection(*keys)
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def get_db_pool_stats():
+    return {
+        "pools": [pool.stats() for pool in (db_pool, read_db_pool) if pool is not None],
+        "routing": read_router.stats()
+    }
+
+
+def warm_up_pools():
+    """Open the minimum number of connections of every pool, used at application startup"""
+    db_pool.warm_up()
+    if read_db_pool is not None:
+        read_db_pool.warm_up()
+
+
+def close_pools():
+    db_pool.close_all()
+    if read_db_pool is not None:
+        read_db_pool.close_all()
+
+
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_WORKERS, thread_name_prefix="db")
+
+
+async def run_db(func, *args, **kwargs):
+    """
+    Await a blocking database helper from async code.
+    The call runs on a dedicated executor sized to the connection pool, so slow queries never
+    block the event loop and never starve the default executor used by other to_thread work.
+    Transient SQL Server errors are retried and the circuit breaker fails calls fast while the
+    database is down (see utils.db_resilience).
+    Only for reads and writes that are safe to apply twice; other writes go through run_db_once.
+    """
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await call_with_retry(lambda: loop.run_in_executor(_db_executor, call), retry=True)
+
+
+async def run_db_once(func, *args, **kwargs):
+    """Like run_db but without retries, for writes that must not be applied twice"""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(func, *args, **kwargs)
+    return await call_with_retry(lambda: loop.run_in_executor(_db_executor, call))
+
+
+def shutdown_db_executor():
+    _db_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def run_replica_lag_monitor():
+    """Background task started by the app lifespan when a read replica is configured"""
+    while True:
+        try:
+            await run_db(read_router.check_replica_lag)
+        except Exception as e:
+            logger.error(f"Error checking read replica lag: {e}")
+        await asyncio.sleep(READ_REPLICA_LAG_CHECK_SECONDS)
@@ -0,0 +1,191 @@
+"""
+Fault injection for the data layer: a stand-in pyodbc connection that raises scripted SQL Server
+errors, to exercise the retry policy, circuit breaker and degraded mode without a real outage.
+
+Plug FaultInjector.connect into a ConnectionPool (or swap it into the app's pool with inject_faults),
+or run the built-in scenarios with: python -m utils.db_fault_injection
+"""
+import asyncio
+import contextlib
+import threading
+
+import pyodbc
+
+from utils.database import ConnectionPool
+from utils.db_resilience import CircuitBreaker, DatabaseUnavailable, call_with_retry
+
+# Messages of the errors Azure SQL raises during throttling and failover, by native error code
+TRANSIENT_ERRORS = {
+    40613: ("08S01", "Database is not currently available. Please retry the connection later."),
+    40501: ("42000", "The service is currently busy. Retry the request after 10 seconds."),
+    40197: ("08S01", "The service has encountered an error processing your request. Please try again."),
+    10928: ("42000", "Resource ID : 1. The request limit for the database is 60 and has been reached."),
+    10929: ("42000", "Resource ID : 1. The min guarantee is 0, max limit is 60 and the current usage is 60."),
+    49918: ("42000", "Cannot process request. Not enough resources to process request."),
+    4060: ("42000", "Cannot open database requested by the login. The login failed."),
+    233: ("08S01", "A connection was successfully established with the server, but then an error occurred."),
+    10053: ("08S01", "TCP Provider: An established connection was aborted by the software in your host machine."),
+    10054: ("08S01", "TCP Provider: An existing connection was forcibly closed by the remote host."),
+    10060: ("08001", "TCP Provider: A connection attempt failed because the connected party did not properly respond."),
+    1205: ("40001", "Transaction was deadlocked on lock resources with another process and has been chosen as the deadlock victim.")
+}
+
+
+def transient_error(code: int = 40613) -> pyodbc.Error:
+    """pyodbc error as raised by the ODBC driver for one of TRANSIENT_ERRORS"""
+    sqlstate, message = TRANSIENT_ERRORS[code]
+    return pyodbc.OperationalError(
+        sqlstate,
+        f"[{sqlstate}] [Microsoft][ODBC Driver 17 for SQL Server][SQL Server]{message} ({code}) (SQLExecDirectW)"
+    )
+
+
+def fatal_error() -> pyodbc.Error:
+    """Non-retryable error (invalid object name)"""
+    return pyodbc.ProgrammingError(
+        "42S02",
+        "[42S02] [Microsoft][ODBC Driver 17 for SQL Server][SQL Server]Invalid object name 'dbo.missing'. (208) (SQLExecDirectW)"
+    )
+
+
+class FaultInjector:
+    """
+    Scripted faults for connect() and cursor.execute().
+    Each call takes the next entry of its script: None succeeds, an exception is raised.
+    Once a script is used up, calls succeed (or keep failing with `fail_always`, to simulate an outage).
+    Successful executes return `rows` from fetchone/fetchall.
+    """
+
+    def __init__(self, connect_faults=None, execute_faults=None, rows=None, fail_always: Exception = None):
+        self.connect_faults = list(connect_faults or [])
+        self.execute_faults = list(execute_faults or [])
+        self.rows = rows if rows is not None else [(1,)]
+        self.fail_always = fail_always
+        self._lock = threading.Lock()
+        self.stats = {"connects": 0, "executes": 0, "faults": 0}
+
+    def _next_fault(self, script: list, counter: str):
+        with self._lock:
+            self.stats[counter] += 1
+            fault = script.pop(0) if script else self.fail_always
+            if fault is not None:
+                self.stats["faults"] += 1
+            return fault
+
+    def connect(self):
+        """Stand-in for pyodbc.connect, usable as the connect function of a ConnectionPool"""
+        fault = self._next_fault(self.connect_faults, "connects")
+        if fault is not None:
+            raise fault
+        return FakeConnection(self)
+
+    def execute(self):
+        fault = self._next_fault(self.execute_faults, "executes")
+        if fault is not None:
+            raise fault
+
+
+class FakeCursor:
+    def __init__(self, injector: FaultInjector):
+        self._injector = injector
+        self._rows = []
+        self.description = None
+
+    def execute(self, sql, *params):
+        self._injector.execute()
+        self._rows = list(self._injector.rows)
+        self.description = [("column",)]
+        return self
+
+    def fetchone(self):
+        return self._rows.pop(0) if self._rows else None
+
+    def fetchall(self):
+        rows, self._rows = self._rows, []
+        return rows
+
+    def nextset(self):
+        self._rows = []
+        self.description = None
+        return False
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, injector: FaultInjector):
+        self._injector = injector
+
+    def cursor(self):
+        return FakeCursor(self._injector)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+@contextlib.contextmanager
+def inject_faults(pool: ConnectionPool, injector: FaultInjector):
+    """Make pool open its connections from injector (e.g. the app's db_pool during a manual drill)"""
+    original_connect = pool._connect
+    pool.close_all()
+    pool._connect = injector.connect
+    try:
+        yield injector
+    finally:
+        pool.close_all()
+        pool._connect = original_connect
+
+
+def _query(pool: ConnectionPool):
+    conn = pool.acquire()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1")
+        return cursor.fetchone()
+    finally:
+        conn.close()
+
+
+async def _run(pool: ConnectionPool, breaker: CircuitBreaker, **options):
+    try:
+        result = await call_with_retry(lambda: asyncio.to_thread(_query, pool), retry=True, breaker=breaker, **options)
+        return f"ok {result}"
+    except DatabaseUnavailable as e:
+        return f"503 (Retry-After {e.headers['Retry-After']})"
+    except Exception as e:
+        return f"failed {type(e).__name__}"
+
+
+async def run_scenarios():
+    """Print how the data layer reacts to failover, fatal errors and an outage"""
+    pool = ConnectionPool(FaultInjector().connect, min_size=0, max_size=2, health_check_idle=0, name="fault_injection")
+
+    with inject_faults(pool, FaultInjector(execute_faults=[transient_error(40613), transient_error(10054)])) as injector:
+        outcome = await _run(pool, CircuitBreaker(name="failover"))
+        print(f"{'failover, two transient errors':<32} {outcome}, {injector.stats}")
+
+    with inject_faults(pool, FaultInjector(execute_faults=[fatal_error()])) as injector:
+        outcome = await _run(pool, CircuitBreaker(name="fatal"))
+        print(f"{'fatal error, not retried':<32} {outcome}, {injector.stats}")
+
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.5, name="outage")
+    with inject_faults(pool, FaultInjector(fail_always=transient_error(40501))) as injector:
+        for call in range(4):
+            outcome = await _run(pool, breaker, max_attempts=2)
+            print(f"{f'outage, call {call + 1}':<32} {outcome}, breaker {breaker.state}, {injector.stats}")
+
+    await asyncio.sleep(breaker.reset_timeout)
+    with inject_faults(pool, FaultInjector()) as injector:
+        outcome = await _run(pool, breaker)
+        print(f"{'recovered, probe call':<32} {outcome}, breaker {breaker.state}, {injector.stats}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run_scenarios())
@@ -0,0 +1,275 @@
+import os
+import re
+import math
+import random
+import asyncio
+import threading
+import time
+import dotenv
+dotenv.load_dotenv()
+
+import pyodbc
+from fastapi import HTTPException
+
+from utils.logging_setup import logger
+
+# Retries of transient SQL Server errors (throttling, failover, dropped connections)
+DB_RETRY_MAX_ATTEMPTS = int(os.getenv("DB_RETRY_MAX_ATTEMPTS", "4"))
+DB_RETRY_BASE_DELAY = float(os.getenv("DB_RETRY_BASE_DELAY", "0.2"))
+DB_RETRY_MAX_DELAY = float(os.getenv("DB_RETRY_MAX_DELAY", "5"))
+# No retry is started once a call has been running for this long
+DB_RETRY_DEADLINE_SECONDS = float(os.getenv("DB_RETRY_DEADLINE_SECONDS", "15"))
+# Consecutive failed calls that open the circuit, and how long it stays open before a probe call
+DB_BREAKER_FAILURE_THRESHOLD = int(os.getenv("DB_BREAKER_FAILURE_THRESHOLD", "5"))
+DB_BREAKER_RESET_SECONDS = float(os.getenv("DB_BREAKER_RESET_SECONDS", "30"))
+# Serve cached agent catalog and session data while the database is unavailable
+DB_DEGRADED_MODE = os.getenv("DB_DEGRADED_MODE", "false").lower() == "true"
+
+# Connection failure, client unable to establish connection, timeout expired, deadlock victim
+TRANSIENT_SQLSTATES = frozenset({"08S01", "08001", "HYT00", "40001"})
+TRANSIENT_ERROR_CODES = frozenset({
+    40613,  # Database not currently available (failover / reconfiguration)
+    40501,  # Service is busy (throttling)
+    40197,  # Service error processing the request (upgrade / failover)
+    10928,  # Resource limit reached
+    10929,  # Resource minimum guarantee not available
+    49918,  # Not enough resources to process the request
+    4060,   # Cannot open database requested by the login
+    233,    # Connection initialization error
+    10053,  # Connection aborted by the host
+    10054,  # Connection reset by the peer
+    10060,  # Connection attempt timed out
+    1205    # Deadlock victim
+})
+
+# Native error codes appear in pyodbc messages as "... (40613) (SQLDriverConnect)"
+_ERROR_CODE_PATTERN = re.compile(r"\((\d+)\)\s*\(SQL\w+\)")
+_SQLSTATE_PATTERN = re.compile(r"\[([0-9A-Z]{5})\]")
+
+
+class DatabaseUnavailable(HTTPException):
+    """
+    Raised instead of calling the database while the circuit is open, or when transient errors
+    outlasted the retries. Routes let HTTPExceptions through, so clients get a 503 with Retry-After.
+    """
+
+    def __init__(self, detail: str = "Database temporarily unavailable", retry_after: float = DB_BREAKER_RESET_SECONDS):
+        super().__init__(
+            status_code=503,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))}
+        )
+
+
+def _error_chain(error):
+    """The error and the ones it was raised from; helpers re-raise pyodbc errors wrapped in Exception"""
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        yield error
+        error = error.__cause__ or error.__context__
+
+
+def is_transient_error(error: BaseException) -> bool:
+    """True for SQL Server errors worth retrying, False for fatal ones (bad SQL, constraints, logins...)"""
+    for cause in _error_chain(error):
+        if isinstance(cause, DatabaseUnavailable):
+            return False
+        if isinstance(cause, pyodbc.Error) and cause.args and cause.args[0] in TRANSIENT_SQLSTATES:
+            return True
+        message = str(cause)
+        if any(state in TRANSIENT_SQLSTATES for state in _SQLSTATE_PATTERN.findall(message)):
+            return True
+        if any(int(code) in TRANSIENT_ERROR_CODES for code in _ERROR_CODE_PATTERN.findall(message)):
+            return True
+    return False
+
+
+def is_database_error(error: BaseException) -> bool:
+    """True when the error came back from SQL Server or the ODBC driver (as opposed to a bug or a pool timeout)"""
+    for cause in _error_chain(error):
+        if isinstance(cause, pyodbc.Error) or _SQLSTATE_PATTERN.search(str(cause)):
+            return True
+    return False
+
+
+def backoff_delay(attempt: int, base_delay: float = DB_RETRY_BASE_DELAY, max_delay: float = DB_RETRY_MAX_DELAY) -> float:
+    """Full-jitter exponential backoff before retry number attempt (1-based)"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** (attempt - 1)))
+
+
+class CircuitBreaker:
+    """
+    Fails database calls fast while the database is down instead of letting every request
+    wait for its own timeouts and retries.
+    Opens after failure_threshold consecutive calls failed with transient errors; after reset_timeout
+    a single probe call is let through (half-open) and closes the circuit again when it succeeds.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = DB_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = DB_BREAKER_RESET_SECONDS, name: str = "database"):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+        self._metrics = {
+            "opened": 0,
+            "short_circuited": 0
+        }
+
+    def retry_after(self) -> float:
+        """Seconds until the next probe call is allowed"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return 0.0
+            return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def _admit(self):
+        """"call" when closed, "probe" for the single half-open probe, None when the call is rejected"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return "call"
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self.state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return "probe"
+            self._metrics["short_circuited"] += 1
+            return None
+
+    def allow(self) -> bool:
+        return self._admit() is not None
+
+    def check(self) -> bool:
+        """Raise DatabaseUnavailable when the circuit does not allow a call; returns True for the half-open probe"""
+        admitted = self._admit()
+        if admitted is None:
+            raise DatabaseUnavailable(retry_after=self.retry_after() or self.reset_timeout)
+        return admitted == "probe"
+
+    def release_probe(self):
+        """
+        Let another call probe when the probe ended without an outcome (cancelled, or failed with an error
+        that says nothing about the database); otherwise the circuit would stay half-open and reject every call.
+        """
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self.state != self.CLOSED:
+                logger.info(f"Circuit {self.name} closed, database reachable again")
+            self.state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self._failures >= self.failure_threshold):
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._metrics["opened"] += 1
+                logger.error(
+                    f"Circuit {self.name} opened after {self._failures} failed calls, "
+                    f"failing fast for {self.reset_timeout}s"
+                )
+
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.state != self.CLOSED
+
+    def stats(self):
+        with self._lock:
+            return {
+                "name": self.name,
+                "state": self.state,
+                "consecutive_failures": self._failures,
+                **self._metrics
+            }
+
+
+db_breaker = CircuitBreaker()
+
+_stats_lock = threading.Lock()
+_stats = {
+    "calls": 0,
+    "retries": 0,
+    "recovered": 0,
+    "transient_failures": 0,
+    "fatal_failures": 0
+}
+
+
+def _record(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+async def call_with_retry(attempt, retry: bool = False, breaker: CircuitBreaker = None,
+                          max_attempts: int = DB_RETRY_MAX_ATTEMPTS, deadline: float = DB_RETRY_DEADLINE_SECONDS):
+    """
+    Await attempt() (a function returning an awaitable database call) behind the circuit breaker.
+
+    With retry=True, transient errors are retried with jittered exponential backoff, up to max_attempts
+    and only while the backoff still ends within deadline seconds of the first attempt; when they persist
+    the call raises DatabaseUnavailable. Retries are opt-in and only for reads and idempotent writes:
+    a write retried after its connection dropped past the commit would be applied twice.
+    Fatal SQL Server errors are raised as they are and count as a success for the breaker, since the
+    database answered; other errors (bugs, pool timeouts) do not affect it.
+    """
+    breaker = breaker or db_breaker
+    probe = breaker.check()
+    _record("calls")
+
+    started = time.monotonic()
+    attempts = max_attempts if retry else 1
+    try:
+        for attempt_number in range(1, attempts + 1):
+            try:
+                result = await attempt()
+            except Exception as e:
+                if not is_transient_error(e):
+                    if is_database_error(e):
+                        breaker.record_success()
+                    _record("fatal_failures")
+                    raise
+
+                delay = backoff_delay(attempt_number)
+                if attempt_number >= attempts or time.monotonic() - started + delay > deadline:
+                    breaker.record_failure()
+                    _record("transient_failures")
+                    logger.error(f"Database call failed after {attempt_number} attempt(s): {e}")
+                    raise DatabaseUnavailable(retry_after=breaker.retry_after() or delay) from e
+
+                _record("retries")
+                logger.warning(f"Transient database error (attempt {attempt_number}/{attempts}), retrying in {delay:.2f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+
+            breaker.record_success()
+            if attempt_number > 1:
+                _record("recovered")
+            return result
+    finally:
+        if probe:
+            breaker.release_probe()
+
+
+def get_db_resilience_stats():
+    """Return retry counters and the circuit breaker state"""
+    with _stats_lock:
+        stats = dict(_stats)
+    stats["breaker"] = db_breaker.stats()
+    stats["degraded_mode"] = DB_DEGRADED_MODE
+    return stats
@@ -0,0 +1,214 @@
+import os
+import asyncio
+import threading
+import dotenv
+dotenv.load_dotenv()
+
+from langchain_core.messages import HumanMessage, AIMessage, SystemMessage
+
+from agents.AgentsEnum import AgentsEnum
+from agents.model_factory import get_chat_model
+from utils.cache_util import LRUCache
+from utils.database import run_db, run_db_once
+from utils.logging_setup import logger
+from utils.threads_util import (
+    get_thread_messages_by_thread_id,
+    get_thread_summary,
+    save_thread_summary
+)
+
+try:
+    import tiktoken
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception:  # tiktoken missing or encoding files unavailable offline
+    _encoding = None
+
+# Most tokens of prior conversation (summary + recent messages) sent with each turn
+HISTORY_TOKEN_BUDGET = int(os.getenv("HISTORY_TOKEN_BUDGET", "4000"))
+# Older turns are folded into the rolling summary once this many tokens fell out of the window
+HISTORY_SUMMARY_BATCH_TOKENS = int(os.getenv("HISTORY_SUMMARY_BATCH_TOKENS", "1000"))
+HISTORY_SUMMARY_CACHE_SIZE = int(os.getenv("HISTORY_SUMMARY_CACHE_SIZE", "512"))
+
+# Only the user and the orchestrator turns make up the conversation; sub-agent answers
+# were already condensed into the orchestrator reply of the same turn
+HISTORY_ROLES = ("User", AgentsEnum.FREDDYAI_ASSISTANT.value)
+
+SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and FreddyAI Assistant.
+Update the summary with the new messages below. Keep facts, figures, names, user preferences and open questions;
+drop greetings and repetition. Answer with the updated summary only, at most 300 words.
+
+Current summary:
+{summary}
+
+New messages:
+{messages}
+"""
+
+summary_cache = LRUCache(maxsize=HISTORY_SUMMARY_CACHE_SIZE, name="thread_summary")
+
+_summaries_in_flight = set()
+_background_tasks = set()
+_stats_lock = threading.Lock()
+_stats = {
+    "turns": 0,
+    "tokens_sent": 0,
+    "tokens_saved": 0,
+    "summaries_generated": 0,
+    "summary_failures": 0
+}
+
+_NO_SUMMARY = {"summary": "", "summarized_through_order": 0, "summary_tokens": 0}
+
+
+def count_tokens(text: str) -> int:
+    """Token count of text, estimated at ~4 characters per token when tiktoken is unavailable"""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def _record(**counters):
+    with _stats_lock:
+        for name, value in counters.items():
+            _stats[name] += value
+
+
+def get_history_stats():
+    """Return tokens sent vs. tokens saved by the history window, plus summary cache counters"""
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["tokens_sent"] + stats["tokens_saved"]
+    stats["saved_ratio"] = round(stats["tokens_saved"] / total, 4) if total else 0.0
+    stats["summary_cache"] = summary_cache.stats()
+    return stats
+
+
+def _load_summary(thread_id: str):
+    summary = summary_cache.get(thread_id)
+    if summary is None:
+        summary = get_thread_summary(thread_id) or _NO_SUMMARY
+        summary_cache.set(thread_id, summary)
+    return summary
+
+
+def split_history(rows, summary, current_message_id=None):
+    """
+    Split the messages after the rolling summary into the window sent verbatim and the pending ones.
+
+    The newest conversation messages are kept, newest first, until HISTORY_TOKEN_BUDGET
+    (minus the summary) is used up; older unsummarized ones are pending, to be folded into the summary.
+    Returns (window, pending), both oldest first.
+    """
+    unsummarized = [
+        row for row in rows
+        if row.role in HISTORY_ROLES and row.content and str(row.message_id) != str(current_message_id)
+        and row.message_order > summary["summarized_through_order"]
+    ]
+
+    budget = HISTORY_TOKEN_BUDGET - summary["summary_tokens"]
+    window = []
+    for row in reversed(unsummarized):
+        tokens = count_tokens(row.content)
+        if tokens > budget:
+            break
+        budget -= tokens
+        window.append(row)
+    window.reverse()
+    return window, unsummarized[:len(unsummarized) - len(window)]
+
+
+def build_history(thread_id: str, user_email: str, current_message_id=None):
+    """
+    Assemble the prior conversation of a thread for the next turn.
+
+    Only the messages after the rolling summary are read (keyset on MessageOrder), so the cost
+    of a turn does not grow with the length of the thread. They are split by split_history;
+    everything older is represented by the summary.
+
+    Returns (messages, pending): LangChain messages to prepend to the current user message,
+    and the pending MessageRows (oldest first).
+    """
+    summary = _load_summary(thread_id)
+    rows = get_thread_messages_by_thread_id(thread_id, user_email, after=summary["summarized_through_order"])
+    window, pending = split_history(rows, summary, current_message_id)
+    if not window and not pending and not summary["summary"]:
+        _record(turns=1)
+        return [], []
+
+    messages = []
+    if summary["summary"]:
+        messages.append(SystemMessage(content=f"Summary of the earlier conversation:\n{summary['summary']}"))
+    for row in window:
+        if row.role == "User":
+            messages.append(HumanMessage(content=row.content))
+        else:
+            messages.append(AIMessage(content=row.content))
+
+    tokens_sent = summary["summary_tokens"] + sum(count_tokens(row.content) for row in window)
+    # The summary stands in for the earlier messages, which are no longer read; count it as their size
+    tokens_full = tokens_sent + sum(count_tokens(row.content) for row in pending)
+    _record(turns=1, tokens_sent=tokens_sent, tokens_saved=max(0, tokens_full - tokens_sent))
+
+    return messages, pending
+
+
+def should_refresh_summary(pending) -> bool:
+    """Summarize in batches so the summary model is not called on every turn"""
+    return sum(count_tokens(row.content) for row in pending) >= HISTORY_SUMMARY_BATCH_TOKENS
+
+
+async def refresh_thread_summary(thread_id: str, pending):
+    """
+    Fold pending messages into the rolling summary of a thread and persist it.
+    At most one refresh runs per thread; a concurrent request is dropped and the
+    same messages are picked up again by the next turn.
+    """
+    if not pending or thread_id in _summaries_in_flight:
+        return
+
+    _summaries_in_flight.add(thread_id)
+    try:
+        summary = await run_db(_load_summary, thread_id)
+        pending = [row for row in pending if row.message_order > summary["summarized_through_order"]]
+        if not pending:
+            return
+
+        transcript = "\n".join(
+            f"{'User' if row.role == 'User' else 'Assistant'}: {row.content}" for row in pending
+        )
+        prompt = SUMMARY_PROMPT.format(summary=summary["summary"] or "(empty)", messages=transcript)
+        result = await get_chat_model().ainvoke([HumanMessage(content=prompt)])
+
+        new_summary = {
+            "summary": result.content.strip(),
+            "summarized_through_order": pending[-1].message_order,
+            "summary_tokens": count_tokens(result.content)
+        }
+        await run_db_once(
+            save_thread_summary,
+            thread_id,
+            new_summary["summary"],
+            new_summary["summarized_through_order"],
+            new_summary["summary_tokens"]
+        )
+        summary_cache.set(thread_id, new_summary)
+        _record(summaries_generated=1)
+        logger.info(f"Thread {thread_id} summary updated through message {new_summary['summarized_through_order']}")
+
+    except Exception as e:
+        _record(summary_failures=1)
+        logger.error(f"Error refreshing thread summary: {str(e)}")
+
+    finally:
+        _summaries_in_flight.discard(thread_id)
+
+
+def schedule_summary_refresh(thread_id: str, pending):
+    """Start refresh_thread_summary in the background once enough pending tokens accumulated"""
+    if not should_refresh_summary(pending):
+        return
+    task = asyncio.create_task(refresh_thread_summary(thread_id, pending))
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
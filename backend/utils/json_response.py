@@ -0,0 +1,13 @@
+import orjson
+from fastapi.responses import JSONResponse
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSON response rendered by orjson.
+    Serializes dataclass rows (ThreadRow, MessageRow) and datetimes natively, so routes can return
+    them without building dicts or going through response_model validation and jsonable_encoder.
+    """
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
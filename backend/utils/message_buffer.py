@@ -0,0 +1,137 @@
+import asyncio
+
+from utils.database import run_db_once
+from utils.logging_setup import logger
+from utils.threads_util import save_agent_thread_message, save_agent_thread_messages, thread_messages_saved
+
+# Flushes still running after their stream finished, kept referenced until done
+_pending_flushes = set()
+# Latest running flush per thread, awaited before the next turn on that thread starts
+_thread_flushes = {}
+
+
+class TurnMessageBuffer:
+    """
+    Collects the agent messages of one chat turn and saves them in a single
+    sp_AddThreadMessagesBatch call once the stream is over, instead of one
+    connection and procedure call per model/tool step while tokens are still streaming.
+    The buffer lives in memory only; it holds nothing the client has not just been streamed, and a
+    crash that loses it also ends that stream, so the answer is lost either way.
+    """
+
+    def __init__(self, thread_id: str):
+        self.thread_id = thread_id
+        self.messages = []
+        self.flushed = False
+        self._flush_task = None
+
+    def add(self, agent_code: str, message_content: str, input_tokens: int, output_tokens: int):
+        self.messages.append({
+            "agent_code": agent_code,
+            "message_content": message_content,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens
+        })
+
+    def flush(self):
+        """
+        Save the buffered messages (blocking). Raises when messages could not be saved, after logging
+        them, so run_db_once reports the failure to the circuit breaker.
+        When the batch call fails and the batch is known not to have committed, each message is
+        retried on its own so one bad row cannot lose the rest of the turn. When the outcome is
+        unknown (connection lost around the commit and the thread cannot be read back) nothing is
+        retried, since the rows may already be saved.
+        """
+        if self.flushed:
+            return
+        self.flushed = True
+
+        if not self.messages:
+            return
+
+        try:
+            save_agent_thread_messages(self.thread_id, self.messages)
+            return
+        except Exception as e:
+            batch_error = e
+
+        try:
+            if thread_messages_saved(self.thread_id, self.messages):
+                logger.warning(f"Batch save for thread {self.thread_id} reported an error but was committed: {batch_error}")
+                return
+        except Exception as e:
+            logger.error(f"Batch save failed for thread {self.thread_id} and could not be verified: {e}")
+            self._log_lost(batch_error)
+            raise
+
+        logger.error(f"Batch save failed for thread {self.thread_id}, saving messages one by one: {batch_error}")
+        message_error = None
+        for message in self.messages:
+            try:
+                save_agent_thread_message(thread_id=self.thread_id, **message)
+            except Exception as e:
+                self._log_lost(e, [message])
+                message_error = e
+        if message_error:
+            raise message_error
+
+    def _log_lost(self, error: Exception, messages: list = None):
+        for message in messages if messages is not None else self.messages:
+            logger.error(
+                f"Lost {message['agent_code']} message for thread {self.thread_id} "
+                f"({message['input_tokens']}+{message['output_tokens']} tokens): {error}"
+            )
+
+    async def _flush_in_background(self):
+        try:
+            await run_db_once(self.flush)
+        except Exception as e:
+            if not self.flushed:
+                # Raised before flush ran, e.g. DatabaseUnavailable while the circuit is open
+                self._log_lost(e)
+            else:
+                logger.error(f"Could not save every message of the turn in thread {self.thread_id}: {e}")
+
+    def schedule_flush(self):
+        """
+        Flush on the database executor in its own task, returns the task (None when there is nothing to save).
+        Safe to call from a finally block of a stream that was cancelled by a client disconnect:
+        the flush is not cancelled with the stream, so the messages produced so far are still saved.
+        """
+        if self._flush_task is None and not self.flushed and self.messages:
+            self._flush_task = asyncio.ensure_future(self._flush_in_background())
+            _pending_flushes.add(self._flush_task)
+            self._flush_task.add_done_callback(_pending_flushes.discard)
+            _thread_flushes[self.thread_id] = self._flush_task
+            self._flush_task.add_done_callback(lambda task: _forget_thread_flush(self.thread_id, task))
+        return self._flush_task
+
+    async def save(self):
+        """
+        Flush and wait for it, used before the end of the stream so the turn is stored by the time the
+        client can send its next message. Errors are logged, never raised into the stream.
+        """
+        task = self.schedule_flush()
+        if task is not None:
+            await asyncio.shield(task)
+
+
+def _forget_thread_flush(thread_id: str, task):
+    if _thread_flushes.get(thread_id) is task:
+        del _thread_flushes[thread_id]
+
+
+async def wait_for_thread_flush(thread_id: str):
+    """
+    Wait for the thread's previous turn to be saved before a new turn starts on it, so the new user
+    message cannot be ordered before that turn's answer (relevant when the client disconnected early).
+    """
+    task = _thread_flushes.get(thread_id)
+    if task is not None:
+        await asyncio.shield(task)
+
+
+async def wait_for_pending_flushes():
+    """Wait for scheduled flushes to finish, used on application shutdown"""
+    if _pending_flushes:
+        await asyncio.gather(*list(_pending_flushes), return_exceptions=True)
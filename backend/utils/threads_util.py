@@ -1,9 +1,16 @@
 from asyncio import threads
-from utils.database import get_db_connection
+from utils.database import db_connection, get_db_connection, get_read_db_connection, mark_recent_write
 from models.user_session import UserSession
+from models.thread_models import ThreadRow, MessageRow
 from utils.logging_setup import logger
+from utils.user_util import read_user_session, cache_session
 from utils.common_funtions import is_valid_uuid
+import base64
 import datetime
+import re
+
+# yyyy-mm-dd hh:mi:ss.fffffff (style 121); ISO 8601 with a T is accepted for cursors issued before
+_CURSOR_DATE_PATTERN = re.compile(r"^\d{4}-\d{2}-\d{2}[ T]\d{2}:\d{2}:\d{2}(\.\d{1,7})?$")
 
 
 def save_agent_thread_message(thread_id: str, agent_code: str, message_content: str, input_tokens: int, output_tokens: int) -> str:
@@ -33,6 +40,7 @@ def save_agent_thread_message(thread_id: str, agent_code: str, message_content:
         # Get the message ID from the result
         row = cursor.fetchone()
         conn.commit()
+        mark_recent_write(thread_id)
         if row and hasattr(row, 'MessageID'):
             message_id = str(row.MessageID)
             logger.info(f"Agent message saved with ID: {message_id}")
@@ -83,6 +91,7 @@ def save_user_thread_message(thread_id: str, message_content: str) -> str:
         # Get the message ID from the result
         row = cursor.fetchone()
         conn.commit()
+        mark_recent_write(thread_id)
         
         if row and hasattr(row, 'MessageID'):
             message_id = str(row.MessageID)
@@ -161,37 +170,91 @@ def get_thread_by_id(user_email: str, current_thread_id: str):
         if conn:
             conn.close()
 
-def get_threads_by_user(user_email: str):
-    """Get the current or latest thread for the user"""
+def encode_thread_cursor(cursor_date: str, thread_id: str) -> str:
+    """
+    Opaque keyset cursor pointing after the given thread in the thread list.
+    cursor_date is the CursorDate column of sp_GetUserThreads (LastActivityDate at full DATETIME2 precision).
+    """
+    raw = f"{cursor_date}|{thread_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii")
+
+def decode_thread_cursor(cursor_token: str):
+    """
+    Return (cursor_date, thread_id) of a cursor built by encode_thread_cursor.
+    cursor_date stays text, so SQL Server converts it to DATETIME2 without losing the 100ns digit.
+    """
+    try:
+        cursor_date, thread_id = base64.urlsafe_b64decode(cursor_token.encode("ascii")).decode("utf-8").split("|")
+        if not _CURSOR_DATE_PATTERN.match(cursor_date) or not is_valid_uuid(thread_id):
+            raise ValueError("invalid thread cursor")
+        return cursor_date, thread_id
+    except Exception:
+        raise ValueError("Invalid thread list cursor.")
+
+def decode_sync_token(sync_token: str) -> bytes:
+    """Return the rowversion of a sync token returned by get_threads_page"""
+    try:
+        since = bytes.fromhex(sync_token)
+    except ValueError:
+        since = b""
+    if len(since) != 8:
+        raise ValueError("Invalid sync token.")
+    return since
+
+def read_thread_row(row) -> ThreadRow:
+    """ThreadRow from a row of sp_GetUserThreads"""
+    return ThreadRow.from_row(row)
+
+def read_threads_page(cursor, limit: int, is_delta: bool = False):
+    """Read the two result sets of sp_GetUserThreads (threads, sync token) into a thread list page"""
+    rows = cursor.fetchall()
+    threads = [read_thread_row(row) for row in rows]
+    
+    cursor.nextset()
+    token_row = cursor.fetchone()
+    
+    next_cursor = None
+    if not is_delta and threads and len(threads) >= limit:
+        # Column 10 is CursorDate, after the ThreadRow columns
+        next_cursor = encode_thread_cursor(rows[-1][10], threads[-1].thread_id)
+    
+    return {
+        "threads": threads,
+        "next_cursor": next_cursor,
+        "sync_token": bytes(token_row[0]).hex() if token_row and token_row[0] else None
+    }
+
+def get_threads_page(user_email: str, limit: int = 50, cursor_token: str = None, sync_token: str = None):
+    """
+    Get threads of the user using stored procedure sp_GetUserThreads.
+
+    Without a sync token, returns one page of active threads ordered by last activity, starting after
+    cursor_token; next_cursor is set when the page is full.
+    With a sync token (from a previous call), returns only the threads changed since then, including
+    deactivated ones.
+    The returned sync_token is the one to pass on the next delta sync.
+    """
     conn = None
     cursor = None
-    threads = []
     try:
-        conn = get_db_connection()
+        cursor_date, cursor_thread_id = decode_thread_cursor(cursor_token) if cursor_token else (None, None)
+        since = decode_sync_token(sync_token) if sync_token else None
+        
+        conn = get_read_db_connection(user_email)
         cursor = conn.cursor()
         cursor.execute("""
             EXEC [dbo].[sp_GetUserThreads] 
-                @UserEmail = ?;
-        """, user_email)
+                @UserEmail = ?,
+                @Limit = ?,
+                @CursorDate = ?,
+                @CursorThreadID = ?,
+                @Since = ?;
+        """, user_email, limit, cursor_date, cursor_thread_id, since)
         
-        for row in cursor.fetchall():
-            thread_data = {
-                "thread_id": str(row[0]),  # Convert GUID to string
-                "user_email": row[1],
-                "thread_title": row[2],
-                "thread_icon": row[3],
-                "is_active": row[4],
-                "total_messages": row[5],
-                "total_tokens": row[6],
-                "last_activity_date": row[7].isoformat() if row[7] else None,
-                "created_date": row[8].isoformat() if row[8] else None,
-                "modified_date": row[9].isoformat() if row[9] else None
-            }
-            
-            threads.append(thread_data)
-      
-        return threads
+        return read_threads_page(cursor, limit, since is not None)
       
+    except ValueError:
+        raise
     except Exception as e:
         logger.error(f"Error fetching thread: {str(e)}")
         raise Exception(f"Failed to fetch thread: {str(e)}")
@@ -202,41 +265,34 @@ def get_threads_by_user(user_email: str):
         if conn:
             conn.close()
 
-def get_thread_messages_by_thread_id(thread_id: str, user_email: str):
-    """Get the current or latest thread for the user"""
+def get_threads_by_user(user_email: str, limit: int = 50):
+    """Get the most recently active threads of the user"""
+    return get_threads_page(user_email, limit=limit)["threads"]
+
+def read_message_row(row) -> MessageRow:
+    """MessageRow from a row of sp_GetThreadMessages"""
+    return MessageRow.from_row(row)
+
+def get_thread_messages_by_thread_id(thread_id: str, user_email: str, before: int = None, after: int = None, limit: int = None):
+    """
+    Get the messages of a thread as MessageRows, oldest first.
+    before/after are MessageOrder cursors and limit caps the number of messages (newest ones unless after is set);
+    without them the whole thread is returned.
+    """
     conn = None
     cursor = None
-    messages = []
     try:
         if not is_valid_uuid(thread_id):
             raise ValueError("Invalid thread_id format. Must be a valid UUID.")
         
-        conn = get_db_connection()
+        conn = get_read_db_connection(user_email, thread_id)
         cursor = conn.cursor()
         cursor.execute("""
             EXEC [dbo].[sp_GetThreadMessages] 
-                @ThreadID = ?, @UserEmail = ?;
-        """, thread_id, user_email)
-        
-        for row in cursor.fetchall():
-            message = {
-                "message_id": row[0],
-                "thread_id": str(row[1]),
-                "agent_id": row[2],
-                "agent_name": row[3],
-                "role": row[4],
-                "content": row[5],
-                "input_tokens": row[6],
-                "output_tokens": row[7],
-                "total_tokens": row[8],
-                "message_order": row[9],
-                "is_edited": row[10],
-                "edited_date": row[11].isoformat() if row[11] else None,
-                "created_date": row[12].isoformat() if row[12] else None,
-                "modified_date": row[13].isoformat() if row[13] else None
-            }
-            
-            messages.append(message)
+                @ThreadID = ?, @UserEmail = ?, @Before = ?, @After = ?, @Limit = ?;
+        """, thread_id, user_email, before, after, limit)
+        
+        messages = [read_message_row(row) for row in cursor.fetchall()]
       
         return messages 
       
@@ -249,6 +305,34 @@ def get_thread_messages_by_thread_id(thread_id: str, user_email: str):
         if conn:
             conn.close()
 
+def get_thread_messages_page(thread_id: str, user_email: str, before: int = None, after: int = None, limit: int = None):
+    """
+    Get one page of thread messages for keyset pagination.
+    Returns a dict with the messages (oldest first), has_more, and next_cursor: the MessageOrder to pass
+    as before (older page) or, when paging forward with after, as after (newer page).
+    """
+    # Fetch one extra message to know whether another page exists
+    messages = get_thread_messages_by_thread_id(
+        thread_id, user_email, before=before, after=after, limit=limit + 1 if limit else None
+    )
+    return paginate_messages(messages, limit, after)
+
+def paginate_messages(messages: list, limit: int = None, after: int = None):
+    """Trim messages fetched with limit + 1 to one page and derive has_more / next_cursor"""
+    has_more = bool(limit) and len(messages) > limit
+    if has_more:
+        messages = messages[:limit] if after is not None else messages[1:]
+    
+    next_cursor = None
+    if has_more:
+        next_cursor = messages[-1].message_order if after is not None else messages[0].message_order
+    
+    return {
+        "messages": messages,
+        "has_more": has_more,
+        "next_cursor": next_cursor
+    }
+
 def create_thread(user_email: str, thread_title: str = "New Chat", thread_icon: str = "💬"):
     """Create a new thread for the user"""
     conn = None
@@ -274,6 +358,7 @@ def create_thread(user_email: str, thread_title: str = "New Chat", thread_icon:
         thread_id = thread_row[0]
         
         conn.commit()
+        mark_recent_write(user_email, thread_id)
                 
         thread_data = {
             "thread_id": thread_id,
@@ -422,6 +507,7 @@ def update_thread(thread_id: str, thread_title: str = None, thread_icon: str = N
         
         cursor.execute(sql, *params)
         conn.commit()
+        mark_recent_write(thread_id)
         
     except Exception as e:
         logger.error(f"Error updating thread: {str(e)}")
@@ -431,4 +517,204 @@ def update_thread(thread_id: str, thread_title: str = None, thread_icon: str = N
         if cursor:
             cursor.close()
         if conn:
-            conn.close()
\ No newline at end of file
+            conn.close()
+
+def get_thread_summary(thread_id: str):
+    """Get the rolling conversation summary of a thread, or None if it has not been summarized yet"""
+    conn = None
+    cursor = None
+    
+    try:
+        if not is_valid_uuid(thread_id):
+            raise ValueError("Invalid thread_id format. Must be a valid UUID.")
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            EXEC [dbo].[sp_GetThreadSummary] 
+                @ThreadID = ?;
+        """, thread_id)
+        
+        row = cursor.fetchone()
+        if not row:
+            return None
+        
+        return {
+            "thread_id": str(row[0]),
+            "summary": row[1],
+            "summarized_through_order": row[2],
+            "summary_tokens": row[3],
+            "modified_date": row[4].isoformat() if row[4] else None
+        }
+      
+    except Exception as e:
+        logger.error(f"Error fetching thread summary: {str(e)}")
+        raise Exception(f"Failed to fetch thread summary: {str(e)}")
+      
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def save_thread_summary(thread_id: str, summary: str, summarized_through_order: int, summary_tokens: int):
+    """Insert or update the rolling conversation summary of a thread"""
+    conn = None
+    cursor = None
+    
+    try:
+        if not is_valid_uuid(thread_id):
+            raise ValueError("Invalid thread_id format. Must be a valid UUID.")
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            EXEC [dbo].[sp_UpsertThreadSummary] 
+                @ThreadID = ?, 
+                @Summary = ?, 
+                @SummarizedThroughOrder = ?,
+                @SummaryTokens = ?;
+        """, thread_id, summary, summarized_through_order, summary_tokens)
+        conn.commit()
+        
+    except Exception as e:
+        logger.error(f"Error saving thread summary: {str(e)}")
+        raise Exception(f"Failed to save thread summary: {str(e)}")
+      
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+def begin_chat_turn(user_email: str, thread_id: str, message_content: str):
+    """
+    Start a chat turn in a single round trip using stored procedure sp_BeginChatTurn:
+    reuse the user's thread (or create a new one), save the user message and load the user session.
+    Returns (thread_data, user_message_id, user_session).
+    """
+    conn = None
+    cursor = None
+    
+    try:
+        if thread_id and not is_valid_uuid(thread_id):
+            thread_id = None
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            EXEC [dbo].[sp_BeginChatTurn] 
+                @UserEmail = ?, 
+                @ThreadID = ?, 
+                @Content = ?;
+        """, user_email, thread_id, message_content)
+        
+        thread_row = cursor.fetchone()
+        if not thread_row:
+            raise Exception("Failed to create or retrieve thread.")
+        
+        thread_data = {
+            "thread_id": str(thread_row[0]),
+            "thread_title": thread_row[1],
+            "thread_icon": thread_row[2],
+            "is_active": thread_row[3],
+            "total_messages": thread_row[4],
+            "total_tokens": thread_row[5],
+            "last_activity_date": thread_row[6].isoformat() if thread_row[6] else None,
+            "created_date": thread_row[7].isoformat() if thread_row[7] else None,
+            "modified_date": thread_row[8].isoformat() if thread_row[8] else None,
+            "is_new_thread": bool(thread_row[9])
+        }
+        user_message_id = str(thread_row[10]) if thread_row[10] is not None else None
+        
+        # Remaining result sets are the ones of sp_CreateOrGetUserSession
+        cursor.nextset()
+        user_session = read_user_session(cursor, UserSession(user_email))
+        
+        conn.commit()
+        mark_recent_write(user_email, thread_data['thread_id'])
+        cache_session(user_session)
+        
+        logger.info(f"Began chat turn on thread {thread_data['thread_id']}, user message ID: {user_message_id}")
+        
+        return thread_data, user_message_id, user_session
+      
+    except Exception as e:
+        logger.error(f"Error beginning chat turn: {str(e)}")
+        raise Exception(f"Failed to begin chat turn: {str(e)}")
+      
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+def save_agent_thread_messages(thread_id: str, messages: list) -> list:
+    """
+    Save several agent messages to a thread in one round trip using stored procedure sp_AddThreadMessagesBatch.
+    messages are dicts with agent_code, message_content, input_tokens and output_tokens, in the order they were produced.
+    Returns the IDs of the saved messages in the same order.
+    """
+    conn = None
+    cursor = None
+    
+    try:
+        if not is_valid_uuid(thread_id):
+            raise ValueError("Invalid thread_id format. Must be a valid UUID.")
+        
+        if not messages:
+            return []
+        
+        rows = [
+            (seq, message["agent_code"], message["message_content"], message["input_tokens"], message["output_tokens"])
+            for seq, message in enumerate(messages, start=1)
+        ]
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        cursor.execute("""
+            EXEC [dbo].[sp_AddThreadMessagesBatch] 
+                @ThreadID = ?, 
+                @Messages = ?;
+        """, thread_id, rows)
+        
+        message_ids = [str(row.MessageID) for row in cursor.fetchall()]
+        conn.commit()
+        mark_recent_write(thread_id)
+        
+        logger.info(f"Saved {len(message_ids)} agent messages to thread {thread_id}")
+        
+        return message_ids
+      
+    except Exception as e:
+        logger.error(f"Error saving agent messages: {str(e)}")
+        raise Exception(f"Failed to save agent messages: {str(e)}")
+      
+    finally:
+        if cursor:
+            cursor.close()
+        if conn:
+            conn.close()
+
+
+def thread_messages_saved(thread_id: str, messages: list) -> bool:
+    """
+    True when the newest messages of the thread are exactly these agent messages, in order.
+    sp_AddThreadMessagesBatch saves all rows or none, so after a failed call this tells whether
+    the batch committed before the connection was lost. Reads the primary, replicas may lag.
+    """
+    if not messages:
+        return True
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("""
+            SELECT TOP (?) [Role], [Content]
+            FROM [dbo].[thread_messages]
+            WHERE [ThreadID] = ?
+            ORDER BY [MessageOrder] DESC;
+        """, len(messages), thread_id)
+        newest = [(row.Role, row.Content) for row in reversed(cursor.fetchall())]
+
+    return newest == [(message["agent_code"], message["message_content"]) for message in messages]
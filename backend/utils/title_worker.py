@@ -0,0 +1,112 @@
+import os
+import re
+import json
+import asyncio
+import dotenv
+dotenv.load_dotenv()
+
+from langchain_core.messages import HumanMessage
+
+from agents.model_factory import get_chat_model
+from utils.database import run_db, run_db_once
+from utils.logging_setup import logger
+from utils.threads_util import get_thread_messages_by_thread_id, update_thread
+
+# Threads titled together in one LLM request
+TITLE_BATCH_SIZE = int(os.getenv("TITLE_BATCH_SIZE", "10"))
+# How long the worker waits for more threads before sending a partial batch
+TITLE_BATCH_WAIT_SECONDS = float(os.getenv("TITLE_BATCH_WAIT_SECONDS", "2"))
+# Only the opening user messages of a thread are used for its title
+TITLE_MAX_MESSAGES = 5
+TITLE_MAX_MESSAGE_CHARS = 500
+TITLE_MAX_LENGTH = 100
+
+TITLE_PROMPT = """Generate a concise title (at most 8 words, no quotes) for each of the chat conversations below.
+Answer with a JSON object mapping each conversation id to its title, and nothing else.
+
+{conversations}
+"""
+
+_queue = asyncio.Queue()
+# Threads queued or being titled, so a busy thread is only titled once
+_pending = set()
+
+
+def schedule_thread_title(thread_id: str, user_email: str):
+    """
+    Queue a "New Chat" thread for title generation.
+    Called once the thread has its second user message; the title worker picks it up in the background.
+    """
+    if thread_id in _pending:
+        return
+    _pending.add(thread_id)
+    _queue.put_nowait((thread_id, user_email))
+
+
+def _load_user_messages(thread_id: str, user_email: str):
+    messages = get_thread_messages_by_thread_id(thread_id, user_email, after=0, limit=TITLE_MAX_MESSAGES * 4)
+    return [msg.content[:TITLE_MAX_MESSAGE_CHARS] for msg in messages if msg.role == "User"][:TITLE_MAX_MESSAGES]
+
+
+def _parse_titles(content: str):
+    # Models sometimes wrap JSON in a code fence
+    match = re.search(r"\{.*\}", content, re.DOTALL)
+    return json.loads(match.group(0)) if match else {}
+
+
+async def generate_thread_titles(batch):
+    """Title a batch of (thread_id, user_email) in one LLM request and persist the titles with update_thread"""
+    conversations = {}
+    for thread_id, user_email in batch:
+        try:
+            user_messages = await run_db(_load_user_messages, thread_id, user_email)
+        except Exception as e:
+            logger.error(f"Error loading messages for thread title {thread_id}: {e}")
+            continue
+        if len(user_messages) > 1:
+            conversations[thread_id] = user_messages
+
+    if not conversations:
+        return
+
+    prompt = TITLE_PROMPT.format(conversations="\n\n".join(
+        f"Conversation id: {thread_id}\n" + "\n".join(f"- {message}" for message in user_messages)
+        for thread_id, user_messages in conversations.items()
+    ))
+    result = await get_chat_model().ainvoke([HumanMessage(content=prompt)])
+    titles = _parse_titles(result.content)
+
+    for thread_id in conversations:
+        title = str(titles.get(thread_id) or "").strip().strip('"')[:TITLE_MAX_LENGTH]
+        if not title:
+            logger.warning(f"No title generated for thread {thread_id}")
+            continue
+        try:
+            await run_db_once(update_thread, thread_id, thread_title=title)
+            logger.info(f"Thread {thread_id} titled '{title}'")
+        except Exception as e:
+            logger.error(f"Error saving title for thread {thread_id}: {e}")
+
+
+async def run_title_worker():
+    """Background task started by the app lifespan; titles queued threads in batches of TITLE_BATCH_SIZE"""
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await _queue.get()]
+        deadline = loop.time() + TITLE_BATCH_WAIT_SECONDS
+        while len(batch) < TITLE_BATCH_SIZE:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(_queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            await generate_thread_titles(batch)
+        except Exception as e:
+            logger.error(f"Error generating thread titles: {e}")
+        finally:
+            for thread_id, _ in batch:
+                _pending.discard(thread_id)
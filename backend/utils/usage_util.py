@@ -0,0 +1,68 @@
+import os
+import asyncio
+import dotenv
+dotenv.load_dotenv()
+
+from utils.database import get_db_connection, run_db_once
+from utils.logging_setup import logger
+from utils.user_util import invalidate_session
+
+# How often usage_events are folded into the daily/monthly usage tables
+USAGE_ROLLUP_INTERVAL_SECONDS = float(os.getenv("USAGE_ROLLUP_INTERVAL_SECONDS", "60"))
+USAGE_ROLLUP_BATCH_SIZE = int(os.getenv("USAGE_ROLLUP_BATCH_SIZE", "50000"))
+# Rolled-up events older than this are deleted from usage_events
+USAGE_EVENT_RETENTION_DAYS = int(os.getenv("USAGE_EVENT_RETENTION_DAYS", "90"))
+
+
+def rollup_usage_events() -> int:
+    """
+    Aggregate one batch of new usage events into user_agent_usage_daily / user_agent_usage_monthly
+    using stored procedure sp_RollupUsageEvents.
+    Cached sessions of the affected users are invalidated so they pick up the new monthly totals.
+    Returns the number of events processed (0 when there was nothing to do or another rollup is running).
+    """
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        cursor.execute("""
+            EXEC [dbo].[sp_RollupUsageEvents] 
+                @BatchSize = ?, 
+                @RetentionDays = ?;
+        """, USAGE_ROLLUP_BATCH_SIZE, USAGE_EVENT_RETENTION_DAYS)
+
+        row = cursor.fetchone()
+        processed = row.ProcessedEvents if row else 0
+        
+        user_emails = []
+        if processed and cursor.nextset():
+            user_emails = [user_row.UserEmail for user_row in cursor.fetchall()]
+        conn.commit()
+        
+        for user_email in user_emails:
+            invalidate_session(user_email)
+        return processed
+
+    finally:
+        conn.close()
+
+
+def rollup_all_usage_events() -> int:
+    """Run rollup batches until the event log is caught up, returns the total number of events processed"""
+    total = 0
+    while True:
+        processed = rollup_usage_events()
+        total += processed
+        if processed < USAGE_ROLLUP_BATCH_SIZE:
+            return total
+
+
+async def run_usage_rollup_worker():
+    """Background task started by the app lifespan; rolls up usage events every USAGE_ROLLUP_INTERVAL_SECONDS"""
+    while True:
+        await asyncio.sleep(USAGE_ROLLUP_INTERVAL_SECONDS)
+        try:
+            processed = await run_db_once(rollup_all_usage_events)
+            if processed:
+                logger.info(f"Rolled up {processed} usage events")
+        except Exception as e:
+            logger.error(f"Error rolling up usage events: {e}")
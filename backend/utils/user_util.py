@@ -1,9 +1,93 @@
+import os
+import time
+import dotenv
+dotenv.load_dotenv()
+
 from utils.database import get_db_connection
 from models.user_session import UserSession
+from utils.cache_util import LRUCache
 from utils.logging_setup import logger
 
+# Sessions loaded by load_session, keyed by user email (see invalidate_session).
+# The cache and its invalidation are per process: with several uvicorn workers, an agent registration
+# or usage rollup handled by one worker reaches the others only when their entry expires, so keep the
+# TTL short there. Chat turns always read the session from the database (sp_BeginChatTurn).
+SESSION_CACHE_SIZE = int(os.getenv("SESSION_CACHE_SIZE", "1024"))
+SESSION_CACHE_TTL_SECONDS = float(os.getenv("SESSION_CACHE_TTL_SECONDS", "30"))
+session_cache = LRUCache(maxsize=SESSION_CACHE_SIZE, ttl=SESSION_CACHE_TTL_SECONDS, name="user_session")
+# Last session read per user, without TTL or invalidation; only served in degraded mode (DB_DEGRADED_MODE)
+last_known_sessions = LRUCache(maxsize=SESSION_CACHE_SIZE, name="user_session_last_known")
+
+def cache_session(user_session: UserSession):
+    """Store a freshly read session, e.g. the one returned with a chat turn"""
+    if user_session.session_id:
+        session_cache.set(user_session.user_email, user_session)
+        last_known_sessions.set(user_session.user_email, user_session)
+
+def get_last_known_session(user_email: str):
+    """Possibly stale session of a user, for serving while the database is unavailable"""
+    return last_known_sessions.get(user_email)
+
+def invalidate_session(user_email: str):
+    """Drop the cached session of a user after its agents or usage changed"""
+    session_cache.pop(user_email)
+
+def get_session_cache_stats():
+    return session_cache.stats()
+
+
+def read_user_session(cursor, user_session: UserSession):
+    """
+    Fill user_session from the three result sets of sp_CreateOrGetUserSession
+    (session, session agents, current month usage), starting at the cursor's current result set.
+    """
+    row = cursor.fetchone()
+    if row:
+        user_session.session_id = row.SessionID
+        user_session.is_active = True
+        user_session.created_date = row.SessionCreatedDate
+        user_session.modified_date = row.SessionModifiedDate
+    
+        # Move to next result set (session agents)
+        cursor.nextset()
+        user_session.session_agents = []
+        if cursor.description:  # Check if there are results
+            agent_rows = cursor.fetchall()
+            for agent_row in agent_rows:
+                user_session.session_agents.append({
+                    "session_agent_id": agent_row[0],
+                    "session_id": agent_row[1],
+                    "agent_id": agent_row[2],
+                    "agent_code": agent_row[10],
+                    "agent_name": agent_row[3],
+                    "agent_icon": agent_row[4],
+                    "is_active": agent_row[5],
+                    "launched_date": agent_row[6].isoformat() if agent_row[6] else None,
+                    "created_date": agent_row[7].isoformat() if agent_row[7] else None,
+                    "modified_date": agent_row[8].isoformat() if agent_row[8] else None,
+                    "agent_description": agent_row[9]
+                })
+    
+        # Move to next result set (monthly usage)
+        cursor.nextset()
+        usage_row = cursor.fetchone()
+        current_month_tokens = usage_row[0] if usage_row else 0
+        current_month_messages = usage_row[1] if usage_row else 0
+        current_month_threads = usage_row[2] if usage_row else 0
+        user_session.usage_statistics = {
+            "current_month_tokens": current_month_tokens,
+            "current_month_messages": current_month_messages,
+            "current_month_threads": current_month_threads
+        }
+    
+    return user_session
+
 def load_session(user_email: str):
-    """Load user session from the database"""
+    """Load user session, from the session cache when possible, otherwise from the database"""
+    user_session = session_cache.get(user_email)
+    if user_session is not None:
+        return user_session
+    
     conn = None
     cursor = None
     
@@ -13,46 +97,9 @@ def load_session(user_email: str):
         conn = get_db_connection()
         cursor = conn.cursor()
         cursor.execute("EXEC sp_CreateOrGetUserSession @UserEmail = ?", user_email)
-        row = cursor.fetchone()
-        if row:
-            user_session.session_id = row.SessionID
-            user_session.is_active = True
-            user_session.created_date = row.SessionCreatedDate
-            user_session.modified_date = row.SessionModifiedDate
-
-            # Move to next result set (session agents)
-            cursor.nextset()
-            user_session.session_agents = []
-            if cursor.description:  # Check if there are results
-                agent_rows = cursor.fetchall()
-                for agent_row in agent_rows:
-                    user_session.session_agents.append({
-                        "session_agent_id": agent_row[0],
-                        "session_id": agent_row[1],
-                        "agent_id": agent_row[2],
-                        "agent_code": agent_row[11],
-                        "agent_name": agent_row[3],
-                        "agent_icon": agent_row[4],
-                        "is_active": agent_row[5],
-                        "launched_date": agent_row[6].isoformat() if agent_row[6] else None,
-                        "created_date": agent_row[7].isoformat() if agent_row[7] else None,
-                        "modified_date": agent_row[8].isoformat() if agent_row[8] else None,
-                        "agent_description": agent_row[9],
-                        "agent_system_prompt": agent_row[10]
-                    })
-            
-            # Move to next result set (monthly usage)
-            cursor.nextset()
-            usage_row = cursor.fetchone()
-            current_month_tokens = usage_row[0] if usage_row else 0
-            current_month_messages = usage_row[1] if usage_row else 0
-            current_month_threads = usage_row[2] if usage_row else 0
-            user_session.usage_statistics = {
-                "current_month_tokens": current_month_tokens,
-                "current_month_messages": current_month_messages,
-                "current_month_threads": current_month_threads
-            }
-            
+        read_user_session(cursor, user_session)
+        cache_session(user_session)
+        
         return user_session
       
     except Exception as e:
@@ -118,6 +165,7 @@ def register_agent_to_session(user_email: str, agent_id: int):
         """, session_id, agent_id, agent_name, agent_icon)
               
         conn.commit()
+        invalidate_session(user_email)
         return True
         
     except Exception as e:
@@ -131,3 +179,46 @@ def register_agent_to_session(user_email: str, agent_id: int):
             conn.close()
     
     return False
+
+# Rows per batched UPDATE; two parameters per row stay well below SQL Server's 2100 parameter limit
+WRITE_BATCH_SIZE = 500
+
+def _update_from_values(update_sql: str, entries: list):
+    """Run update_sql once per batch of (email, age in ms) entries, with {values} replaced by a VALUES list"""
+    conn = get_db_connection()
+    try:
+        cursor = conn.cursor()
+        for start in range(0, len(entries), WRITE_BATCH_SIZE):
+            batch = entries[start:start + WRITE_BATCH_SIZE]
+            values = ", ".join(["(?, ?)"] * len(batch))
+            params = [param for entry in batch for param in entry]
+            cursor.execute(update_sql.format(values=values), params)
+        conn.commit()
+    finally:
+        conn.close()
+
+def _ages_ms(entries: list) -> list:
+    """
+    Turn (email, time.time() of the event) entries into (email, milliseconds since the event).
+    The UPDATEs subtract the age from GETDATE() so stored dates stay on the database clock, as before write-behind.
+    """
+    now = time.time()
+    return [(email, max(0, int((now - recorded_at) * 1000))) for email, recorded_at in entries]
+
+def save_last_logins(entries: list):
+    """Set last_login_date for many users at once; entries are (email, time.time() of the login) pairs"""
+    _update_from_values("""
+        UPDATE u
+        SET last_login_date = DATEADD(millisecond, -v.AgeMs, GETDATE())
+        FROM users u
+        INNER JOIN (VALUES {values}) AS v (Email, AgeMs) ON u.email = v.Email
+    """, _ages_ms(entries))
+
+def save_session_activity(entries: list):
+    """Set LastActivityDate of the active session for many users at once; entries are (email, time.time() of the activity) pairs"""
+    _update_from_values("""
+        UPDATE s
+        SET LastActivityDate = DATEADD(millisecond, -v.AgeMs, GETDATE())
+        FROM user_current_session s
+        INNER JOIN (VALUES {values}) AS v (UserEmail, AgeMs) ON s.UserEmail = v.UserEmail AND s.IsActive = 1
+    """, _ages_ms(entries))
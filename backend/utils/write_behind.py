@@ -0,0 +1,112 @@
+import os
+import asyncio
+import threading
+import time
+import dotenv
+dotenv.load_dotenv()
+
+from utils.database import run_db_once
+from utils.logging_setup import logger
+from utils.user_util import save_last_logins, save_session_activity
+
+# How often coalesced low-priority writes are flushed to the database
+WRITE_BEHIND_FLUSH_SECONDS = float(os.getenv("WRITE_BEHIND_FLUSH_SECONDS", "5"))
+# Most distinct users buffered per queue; updates for new users beyond this are dropped
+WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000"))
+
+
+class WriteBehindQueue:
+    """
+    Coalesces low-value updates per key (latest value wins) and writes them in batches.
+    Memory is bounded by max_pending keys; updates that do not fit are dropped and counted,
+    as losing a last-login or activity timestamp is preferable to slowing down requests.
+    """
+
+    def __init__(self, name: str, flush_func, max_pending: int = WRITE_BEHIND_MAX_PENDING):
+        self.name = name
+        self._flush_func = flush_func
+        self.max_pending = max(1, max_pending)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._metrics = {
+            "queued": 0,
+            "coalesced": 0,
+            "dropped": 0,
+            "flushed": 0,
+            "flush_failures": 0
+        }
+
+    def add(self, key, value):
+        with self._lock:
+            if key in self._pending:
+                self._metrics["coalesced"] += 1
+            elif len(self._pending) >= self.max_pending:
+                self._metrics["dropped"] += 1
+                return
+            self._pending[key] = value
+            self._metrics["queued"] += 1
+
+    def flush(self) -> int:
+        """Write every pending update (blocking); returns the number of rows written"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        try:
+            self._flush_func(list(pending.items()))
+        except Exception as e:
+            logger.error(f"Error flushing {self.name} writes, retrying next interval: {e}")
+            with self._lock:
+                self._metrics["flush_failures"] += 1
+                # Keep newer updates queued meanwhile; drop what no longer fits
+                for key, value in pending.items():
+                    if key in self._pending:
+                        continue
+                    if len(self._pending) >= self.max_pending:
+                        self._metrics["dropped"] += 1
+                        continue
+                    self._pending[key] = value
+            return 0
+
+        with self._lock:
+            self._metrics["flushed"] += len(pending)
+        return len(pending)
+
+    def stats(self):
+        with self._lock:
+            return {"name": self.name, "pending": len(self._pending), "max_pending": self.max_pending, **self._metrics}
+
+
+last_login_writes = WriteBehindQueue("last_login", save_last_logins)
+session_activity_writes = WriteBehindQueue("session_activity", save_session_activity)
+_queues = (last_login_writes, session_activity_writes)
+
+
+def record_last_login(user_email: str):
+    last_login_writes.add(user_email, time.time())
+
+
+def record_session_activity(user_email: str):
+    session_activity_writes.add(user_email, time.time())
+
+
+def flush_write_behind():
+    """Flush every queue (blocking), used by the background flusher and on shutdown"""
+    for queue in _queues:
+        queue.flush()
+
+
+def get_write_behind_stats():
+    """Return pending, coalesced, dropped and flushed counters per queue"""
+    return [queue.stats() for queue in _queues]
+
+
+async def run_write_behind_flusher():
+    """Background task started by the app lifespan; flushes the queues every WRITE_BEHIND_FLUSH_SECONDS"""
+    while True:
+        await asyncio.sleep(WRITE_BEHIND_FLUSH_SECONDS)
+        try:
+            await run_db_once(flush_write_behind)
+        except Exception as e:
+            logger.error(f"Error flushing write-behind queues: {e}")
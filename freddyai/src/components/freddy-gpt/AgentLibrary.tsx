@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react'
 import { Button } from '../ui/button'
 import { Plus, X } from 'lucide-react'
 import { useUserSession } from '../../hooks/useUserSession'
+import userSessionService from '../../utils/userSessionUtils'
 
 // Agent interface type
 interface Agent {
@@ -47,6 +48,13 @@ const AgentLibrary: React.FC<AgentLibraryProps> = ({ isOpen, onClose, onCreateAg
     setLoading(true)
     setError(null)
     try {
+      // The agent library comes with the page data when the library is opened right after load
+      const bootstrapAgents = await userSessionService.getBootstrapAgents()
+      if (bootstrapAgents) {
+        setAgents(bootstrapAgents as unknown as Agent[])
+        return
+      }
+
       const response = await fetch('/api/agents/list')
       if (!response.ok) {
         throw new Error(`Failed to fetch agents: ${response.statusText}`)
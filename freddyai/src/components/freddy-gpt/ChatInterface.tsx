@@ -1,4 +1,4 @@
-import React, { useState, useRef, useEffect } from 'react'
+import React, { useState, useRef, useEffect, useLayoutEffect } from 'react'
 import { Button } from '../ui/button'
 import { Send, Upload, Search, ChevronDown, Brain, Zap, Bot, X, FileText, Image, Video, User } from 'lucide-react'
 import { useUserSession } from '../../hooks/useUserSession'
@@ -7,6 +7,33 @@ import AgentLibrary from './AgentLibrary'
 import ReactMarkdown from 'react-markdown'
 import remarkGfm from 'remark-gfm'
 
+// Messages loaded per request; older ones are loaded when scrolling to the top of the thread
+const MESSAGE_PAGE_SIZE = 50
+
+type StreamingMessage = {
+  agent_code: string
+  content: string
+  tokens: number
+  created_date: string
+}
+
+const toThreadMessage = (streaming: StreamingMessage): ThreadMessage => ({
+  message_id: (Date.now() + Math.random()).toString(),
+  thread_id: '',
+  agent_id: undefined,
+  agent_name: streaming.agent_code,
+  role: 'assistant',
+  content: streaming.content,
+  input_tokens: 0,
+  output_tokens: streaming.tokens,
+  total_tokens: streaming.tokens,
+  message_order: 0,
+  is_edited: false,
+  edited_date: null,
+  created_date: streaming.created_date || new Date().toISOString(),
+  modified_date: null
+})
+
 const ChatInterface: React.FC = () => {
   const { loading: sessionLoading, refreshSession, session } = useUserSession()
   const [message, setMessage] = useState('')
@@ -18,10 +45,13 @@ const ChatInterface: React.FC = () => {
   const [hasCurrentThread, setHasCurrentThread] = useState<boolean>(false)
   const [threadLoading, setThreadLoading] = useState(true)
   const [threadError, setThreadError] = useState<string | null>(null)
+  const [currentThreadId, setCurrentThreadId] = useState<string | null>(null)
+  const [olderMessagesCursor, setOlderMessagesCursor] = useState<number | null>(null)
+  const [loadingOlderMessages, setLoadingOlderMessages] = useState(false)
   
   // Streaming state
   const [isStreaming, setIsStreaming] = useState(false)
-  const [streamingMessage, setStreamingMessage] = useState<{agent_code: string, content: string, tokens: number, created_date: string} | null>(null)
+  const [streamingMessages, setStreamingMessages] = useState<StreamingMessage[]>([])
   const [showResearchDropdown, setShowResearchDropdown] = useState(false)
   const [showModelDropdown, setShowModelDropdown] = useState(false)
   const [showAgentLibrary, setShowAgentLibrary] = useState(false)
@@ -49,6 +79,9 @@ const ChatInterface: React.FC = () => {
   const fileInputRef = useRef<HTMLInputElement>(null)
   const dropdownRef = useRef<HTMLDivElement>(null)
   const modelDropdownRef = useRef<HTMLDivElement>(null)
+  const messagesContainerRef = useRef<HTMLDivElement>(null)
+  // Scroll height before older messages were prepended, to keep the visible messages in place
+  const scrollHeightBeforePrependRef = useRef<number | null>(null)
 
   const suggestedPrompts = [
     "How has non-alcoholic beer demand changed in the US?",
@@ -94,11 +127,13 @@ const ChatInterface: React.FC = () => {
     setThreadError(null)
     
     try {
-      const response = await userSessionService.getCurrentThreadMessages()
+      const response = await userSessionService.getCurrentThreadMessages(MESSAGE_PAGE_SIZE)
       if (response.success && response.data) {
-        const { has_current_thread, messages } = response.data
+        const { has_current_thread, thread_id, messages, has_more, next_cursor } = response.data
         setHasCurrentThread(has_current_thread)
+        setCurrentThreadId(thread_id)
         setCurrentThreadMessages(messages || [])
+        setOlderMessagesCursor(has_more && next_cursor != null ? next_cursor : null)
       } else {
         setThreadError(response.error || 'Failed to load current thread')
       }
@@ -110,6 +145,43 @@ const ChatInterface: React.FC = () => {
     }
   }
 
+  const loadOlderMessages = async () => {
+    if (!currentThreadId || olderMessagesCursor === null || loadingOlderMessages) return
+    setLoadingOlderMessages(true)
+    
+    try {
+      const response = await userSessionService.getThreadMessages(currentThreadId, {
+        before: olderMessagesCursor,
+        limit: MESSAGE_PAGE_SIZE
+      })
+      if (response.success && response.data) {
+        const page = response.data
+        scrollHeightBeforePrependRef.current = messagesContainerRef.current?.scrollHeight ?? null
+        setCurrentThreadMessages(prev => [...page.messages, ...prev])
+        setOlderMessagesCursor(page.has_more ? page.next_cursor : null)
+      }
+    } catch (error) {
+      console.error('Error loading older messages:', error)
+    } finally {
+      setLoadingOlderMessages(false)
+    }
+  }
+
+  const handleMessagesScroll = (event: React.UIEvent<HTMLDivElement>) => {
+    if (event.currentTarget.scrollTop < 100) {
+      loadOlderMessages()
+    }
+  }
+
+  // Keep the messages in view where they were once older ones are prepended
+  useLayoutEffect(() => {
+    const container = messagesContainerRef.current
+    if (container && scrollHeightBeforePrependRef.current !== null) {
+      container.scrollTop += container.scrollHeight - scrollHeightBeforePrependRef.current
+      scrollHeightBeforePrependRef.current = null
+    }
+  }, [currentThreadMessages])
+
   // Helper function to get agent icon from session by agent_id or agent_name
   const getAgentIcon = (agentId?: number, agentName?: string): string => {
     if (!session?.session_agents) {
@@ -228,10 +300,12 @@ const ChatInterface: React.FC = () => {
     if (!message.trim() || isStreaming) return
 
     const userMessage = message.trim()
+    // The turn changes the thread and usage held by the page data
+    userSessionService.invalidateBootstrap()
     setMessage('')
     setSelectedFile(null)
     setIsStreaming(true)
-    setStreamingMessage(null)
+    setStreamingMessages([])
 
     // Add user message to display immediately
     const newUserMessage: ThreadMessage = {
@@ -287,68 +361,39 @@ const ChatInterface: React.FC = () => {
             try {
               const data = JSON.parse(line.slice(6))
               
-              if (data.type === 'message') {
-                setStreamingMessage(prev => {
-                  // If agent code changes, finalize previous message first
-                  if (prev && prev.agent_code !== data.agent_code) {
-                    const agentMessage: ThreadMessage = {
-                      message_id: (Date.now() + Math.random()).toString(),
-                      thread_id: '',
-                      agent_id: undefined,
-                      agent_name: prev.agent_code,
-                      role: 'assistant',
-                      content: prev.content,
-                      input_tokens: 0,
-                      output_tokens: prev.tokens,
-                      total_tokens: prev.tokens,
-                      message_order: 0,
-                      is_edited: false,
-                      edited_date: null,
-                      created_date: prev.created_date || new Date().toISOString(),
-                      modified_date: null
-                    }
-                    setCurrentThreadMessages(prevMsgs => [...prevMsgs, agentMessage])
-                    
-                    // Start new streaming message with new agent
-                    return {
+              if (data.type === 'delta') {
+                // Token delta: append to the in-progress bubble of this agent
+                setStreamingMessages(prev => {
+                  const index = prev.findIndex(item => item.agent_code === data.agent_code)
+                  if (index === -1) {
+                    return [...prev, {
                       agent_code: data.agent_code,
                       content: data.content,
-                      tokens: data.tokens,
-                      created_date: data.created_date || new Date().toISOString()
-                    }
-                  }
-                  
-                  // Same agent, append content
-                  return {
-                    agent_code: data.agent_code,
-                    content: prev ? prev.content + data.content : data.content,
-                    tokens: data.tokens,
-                    created_date: data.created_date || prev?.created_date || new Date().toISOString()
+                      tokens: 0,
+                      created_date: new Date().toISOString()
+                    }]
                   }
+                  const next = [...prev]
+                  next[index] = { ...next[index], content: next[index].content + data.content }
+                  return next
                 })
+              } else if (data.type === 'message') {
+                // Final content of a step replaces the streamed deltas of that agent
+                const finalMessage: StreamingMessage = {
+                  agent_code: data.agent_code,
+                  content: data.content,
+                  tokens: data.tokens,
+                  created_date: data.created_date || new Date().toISOString()
+                }
+                setStreamingMessages(prev => prev.filter(item => item.agent_code !== data.agent_code))
+                setCurrentThreadMessages(prevMsgs => [...prevMsgs, toThreadMessage(finalMessage)])
               } else if (data.type === 'stream_end') {
-                // Finalize the streaming message
-                setStreamingMessage(current => {
-                  if (current) {
-                    const agentMessage: ThreadMessage = {
-                      message_id: (Date.now() + 1).toString(),
-                      thread_id: '',
-                      agent_id: undefined,
-                      agent_name: current.agent_code,
-                      role: 'assistant',
-                      content: current.content,
-                      input_tokens: 0,
-                      output_tokens: current.tokens,
-                      total_tokens: current.tokens,
-                      message_order: 0,
-                      is_edited: false,
-                      edited_date: null,
-                      created_date: current.created_date || new Date().toISOString(),
-                      modified_date: null
-                    }
-                    setCurrentThreadMessages(prev => [...prev, agentMessage])
+                // Finalize anything still streaming
+                setStreamingMessages(current => {
+                  if (current.length > 0) {
+                    setCurrentThreadMessages(prev => [...prev, ...current.map(toThreadMessage)])
                   }
-                  return null
+                  return []
                 })
                 break
               }
@@ -587,8 +632,19 @@ const ChatInterface: React.FC = () => {
         {/* Messages View */}
         {!sessionLoading && !threadLoading && !threadError && (hasCurrentThread || currentThreadMessages.length > 0) && (
           <div className="flex-1 flex flex-col min-h-0">
-            <div className="flex-1 overflow-y-auto mb-4">
+            <div ref={messagesContainerRef} onScroll={handleMessagesScroll} className="flex-1 overflow-y-auto mb-4">
               <div className="max-w-4xl mx-auto space-y-4">
+                {olderMessagesCursor !== null && (
+                  <div className="text-center">
+                    <button
+                      onClick={loadOlderMessages}
+                      disabled={loadingOlderMessages}
+                      className="text-xs text-gray-500 hover:text-gray-700 disabled:opacity-50"
+                    >
+                      {loadingOlderMessages ? 'Loading earlier messages...' : 'Load earlier messages'}
+                    </button>
+                  </div>
+                )}
                 {currentThreadMessages.map((msg, index) => {
                   const isUserMessage = msg.role?.toLowerCase() === 'user'
                   const prevMsg = index > 0 ? currentThreadMessages[index - 1] : null
@@ -690,8 +746,8 @@ const ChatInterface: React.FC = () => {
                 })}
                 
                 {/* Streaming Message */}
-                {streamingMessage && (
-                  <div className="flex gap-3 justify-start">
+                {streamingMessages.map(streamingMessage => (
+                  <div key={streamingMessage.agent_code} className="flex gap-3 justify-start">
                     <div className="flex-shrink-0">
                       <div className="w-8 h-8 rounded-full bg-gradient-to-br from-blue-500 to-purple-600 flex items-center justify-center text-white font-semibold text-sm shadow-sm">
                         <span className="text-lg">{getAgentIcon(undefined, streamingMessage.agent_code)}</span>
@@ -721,7 +777,7 @@ const ChatInterface: React.FC = () => {
                       </div>
                     </div>
                   </div>
-                )}
+                ))}
               </div>
             </div>
           </div>
@@ -31,7 +31,11 @@ const ChatSidebar: React.FC<ChatSidebarProps> = ({ onThreadChange }) => {
   const [loading, setLoading] = useState(true)
   const [error, setError] = useState<string | null>(null)
   const [openMenuThreadId, setOpenMenuThreadId] = useState<string | null>(null)
+  const [nextCursor, setNextCursor] = useState<string | null>(null)
+  const [loadingOlder, setLoadingOlder] = useState(false)
   const menuRef = useRef<HTMLDivElement>(null)
+  // Token of the last thread list read, used to fetch only the threads changed since
+  const syncTokenRef = useRef<string | null>(null)
 
   // Load threads on component mount
   useEffect(() => {
@@ -55,23 +59,33 @@ const ChatSidebar: React.FC<ChatSidebarProps> = ({ onThreadChange }) => {
     }
   }, [openMenuThreadId])
 
+  // Newest activity first, the order of the thread list
+  const sortThreads = (list: ChatThread[]) =>
+    [...list].sort((a, b) => new Date(b.last_activity_date).getTime() - new Date(a.last_activity_date).getTime())
+
+  const loadFirstPage = async () => {
+    const response = await userSessionService.getThreads()
+    if (response.success && response.data) {
+      setThreads(response.data.threads)
+      setNextCursor(response.data.next_cursor)
+      syncTokenRef.current = response.data.sync_token
+    } else {
+      setError(response.error || 'Failed to load threads')
+    }
+  }
+
   const loadThreadsAndCurrentThread = async () => {
     setLoading(true)
     setError(null)
     
     try {
-      // Load all threads
-      const threadsResponse = await userSessionService.getAllThreads()
-      if (threadsResponse.success && threadsResponse.data) {
-        setThreads(threadsResponse.data)
-      } else {
-        setError(threadsResponse.error || 'Failed to load threads')
-      }
+      // Load the most recent threads, older ones are loaded on demand
+      await loadFirstPage()
 
-      // Get current thread
-      const currentThreadResponse = await userSessionService.getCurrentThreadMessages()
+      // Get current thread (only its id is needed, not its messages)
+      const currentThreadResponse = await userSessionService.getCurrentThreadMessages(1)
       if (currentThreadResponse.success && currentThreadResponse.data) {
-        const currentThread = currentThreadResponse.data.messages?.[0]?.thread_id
+        const currentThread = currentThreadResponse.data.thread_id
         if (currentThread) {
           setCurrentThreadId(currentThread)
         }
@@ -88,15 +102,61 @@ const ChatSidebar: React.FC<ChatSidebarProps> = ({ onThreadChange }) => {
     setError(null)
     
     try {
-      const response = await userSessionService.getAllThreads()
+      await loadFirstPage()
+    } catch (err) {
+      setError('Failed to load chat threads')
+      console.error('Error loading threads:', err)
+    }
+  }
+
+  const loadOlderThreads = async () => {
+    if (!nextCursor) return
+    setLoadingOlder(true)
+    
+    try {
+      const response = await userSessionService.getThreads({ cursor: nextCursor })
       if (response.success && response.data) {
-        setThreads(response.data)
+        const page = response.data
+        setThreads(prevThreads => {
+          const knownIds = new Set(prevThreads.map(thread => thread.thread_id))
+          return [...prevThreads, ...page.threads.filter(thread => !knownIds.has(thread.thread_id))]
+        })
+        setNextCursor(page.next_cursor)
       } else {
         setError(response.error || 'Failed to load threads')
       }
     } catch (err) {
       setError('Failed to load chat threads')
-      console.error('Error loading threads:', err)
+      console.error('Error loading older threads:', err)
+    } finally {
+      setLoadingOlder(false)
+    }
+  }
+
+  // Apply only the threads changed since the last read (created, updated or deleted) to the list
+  const syncThreads = async () => {
+    if (!syncTokenRef.current) {
+      await loadThreads()
+      return
+    }
+    setError(null)
+    
+    try {
+      const response = await userSessionService.getThreads({ since: syncTokenRef.current })
+      if (response.success && response.data) {
+        const changed = response.data.threads
+        const changedIds = new Set(changed.map(thread => thread.thread_id))
+        setThreads(prevThreads => sortThreads([
+          ...prevThreads.filter(thread => !changedIds.has(thread.thread_id)),
+          ...changed.filter(thread => thread.is_active)
+        ]))
+        syncTokenRef.current = response.data.sync_token ?? syncTokenRef.current
+      } else {
+        setError(response.error || 'Failed to load threads')
+      }
+    } catch (err) {
+      setError('Failed to load chat threads')
+      console.error('Error syncing threads:', err)
     }
   }
 
@@ -109,8 +169,8 @@ const ChatSidebar: React.FC<ChatSidebarProps> = ({ onThreadChange }) => {
         if (newThreadId) {
           setCurrentThreadId(newThreadId)
         }
-        // Reload threads to show the new one
-        await loadThreads()
+        // Sync threads to show the new one
+        await syncThreads()
         // Notify parent component of the change
         onThreadChange?.()
       } else {
@@ -154,8 +214,8 @@ const ChatSidebar: React.FC<ChatSidebarProps> = ({ onThreadChange }) => {
           // Notify parent to clear messages
           onThreadChange?.()
         }
-        // Reload threads to refresh the list
-        await loadThreads()
+        // Sync threads to drop the deleted one
+        await syncThreads()
       } else {
         setError(response.error || 'Failed to delete thread')
       }
@@ -334,6 +394,15 @@ const ChatSidebar: React.FC<ChatSidebarProps> = ({ onThreadChange }) => {
             {renderThreadGroup(groupedThreads.yesterday, 'Yesterday')}
             {renderThreadGroup(groupedThreads.thisWeek, 'This Week')}
             {renderThreadGroup(groupedThreads.older, 'Older')}
+            {nextCursor && (
+              <Button 
+                onClick={loadOlderThreads} 
+                disabled={loadingOlder}
+                className="w-full text-xs bg-gray-800 hover:bg-gray-700 text-gray-300"
+              >
+                {loadingOlder ? 'Loading...' : 'Show older chats'}
+              </Button>
+            )}
           </>
         )}
       </div>
@@ -1,4 +1,5 @@
 import React, { createContext, useContext, useState, useEffect } from 'react'
+import userSessionService from '../utils/userSessionUtils'
 
 interface User {
   email: string
@@ -54,23 +55,12 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
   const checkAuthStatus = async () => {
     try {
       setLoading(true)
-      const response = await fetch('http://localhost:8000/api/auth/status', {
-        method: 'GET',
-        credentials: 'include', // Include cookies in the request
-        headers: {
-          'Content-Type': 'application/json',
-        },
-      })
+      // Page data (session, threads, messages, agents) comes with the auth status in one request
+      const data = await userSessionService.loadBootstrap()
 
-      if (response.ok) {
-        const data = await response.json()
-        if (data.authenticated && data.user) {
-          setIsLoggedIn(true)
-          setUser(data.user)
-        } else {
-          setIsLoggedIn(false)
-          setUser(null)
-        }
+      if (data && data.authenticated && data.user) {
+        setIsLoggedIn(true)
+        setUser(data.user)
       } else {
         setIsLoggedIn(false)
         setUser(null)
@@ -122,6 +112,8 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
 
       if (response.ok) {
         const data = await response.json()
+        // Page data loaded before login is not the user's
+        userSessionService.invalidateBootstrap()
         setIsLoggedIn(true)
         setUser(data.user)
         return true
@@ -155,6 +147,7 @@ export const AuthProvider: React.FC<AuthProviderProps> = ({ children }) => {
       console.error('Logout error:', err)
     } finally {
       // Always clear local state regardless of backend response
+      userSessionService.invalidateBootstrap()
       setIsLoggedIn(false)
       setUser(null)
       setError(null)
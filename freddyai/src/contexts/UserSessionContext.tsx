@@ -9,7 +9,6 @@ export interface UserSessionContextType {
   error: string | null
   refreshSession: () => Promise<void>
   launchAgent: (agentId: number) => Promise<boolean>
-  recordUsage: (agentId: number, tokensUsed: number, messageCount?: number) => Promise<boolean>
   getAvailableAgents: () => SessionAgent[]
   getUsageStatistics: () => { tokens: string; messages: string; threads: string } | null
 }
@@ -46,28 +45,6 @@ export const UserSessionProvider: React.FC<UserSessionProviderProps> = ({ childr
     }
   }, [])
 
-  const recordUsage = useCallback(async (agentId: number, tokensUsed: number, messageCount = 1): Promise<boolean> => {
-    try {
-      const result = await userSessionService.recordUsage(agentId, tokensUsed, messageCount)
-      
-      if (result.success && session) {
-        // Update local session state with new token count
-        setSession(prevSession => prevSession ? {
-          ...prevSession,
-          usage_statistics: {
-            ...prevSession.usage_statistics,
-            current_month_tokens: prevSession.usage_statistics.current_month_tokens + tokensUsed
-          }
-        } : null)
-      }
-      
-      return result.success
-    } catch (err) {
-      console.error('Error recording usage:', err)
-      return false
-    }
-  }, [session])
-
   const getAvailableAgents = useCallback(() => {
     if (!session) return []
     return userSessionService.getAvailableAgents(session)
@@ -109,7 +86,6 @@ export const UserSessionProvider: React.FC<UserSessionProviderProps> = ({ childr
     error,
     refreshSession,
     launchAgent,
-    recordUsage,
     getAvailableAgents,
     getUsageStatistics
   }
@@ -34,6 +34,13 @@ export interface ChatThread {
   created_date: string
   last_activity_date: string
   message_count: number
+  is_active: boolean
+}
+
+export interface ThreadPage {
+  threads: ChatThread[]
+  next_cursor: string | null
+  sync_token: string | null
 }
 
 export interface ThreadMessage {
@@ -54,6 +61,12 @@ export interface ThreadMessage {
   metadata?: Record<string, unknown>
 }
 
+export interface ThreadMessagePage {
+  messages: ThreadMessage[]
+  has_more: boolean
+  next_cursor: number | null
+}
+
 export interface UserSession {
   session_id: string
   user_email: string
@@ -65,6 +78,33 @@ export interface UserSession {
   session_created: boolean
 }
 
+export interface CurrentThreadMessages {
+  has_current_thread: boolean
+  thread_id: string | null
+  thread_title?: string
+  thread_icon?: string
+  messages: ThreadMessage[]
+  total_messages: number
+  has_more?: boolean
+  next_cursor?: number | null
+  message?: string
+}
+
+export interface BootstrapData {
+  authenticated: boolean
+  degraded?: boolean
+  user: { email: string; created_date: string; last_login_date?: string } | null
+  session?: UserSession
+  agents?: Record<string, unknown>[]
+  threads?: Record<string, unknown>[]
+  threads_next_cursor?: string | null
+  threads_sync_token?: string | null
+  current_thread?: CurrentThreadMessages
+}
+
+// How long the page data of /api/bootstrap stands in for the first loads of the page
+const BOOTSTRAP_REUSE_MS = 10 * 1000
+
 export interface ApiResponse<T> {
   success: boolean
   data?: T
@@ -73,64 +113,86 @@ export interface ApiResponse<T> {
 
 class UserSessionService {
   private baseUrl = '/api/user'
+  private bootstrapRequest: Promise<BootstrapData | null> | null = null
+  private bootstrapLoadedAt = 0
 
   /**
-   * Get user session with all associated data
+   * Load everything the page needs on load (auth status, session, agents, threads and current
+   * thread messages) in one request. The session, thread and agent loads of the page reuse it
+   * for a short while instead of making their own requests, until something is changed.
    */
-  async getUserSession(): Promise<ApiResponse<UserSession>> {
-    try {
-      const response = await fetch(`${this.baseUrl}/session`, {
+  async loadBootstrap(): Promise<BootstrapData | null> {
+    if (!this.bootstrapRequest || Date.now() - this.bootstrapLoadedAt > BOOTSTRAP_REUSE_MS) {
+      this.bootstrapLoadedAt = Date.now()
+      this.bootstrapRequest = fetch('/api/bootstrap', {
         method: 'GET',
         credentials: 'include',
         headers: {
           'Content-Type': 'application/json',
         },
       })
+        .then(response => response.ok ? response.json() as Promise<BootstrapData> : null)
+        .catch(error => {
+          console.error('Error loading page data:', error)
+          return null
+        })
+    }
+    return this.bootstrapRequest
+  }
 
-      if (!response.ok) {
-        throw new Error(`Failed to fetch session: ${response.statusText}`)
-      }
+  /**
+   * Forget the loaded page data, called after anything it holds has changed
+   */
+  invalidateBootstrap() {
+    this.bootstrapRequest = null
+  }
 
-      const sessionData: UserSession = await response.json()
-      return { success: true, data: sessionData }
-    } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : 'Failed to load session'
-      console.error('Error fetching session:', error)
-      return { success: false, error: errorMessage }
+  /**
+   * Page data of the last loadBootstrap, when still fresh and authenticated
+   */
+  private async getBootstrap(): Promise<BootstrapData | null> {
+    if (!this.bootstrapRequest || Date.now() - this.bootstrapLoadedAt > BOOTSTRAP_REUSE_MS) {
+      return null
     }
+    const data = await this.bootstrapRequest
+    return data?.authenticated ? data : null
+  }
+
+  /**
+   * Agent library entries from the page data, when still fresh
+   */
+  async getBootstrapAgents(): Promise<Record<string, unknown>[] | null> {
+    const bootstrap = await this.getBootstrap()
+    return bootstrap?.agents ?? null
   }
 
   /**
-   * Record usage statistics for the current session
+   * Get user session with all associated data
    */
-  async recordUsage(
-    agentId: number, 
-    tokensUsed: number, 
-    messageCount: number = 1
-  ): Promise<ApiResponse<void>> {
+  async getUserSession(): Promise<ApiResponse<UserSession>> {
     try {
-      const response = await fetch(`${this.baseUrl}/usage/record`, {
-        method: 'POST',
+      const bootstrap = await this.getBootstrap()
+      if (bootstrap?.session) {
+        return { success: true, data: bootstrap.session }
+      }
+
+      const response = await fetch(`${this.baseUrl}/session`, {
+        method: 'GET',
         credentials: 'include',
         headers: {
           'Content-Type': 'application/json',
         },
-        body: JSON.stringify({
-          agent_id: agentId,
-          tokens_used: tokensUsed,
-          message_count: messageCount
-        })
       })
 
       if (!response.ok) {
-        throw new Error(`Failed to record usage: ${response.statusText}`)
+        throw new Error(`Failed to fetch session: ${response.statusText}`)
       }
 
-      await response.json() // Consume response
-      return { success: true, data: undefined }
+      const sessionData: UserSession = await response.json()
+      return { success: true, data: sessionData }
     } catch (error) {
-      const errorMessage = error instanceof Error ? error.message : 'Failed to record usage'
-      console.error('Error recording usage:', error)
+      const errorMessage = error instanceof Error ? error.message : 'Failed to load session'
+      console.error('Error fetching session:', error)
       return { success: false, error: errorMessage }
     }
   }
@@ -172,6 +234,7 @@ class UserSessionService {
    * Launch/register a new agent in the current session
    */
   async launchAgent(agentId: number): Promise<ApiResponse<void>> {
+    this.invalidateBootstrap()
     try {
       const response = await fetch(`${this.baseUrl}/agents/launch`, {
         method: 'POST',
@@ -198,11 +261,45 @@ class UserSessionService {
   }
 
   /**
-   * Get all chat threads for the current user
+   * Map a thread of the backend to the frontend ChatThread interface
    */
-  async getAllThreads(): Promise<ApiResponse<ChatThread[]>> {
+  mapThread(thread: Record<string, unknown>): ChatThread {
+    return {
+      thread_id: thread.thread_id as string,
+      title: (thread.thread_title || thread.title || 'Untitled Thread') as string,
+      icon: (thread.thread_icon || thread.icon || 'MessageSquare') as string,
+      created_date: thread.created_date as string,
+      last_activity_date: thread.last_activity_date as string,
+      message_count: (thread.total_messages ?? thread.message_count ?? 0) as number,
+      is_active: (thread.is_active ?? true) as boolean
+    }
+  }
+
+  /**
+   * Get chat threads for the current user, most recent first.
+   * Pass next_cursor of the previous page as cursor to get the next page, or a sync_token
+   * as since to get only the threads changed since then (deleted ones with is_active false).
+   */
+  async getThreads(options: { cursor?: string; since?: string } = {}): Promise<ApiResponse<ThreadPage>> {
     try {
-      const response = await fetch('/api/threads/list', {
+      const bootstrap = !options.cursor && !options.since ? await this.getBootstrap() : null
+      if (bootstrap?.threads) {
+        return {
+          success: true,
+          data: {
+            threads: bootstrap.threads.map(thread => this.mapThread(thread)),
+            next_cursor: bootstrap.threads_next_cursor ?? null,
+            sync_token: bootstrap.threads_sync_token ?? null
+          }
+        }
+      }
+
+      const params = new URLSearchParams()
+      if (options.cursor) params.set('cursor', options.cursor)
+      if (options.since) params.set('since', options.since)
+      const query = params.toString()
+
+      const response = await fetch(`/api/threads/list${query ? `?${query}` : ''}`, {
         method: 'GET',
         credentials: 'include',
         headers: {
@@ -217,17 +314,14 @@ class UserSessionService {
 
       const data = await response.json()
       
-      // Map backend response to frontend ChatThread interface
-      const threads: ChatThread[] = (data || []).map((thread: Record<string, unknown>) => ({
-        thread_id: thread.thread_id as string,
-        title: (thread.thread_title || thread.title || 'Untitled Thread') as string,
-        icon: (thread.thread_icon || thread.icon || 'MessageSquare') as string,
-        created_date: thread.created_date as string,
-        last_activity_date: thread.last_activity_date as string,
-        message_count: (thread.total_messages ?? thread.message_count ?? 0) as number
-      }))
-      
-      return { success: true, data: threads }
+      return {
+        success: true,
+        data: {
+          threads: (data || []).map((thread: Record<string, unknown>) => this.mapThread(thread)),
+          next_cursor: response.headers.get('X-Next-Cursor'),
+          sync_token: response.headers.get('X-Sync-Token')
+        }
+      }
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : 'Failed to load threads'
       console.error('Error loading threads:', error)
@@ -239,6 +333,7 @@ class UserSessionService {
    * Create a new chat thread
    */
   async createThread(title: string, icon: string = 'MessageSquare'): Promise<ApiResponse<{ thread_id: string }>> {
+    this.invalidateBootstrap()
     try {
       const response = await fetch('/api/threads/create', {
         method: 'POST',
@@ -270,6 +365,7 @@ class UserSessionService {
    * Delete (deactivate) a chat thread
    */
   async deleteThread(threadId: string): Promise<ApiResponse<void>> {
+    this.invalidateBootstrap()
     try {
       const response = await fetch(`/api/threads/delete/${threadId}`, {
         method: 'DELETE',
@@ -291,11 +387,20 @@ class UserSessionService {
   }
 
   /**
-   * Get all messages for a specific thread
+   * Get the messages of a thread, all of them or, with limit, the newest ones before the before cursor
+   * (pass next_cursor of the previous page to get older messages)
    */
-  async getThreadMessages(threadId: string): Promise<ApiResponse<ThreadMessage[]>> {
+  async getThreadMessages(
+    threadId: string,
+    options: { before?: number; limit?: number } = {}
+  ): Promise<ApiResponse<ThreadMessagePage>> {
     try {
-      const response = await fetch(`/api/threads/byid/${threadId}/messages`, {
+      const params = new URLSearchParams()
+      if (options.before !== undefined) params.set('before', options.before.toString())
+      if (options.limit !== undefined) params.set('limit', options.limit.toString())
+      const query = params.toString()
+
+      const response = await fetch(`/api/threads/byid/${threadId}/messages${query ? `?${query}` : ''}`, {
         method: 'GET',
         credentials: 'include',
         headers: {
@@ -309,7 +414,14 @@ class UserSessionService {
       }
 
       const data = await response.json()
-      return { success: true, data: data.messages || [] }
+      return {
+        success: true,
+        data: {
+          messages: data.messages || [],
+          has_more: data.has_more ?? false,
+          next_cursor: data.next_cursor ?? null
+        }
+      }
     } catch (error) {
       const errorMessage = error instanceof Error ? error.message : 'Failed to load thread messages'
       console.error('Error loading thread messages:', error)
@@ -318,19 +430,19 @@ class UserSessionService {
   }
 
   /**
-   * Get current thread messages (checks cookie, falls back to most recent thread)
+   * Get current thread messages (checks cookie, falls back to most recent thread);
+   * with limit only the newest messages, older ones are loaded with getThreadMessages
    */
-  async getCurrentThreadMessages(): Promise<ApiResponse<{
-    has_current_thread: boolean
-    thread_id: string | null
-    thread_title?: string
-    thread_icon?: string
-    messages: ThreadMessage[]
-    total_messages: number
-    message?: string
-  }>> {
+  async getCurrentThreadMessages(limit?: number): Promise<ApiResponse<CurrentThreadMessages>> {
     try {
-      const response = await fetch('/api/threads/current/messages', {
+      // The page data holds one page of the newest messages, as the chat view loads them
+      const bootstrap = limit !== undefined ? await this.getBootstrap() : null
+      if (bootstrap?.current_thread) {
+        return { success: true, data: bootstrap.current_thread }
+      }
+
+      const query = limit !== undefined ? `?limit=${limit}` : ''
+      const response = await fetch(`/api/threads/current/messages${query}`, {
         method: 'GET',
         credentials: 'include',
         headers: {
@@ -356,6 +468,7 @@ class UserSessionService {
    * Set the current thread by ID (updates cookie)
    */
   async setCurrentThread(threadId: string): Promise<ApiResponse<void>> {
+    this.invalidateBootstrap()
     try {
       const response = await fetch(`/api/threads/set-current/${threadId}`, {
         method: 'POST',